@@ -0,0 +1,373 @@
+# alertas.py
+# Despacho de alertas de segurança para a guarita sem travar a visão.
+# publicar() só faz a checagem barata (deduplicação por placa) e coloca o
+# alerta na fila de cada saída configurada (console, arquivo, webhook,
+# socket, som). Cada saída tem a sua própria thread de entrega: um webhook
+# pendurado ou em reenvio (espera exponencial) não atrasa o console, o
+# arquivo nem o som, e quem publicou nunca espera.
+#
+# Limite de taxa só nas saídas barulhentas (som, webhook): o excedente do
+# minuto é agrupado em um único alerta-resumo. Console, arquivo e socket
+# recebem todos os alertas.
+#
+# Saídas extras por variável de ambiente:
+#   ALERTA_WEBHOOK=http://guarita.local:8080/alerta   (POST JSON)
+#   ALERTA_SOCKET=guarita.local:9000                  (uma linha JSON por alerta, TCP)
+#   ALERTA_SOM=1                                      (bipe no terminal / Windows)
+import os
+import sys
+import json
+import time
+import heapq
+import queue
+import socket
+import atexit
+import threading
+import urllib.request
+from collections import deque
+
+# Mesmo alerta (placa + status) dentro desta janela é descartado
+JANELA_DEDUP_SEGUNDOS = 300
+# Máximo de alertas por minuto nas saídas limitadas (som, webhook);
+# o excedente vira um alerta-resumo quando o minuto libera
+LIMITE_POR_MINUTO = 30
+# Reenvios por saída antes de desistir, e espera inicial (dobra a cada tentativa)
+TENTATIVAS = 4
+ESPERA_INICIAL = 0.5
+# Alertas aguardando entrega em cada saída; fila cheia = alerta perdido
+# só naquela saída (quem publica nunca espera)
+FILA_MAXIMA = 256
+TIMEOUT_REDE = 3.0
+ARQUIVO_ALERTAS = "alertas.log"
+
+
+class Alerta:
+    def __init__(self, placa, status, data_hora, origem):
+        self.placa = placa
+        self.status = status
+        self.data_hora = data_hora
+        self.origem = origem
+        self.publicado_em = time.monotonic()
+
+    def como_dict(self):
+        return {'placa': self.placa, 'status': self.status,
+                'data_hora': str(self.data_hora), 'origem': self.origem}
+
+    def texto(self):
+        return f"🚨🚨 ALERTA CRÍTICO: Veículo {self.status} detectado na portaria: {self.placa}!"
+
+
+class AlertaResumo(Alerta):
+    """Alertas acima do limite de uma saída limitada, entregues de uma vez."""
+
+    def __init__(self, alertas):
+        ultimo = alertas[-1]
+        super().__init__(', '.join(a.placa for a in alertas), 'RESUMO', ultimo.data_hora, ultimo.origem)
+        self.quantidade = len(alertas)
+        self.publicado_em = alertas[0].publicado_em
+
+    def como_dict(self):
+        return {**super().como_dict(), 'quantidade': self.quantidade}
+
+    def texto(self):
+        return f"🚨🚨 {self.quantidade} ALERTAS agrupados (limite por minuto): {self.placa}"
+
+
+# --- SAÍDAS ---
+# Uma saída é qualquer objeto com `nome` e `enviar(alerta)`; enviar levanta
+# exceção em caso de falha (a thread da saída cuida do reenvio).
+# `limitada = True` aplica LIMITE_POR_MINUTO àquela saída.
+
+class SaidaConsole:
+    nome = 'console'
+
+    def enviar(self, alerta):
+        print(alerta.texto())
+
+
+class SaidaArquivo:
+    """Uma linha JSON por alerta (fácil de acompanhar com tail -f na guarita)."""
+    nome = 'arquivo'
+
+    def __init__(self, caminho=ARQUIVO_ALERTAS):
+        self.caminho = caminho
+
+    def enviar(self, alerta):
+        with open(self.caminho, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(alerta.como_dict(), ensure_ascii=False) + '\n')
+
+
+class SaidaWebhook:
+    nome = 'webhook'
+    limitada = True
+
+    def __init__(self, url, timeout=TIMEOUT_REDE):
+        self.url = url
+        self.timeout = timeout
+
+    def enviar(self, alerta):
+        corpo = json.dumps(alerta.como_dict(), ensure_ascii=False).encode('utf-8')
+        pedido = urllib.request.Request(self.url, data=corpo, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(pedido, timeout=self.timeout) as resposta:
+            resposta.read()
+
+
+class SaidaSocket:
+    nome = 'socket'
+
+    def __init__(self, host, porta, timeout=TIMEOUT_REDE):
+        self.endereco = (host, int(porta))
+        self.timeout = timeout
+
+    def enviar(self, alerta):
+        linha = (json.dumps(alerta.como_dict(), ensure_ascii=False) + '\n').encode('utf-8')
+        with socket.create_connection(self.endereco, timeout=self.timeout) as conexao:
+            conexao.sendall(linha)
+
+
+class SaidaSom:
+    nome = 'som'
+    limitada = True
+
+    def enviar(self, alerta):
+        if sys.platform.startswith('win'):
+            import winsound
+            winsound.Beep(1000, 400)
+        else:
+            sys.stdout.write('\a')
+            sys.stdout.flush()
+
+
+class SaidaMemoria:
+    """Saída local para testes: guarda os alertas e pode simular falhas."""
+    nome = 'memoria'
+
+    def __init__(self, falhas=0, atraso=0.0, limitada=False):
+        self.falhas = falhas
+        self.atraso = atraso
+        self.limitada = limitada
+        self.recebidos = []
+        self._evento = threading.Event()
+
+    def enviar(self, alerta):
+        if self.atraso:
+            time.sleep(self.atraso)
+        if self.falhas > 0:
+            self.falhas -= 1
+            raise ConnectionError("falha simulada")
+        self.recebidos.append(alerta.como_dict())
+        self._evento.set()
+
+    def esperar(self, quantidade=1, timeout=5.0):
+        """Espera até ter recebido `quantidade` alertas. Devolve True se chegaram."""
+        limite = time.monotonic() + timeout
+        while len(self.recebidos) < quantidade:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                return False
+            self._evento.wait(restante)
+            self._evento.clear()
+        return True
+
+
+def saidas_padrao():
+    """Console + arquivo, e as saídas de rede/som configuradas no ambiente."""
+    saidas = [SaidaConsole(), SaidaArquivo()]
+    if os.environ.get('ALERTA_WEBHOOK'):
+        saidas.append(SaidaWebhook(os.environ['ALERTA_WEBHOOK']))
+    if os.environ.get('ALERTA_SOCKET'):
+        host, _, porta = os.environ['ALERTA_SOCKET'].rpartition(':')
+        saidas.append(SaidaSocket(host, porta))
+    if os.environ.get('ALERTA_SOM'):
+        saidas.append(SaidaSom())
+    return saidas
+
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+class _EntregadorSaida:
+    """Fila, thread, reenvios e limite de taxa de UMA saída."""
+
+    def __init__(self, saida, limite_por_minuto, tentativas, espera_inicial):
+        self.saida = saida
+        self.limite_por_minuto = limite_por_minuto if getattr(saida, 'limitada', False) else None
+        self.tentativas = tentativas
+        self.espera_inicial = espera_inicial
+
+        self._fila = queue.Queue(maxsize=FILA_MAXIMA)
+        self._reenvios = []                 # heap: (quando, seq, tentativa, alerta)
+        self._seq = 0
+        self._envios_recentes = deque()     # instantes dos envios no último minuto (saída limitada)
+        self._excedentes = []               # alertas acima do limite, aguardando o resumo
+        self._latencias = deque(maxlen=1000)
+        self.contadores = {'fila_cheia': 0, 'entregues': 0, 'reenvios': 0, 'falhas': 0, 'agrupados': 0}
+        self._ativo = True
+        self._thread = threading.Thread(target=self._laco, daemon=True, name=f"alerta-{saida.nome}")
+        self._thread.start()
+
+    def enfileirar(self, alerta):
+        try:
+            self._fila.put_nowait(alerta)
+        except queue.Full:
+            self.contadores['fila_cheia'] += 1
+
+    def _dentro_do_limite(self):
+        if self.limite_por_minuto is None:
+            return True
+        agora = time.monotonic()
+        while self._envios_recentes and agora - self._envios_recentes[0] > 60:
+            self._envios_recentes.popleft()
+        return len(self._envios_recentes) < self.limite_por_minuto
+
+    def _novo(self, alerta):
+        """Alerta recém-tirado da fila: envia ou guarda para o resumo."""
+        if self._excedentes or not self._dentro_do_limite():
+            self._excedentes.append(alerta)
+            self.contadores['agrupados'] += 1
+            return
+        if self.limite_por_minuto is not None:
+            self._envios_recentes.append(time.monotonic())
+        self._entregar(alerta, 0)
+
+    def _entregar(self, alerta, tentativa):
+        try:
+            self.saida.enviar(alerta)
+        except Exception as e:
+            if tentativa + 1 >= self.tentativas:
+                self.contadores['falhas'] += 1
+                print(f"⚠️ Alerta de {alerta.placa} não entregue em '{self.saida.nome}': {e}")
+                return
+            self.contadores['reenvios'] += 1
+            quando = time.monotonic() + self.espera_inicial * (2 ** tentativa)
+            self._seq += 1
+            heapq.heappush(self._reenvios, (quando, self._seq, tentativa + 1, alerta))
+            return
+        self.contadores['entregues'] += 1
+        self._latencias.append(time.monotonic() - alerta.publicado_em)
+
+    def _laco(self):
+        # Ao encerrar, entrega o que está na fila (e o resumo pendente); reenvios agendados são abandonados
+        while self._ativo or not self._fila.empty() or self._excedentes:
+            # Reenvios vencidos primeiro
+            while self._reenvios and self._reenvios[0][0] <= time.monotonic():
+                _, _, tentativa, alerta = heapq.heappop(self._reenvios)
+                self._entregar(alerta, tentativa)
+
+            # O minuto liberou (ou está encerrando): o excedente sai em um único resumo
+            if self._excedentes and (self._dentro_do_limite() or not self._ativo):
+                resumo, self._excedentes = AlertaResumo(self._excedentes), []
+                self._envios_recentes.append(time.monotonic())
+                self._entregar(resumo, 0)
+
+            espera = 0.5
+            if self._reenvios:
+                espera = max(0.0, min(espera, self._reenvios[0][0] - time.monotonic()))
+            try:
+                alerta = self._fila.get(timeout=espera)
+            except queue.Empty:
+                continue
+            self._novo(alerta)
+
+    def latencias(self):
+        return list(self._latencias)
+
+    def fechar(self, timeout):
+        self._ativo = False
+        self._thread.join(timeout)
+
+
+class DespachanteAlertas:
+    def __init__(self, saidas=None, janela_dedup=JANELA_DEDUP_SEGUNDOS, limite_por_minuto=LIMITE_POR_MINUTO,
+                 tentativas=TENTATIVAS, espera_inicial=ESPERA_INICIAL):
+        self.saidas = saidas if saidas is not None else saidas_padrao()
+        self.janela_dedup = janela_dedup
+
+        self._ultimo_alerta = {}            # (placa, status) -> instante
+        self._trava = threading.Lock()
+        self.contadores = {'publicados': 0, 'duplicados': 0}
+        # Uma thread por saída: uma saída lenta não atrasa as demais
+        self._entregadores = [_EntregadorSaida(saida, limite_por_minuto, tentativas, espera_inicial)
+                              for saida in self.saidas]
+
+    # --- Lado de quem publica (thread da visão): nada bloqueia ---
+
+    def publicar(self, placa, status, data_hora=None, origem=None):
+        """Enfileira o alerta em todas as saídas. Devolve False se foi deduplicado."""
+        agora = time.monotonic()
+        with self._trava:
+            chave = (placa, status)
+            anterior = self._ultimo_alerta.get(chave)
+            if anterior is not None and agora - anterior < self.janela_dedup:
+                self.contadores['duplicados'] += 1
+                return False
+
+            self._ultimo_alerta[chave] = agora
+            if len(self._ultimo_alerta) > 10000:
+                self._ultimo_alerta = {k: t for k, t in self._ultimo_alerta.items()
+                                       if agora - t < self.janela_dedup}
+            self.contadores['publicados'] += 1
+
+        alerta = Alerta(placa, status, data_hora, origem)
+        for entregador in self._entregadores:
+            entregador.enfileirar(alerta)
+        return True
+
+    def estatisticas(self):
+        """Contadores (total e por saída) + latência de entrega (publicar -> saída concluída), em ms."""
+        def latencia(valores):
+            return {'latencia_p50_ms': round(_percentil(valores, 0.50) * 1000, 1),
+                    'latencia_p95_ms': round(_percentil(valores, 0.95) * 1000, 1),
+                    'latencia_max_ms': round(max(valores) * 1000, 1) if valores else 0.0}
+
+        por_saida, todas = {}, []
+        totais = dict.fromkeys(('fila_cheia', 'entregues', 'reenvios', 'falhas', 'agrupados'), 0)
+        for entregador in self._entregadores:
+            valores = entregador.latencias()
+            todas.extend(valores)
+            por_saida[entregador.saida.nome] = {**entregador.contadores, **latencia(valores)}
+            for chave in totais:
+                totais[chave] += entregador.contadores[chave]
+        return {**self.contadores, **totais, **latencia(todas), 'saidas': por_saida}
+
+    def fechar(self, timeout=5.0):
+        """Entrega o que já está nas filas (até `timeout` no total) e encerra as threads."""
+        limite = time.monotonic() + timeout
+        for entregador in self._entregadores:
+            entregador._ativo = False
+        for entregador in self._entregadores:
+            entregador.fechar(max(0.0, limite - time.monotonic()))
+
+
+# Despachante do processo (criado no primeiro alerta)
+_despachante = None
+_trava_global = threading.Lock()
+
+
+def obter_despachante():
+    global _despachante
+    with _trava_global:
+        if _despachante is None:
+            _despachante = DespachanteAlertas()
+            atexit.register(_despachante.fechar)
+        return _despachante
+
+
+def publicar(placa, status, data_hora=None, origem=None):
+    return obter_despachante().publicar(placa, status, data_hora, origem)
+
+
+def instalar_despachante(despachante):
+    """Troca o despachante do processo (ex.: só SaidaMemoria em testes de carga). Devolve o anterior."""
+    global _despachante
+    with _trava_global:
+        anterior, _despachante = _despachante, despachante
+        return anterior
+
+
+def estatisticas():
+    return obter_despachante().estatisticas() if _despachante is not None else {}
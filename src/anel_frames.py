@@ -0,0 +1,157 @@
+# anel_frames.py
+# Anel (ring buffer) de frames em memória compartilhada entre processos.
+# O processo decodificador escreve cada frame UMA vez em um slot; os workers
+# de inferência leem views NumPy do mesmo slot, sem pickle e sem cópia.
+#
+# Controle de vida dos slots:
+#   - cada escrita recebe um número de sequência crescente (seq);
+#   - o slot guarda seq, índice do frame e um contador de referências
+#     iniciado com o número de leitores que devem consumi-lo;
+#   - o escritor só reaproveita um slot quando o contador chega a zero.
+# Os slots têm o tamanho máximo configurado; frames menores ocupam o canto
+# superior esquerdo e a altura/largura real fica na tabela de controle.
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+
+# Colunas da tabela de controle (int64)
+_SEQ, _INDICE, _REFS, _ALTURA, _LARGURA = range(5)
+_COLUNAS = 5
+# Linha extra da tabela de controle com o estado global
+_ESTADO = -1  # [última seq escrita, encerrado, -, -, -]
+# Enquanto espera um slot, o escritor confere a cada N segundos se os leitores estão vivos
+INTERVALO_VERIFICACAO = 1.0
+
+
+class AnelFrames:
+    """
+    Uso:
+        anel = AnelFrames.criar(8, (1080, 1920, 3))          # processo pai
+        Process(target=worker, args=(anel.descritor(),))     # repassa aos filhos
+        anel = AnelFrames.conectar(descritor)                # dentro do filho
+    O descritor contém uma mp.Condition, então deve ser repassado na criação
+    do processo (herança), e não por uma fila.
+    """
+
+    def __init__(self, shm_frames, shm_controle, n_slots, shape, dtype, condicao, dono):
+        self._shm_frames = shm_frames
+        self._shm_controle = shm_controle
+        self.n_slots = n_slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self._condicao = condicao
+        self._dono = dono
+
+        self.frames = np.ndarray((n_slots,) + self.shape, dtype=self.dtype, buffer=shm_frames.buf)
+        self.controle = np.ndarray((n_slots + 1, _COLUNAS), dtype=np.int64, buffer=shm_controle.buf)
+
+    # --- CRIAÇÃO / CONEXÃO ---
+
+    @classmethod
+    def criar(cls, n_slots, shape, dtype=np.uint8):
+        tamanho_frame = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        shm_frames = shared_memory.SharedMemory(create=True, size=n_slots * tamanho_frame)
+        shm_controle = shared_memory.SharedMemory(create=True, size=(n_slots + 1) * _COLUNAS * 8)
+        anel = cls(shm_frames, shm_controle, n_slots, shape, dtype, mp.Condition(), dono=True)
+        anel.controle[:] = 0
+        # Nenhum slot escrito ainda; a primeira seq será 0
+        anel.controle[:, _SEQ] = -1
+        return anel
+
+    def descritor(self):
+        """Dados (picklable) para os filhos se conectarem ao mesmo anel."""
+        return {
+            'frames': self._shm_frames.name,
+            'controle': self._shm_controle.name,
+            'n_slots': self.n_slots,
+            'shape': self.shape,
+            'dtype': self.dtype.str,
+            'condicao': self._condicao,
+        }
+
+    @classmethod
+    def conectar(cls, descritor):
+        shm_frames = shared_memory.SharedMemory(name=descritor['frames'])
+        shm_controle = shared_memory.SharedMemory(name=descritor['controle'])
+        return cls(shm_frames, shm_controle, descritor['n_slots'], descritor['shape'],
+                   descritor['dtype'], descritor['condicao'], dono=False)
+
+    # --- ESCRITA (decodificador) ---
+
+    def escrever(self, frame, indice_frame, leitores=1, vivos=None):
+        """
+        Copia o frame para o próximo slot e devolve a seq atribuída.
+        Bloqueia enquanto o slot ainda estiver referenciado por leitores.
+        `vivos()`: devolve False se algum leitor morreu; nesse caso o slot
+        nunca seria liberado e a espera termina com RuntimeError.
+        """
+        h, w = frame.shape[:2]
+        if h > self.shape[0] or w > self.shape[1]:
+            raise ValueError(f"Frame {w}x{h} maior que o slot {self.shape[1]}x{self.shape[0]}")
+
+        with self._condicao:
+            seq = int(self.controle[_ESTADO, _SEQ]) + 1
+            slot = seq % self.n_slots
+            while not self._condicao.wait_for(lambda: self.controle[slot, _REFS] <= 0,
+                                              timeout=INTERVALO_VERIFICACAO):
+                if vivos is not None and not vivos():
+                    raise RuntimeError("Um leitor do anel terminou sem liberar o slot.")
+
+        # A cópia acontece fora da trava: o slot está livre e só este processo escreve
+        self.frames[slot, :h, :w] = frame
+
+        with self._condicao:
+            self.controle[slot, _INDICE] = indice_frame
+            self.controle[slot, _ALTURA] = h
+            self.controle[slot, _LARGURA] = w
+            self.controle[slot, _REFS] = leitores
+            self.controle[slot, _SEQ] = seq
+            self.controle[_ESTADO, _SEQ] = seq
+            self._condicao.notify_all()
+        return seq
+
+    def encerrar(self):
+        """Sinaliza aos leitores que não haverá mais frames."""
+        with self._condicao:
+            self.controle[_ESTADO, _INDICE] = 1
+            self._condicao.notify_all()
+
+    # --- LEITURA (workers) ---
+
+    def adquirir(self, seq, timeout=None):
+        """
+        Espera o frame de número `seq` e devolve (view, indice_frame).
+        A view é válida até liberar(seq). Devolve None se o anel foi encerrado
+        antes de o frame existir.
+        """
+        slot = seq % self.n_slots
+        with self._condicao:
+            pronto = self._condicao.wait_for(
+                lambda: self.controle[slot, _SEQ] >= seq or self.controle[_ESTADO, _INDICE] == 1,
+                timeout=timeout,
+            )
+            if not pronto or self.controle[slot, _SEQ] != seq:
+                return None
+            indice = int(self.controle[slot, _INDICE])
+            h, w = int(self.controle[slot, _ALTURA]), int(self.controle[slot, _LARGURA])
+        return self.frames[slot, :h, :w], indice
+
+    def liberar(self, seq):
+        """Decrementa a referência do slot; quando zera, o escritor pode reusá-lo."""
+        slot = seq % self.n_slots
+        with self._condicao:
+            if self.controle[slot, _SEQ] == seq:
+                self.controle[slot, _REFS] -= 1
+                self._condicao.notify_all()
+
+    # --- LIMPEZA ---
+
+    def fechar(self):
+        # Views apontando para a memória precisam ser soltas antes do close()
+        self.frames = None
+        self.controle = None
+        self._shm_frames.close()
+        self._shm_controle.close()
+        if self._dono:
+            self._shm_frames.unlink()
+            self._shm_controle.unlink()
@@ -1,9 +1,10 @@
 # app.py - VERSÃO FINAL E CORRIGIDA
 import streamlit as st
 import pandas as pd
-import sqlite3 # Necessário para a conexão com o banco na tela de Gestão
+import io
 from datetime import datetime
 import database # Importa nosso módulo de conexão com o banco
+import evidencias
 import time
 
 # --- Configuração Inicial ---
@@ -22,6 +23,7 @@ st.sidebar.title("Menu Principal")
 opcao = st.sidebar.radio("Navegação", [
     "📡 Monitoramento Real", 
     "📝 Histórico de Acesso", 
+    "📊 Relatórios",
     "🚗 Gestão de Veículos"
 ])
 
@@ -44,6 +46,7 @@ if opcao == "📡 Monitoramento Real":
         st.info("Nenhum veículo detectado dentro do campus no momento.")
     else:
         lista_exibicao = []
+        placas_em_alerta = []
         for placa, entrada_str, arquivo in dados_campus:
             
             # --- CORREÇÃO DE BUG (Data Parsing Robusto) ---
@@ -78,9 +81,9 @@ if opcao == "📡 Monitoramento Real":
                 alerta_seguranca = True
                 status_icon = "🔴 ALERTA DE SEGURANÇA"
             
-            # Alerta 2: Tempo excedido (Requisito 6 - Ex: > 4 horas)
+            # Alerta 2: Tempo excedido (Requisito 6) - mesma regra dos agregados do banco
             obs_tempo = f"{minutos_dentro} min"
-            if minutos_dentro > 240: # 4 horas
+            if permanencia.total_seconds() > database.LIMITE_PERMANENCIA_MINUTOS * 60:
                 obs_tempo += " ⚠️ TEMPO EXCEDIDO"
                 
             lista_exibicao.append({
@@ -93,7 +96,12 @@ if opcao == "📡 Monitoramento Real":
             })
             
             if alerta_seguranca:
-                st.error(f"🚨 AVISO DE SEGURANÇA: Veículo {placa} ({status}) detectado no campus!")
+                placas_em_alerta.append(f"{placa} ({status})")
+
+        # Um único aviso por atualização (a notificação da guarita sai pelo alertas.py)
+        if placas_em_alerta:
+            st.error(f"🚨 AVISO DE SEGURANÇA: {len(placas_em_alerta)} veículo(s) em alerta no campus: "
+                     + ", ".join(placas_em_alerta))
 
         df = pd.DataFrame(lista_exibicao)
         st.dataframe(df, use_container_width=True)
@@ -107,13 +115,43 @@ if opcao == "📡 Monitoramento Real":
         veiculos_em_alerta = len(df[df['Status'].astype(str).str.contains("ALERTA")])
         col2.metric("Veículos em Alerta", veiculos_em_alerta)
 
+    # Evidências dos alertas (clipe + recorte da placa gravados pelos scripts de visão).
+    # Só a lista vem do banco; imagens e vídeo são lidos quando um evento é escolhido.
+    st.subheader("🎞️ Evidências de Alertas")
+    eventos = database.buscar_evidencias()
+    if not eventos:
+        st.caption("Nenhuma evidência gravada ainda.")
+    else:
+        escolha = st.selectbox(
+            "Evento", [None] + list(range(len(eventos))),
+            format_func=lambda i: "Selecione um evento..." if i is None else
+                f"{eventos[i][0]} — {str(eventos[i][1])[:16]} ({eventos[i][3]})")
+        if escolha is not None:
+            manifesto = evidencias.carregar_manifesto(eventos[escolha][4])
+            if manifesto is None:
+                st.warning("Arquivos da evidência não encontrados.")
+            else:
+                col_img, col_vid = st.columns([1, 2])
+                if manifesto.get('recorte') or manifesto.get('miniatura'):
+                    col_img.image(evidencias.caminho_objeto(manifesto.get('recorte') or manifesto['miniatura']),
+                                  caption=f"{manifesto['placa']} ({manifesto['status']})")
+                if manifesto.get('clipe'):
+                    with open(evidencias.caminho_objeto(manifesto['clipe']), 'rb') as f:
+                        col_vid.video(f.read())
+
 
 # 2. TELA: HISTÓRICO DE ENTRADAS (Fluxograma: Tela Esquerda)
 elif opcao == "📝 Histórico de Acesso":
     st.title("📝 Histórico Completo de Acessos")
     st.caption("Log de todas as entradas e saídas registradas.")
-    
-    dados_hist = database.buscar_historico()
+
+    # Permanências antigas ficam em bancos mensais (retencao.py).
+    # Só são abertas quando o usuário escolhe o mês.
+    opcoes_periodo = ["Recentes"] + database.listar_periodos_arquivados()
+    periodo = st.selectbox("Período", opcoes_periodo,
+                           help="Meses antigos são arquivados fora do banco principal.")
+
+    dados_hist = database.buscar_historico(None if periodo == "Recentes" else periodo)
     
     if dados_hist:
         # CORREÇÃO DE BUG (KeyError: Definindo explicitamente os nomes das colunas)
@@ -137,7 +175,55 @@ elif opcao == "📝 Histórico de Acesso":
     else:
         st.warning("O banco de dados de histórico está vazio.")
 
-# 3. TELA: GESTÃO DE VEÍCULOS (Fluxograma: Tela Direita + Requisitos 2 e 3)
+# 3. TELA: RELATÓRIOS (lê só as tabelas de agregados, nunca a tabela registros)
+elif opcao == "📊 Relatórios":
+    st.title("📊 Relatórios de Ocupação e Tráfego")
+    st.caption("Indicadores pré-calculados a cada entrada/saída registrada.")
+
+    hoje = datetime.now().date()
+    col_ini, col_fim = st.columns(2)
+    data_ini = col_ini.date_input("De", hoje.replace(day=1))
+    data_fim = col_fim.date_input("Até", hoje)
+
+    dados_hora = database.buscar_agregado_hora(str(data_ini), str(data_fim))
+    dados_tipo = database.buscar_agregado_tipo(str(data_ini), str(data_fim))
+
+    if not dados_hora and not dados_tipo:
+        st.info("Nenhum movimento registrado no período.")
+    else:
+        df_hora = pd.DataFrame(dados_hora, columns=["Hora", "Entradas", "Saídas", "Pico de Ocupação"])
+        df_hora["Hora"] = pd.to_datetime(df_hora["Hora"], format="%Y-%m-%d %H")
+        df_tipo = pd.DataFrame(dados_tipo, columns=["Dia", "Tipo", "Permanências", "Segundos", "Excedidas"])
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Entradas", int(df_hora["Entradas"].sum()))
+        col2.metric("Pico de Ocupação", int(df_hora["Pico de Ocupação"].max()) if not df_hora.empty else 0)
+        col3.metric(f"Permanências > {database.LIMITE_PERMANENCIA_MINUTOS} min", int(df_tipo["Excedidas"].sum()))
+
+        # Períodos longos: agrupa por dia para o gráfico continuar legível
+        agrupar_por_dia = (data_fim - data_ini).days > 7
+        if agrupar_por_dia:
+            df_graf = df_hora.groupby(df_hora["Hora"].dt.date).agg(
+                {"Entradas": "sum", "Saídas": "sum", "Pico de Ocupação": "max"})
+        else:
+            df_graf = df_hora.set_index("Hora")
+
+        st.subheader("Entradas e Saídas" + (" por Dia" if agrupar_por_dia else " por Hora"))
+        st.bar_chart(df_graf[["Entradas", "Saídas"]])
+
+        st.subheader("Pico de Ocupação")
+        st.line_chart(df_graf[["Pico de Ocupação"]])
+
+        if not df_tipo.empty:
+            st.subheader("Permanência Média por Tipo")
+            resumo = df_tipo.groupby("Tipo").agg({"Permanências": "sum", "Segundos": "sum", "Excedidas": "sum"})
+            resumo["Média (min)"] = (resumo["Segundos"] / resumo["Permanências"] / 60).round(1)
+            st.dataframe(resumo[["Permanências", "Média (min)", "Excedidas"]], use_container_width=True)
+
+            st.subheader("Permanências Excedidas por Dia")
+            st.bar_chart(df_tipo.groupby("Dia")["Excedidas"].sum())
+
+# 4. TELA: GESTÃO DE VEÍCULOS (Fluxograma: Tela Direita + Requisitos 2 e 3)
 elif opcao == "🚗 Gestão de Veículos":
     st.title("🚗 Cadastro e Controle de Veículos")
     st.caption("Defina se um veículo é Oficial/Particular e se está Autorizado.")
@@ -151,38 +237,61 @@ elif opcao == "🚗 Gestão de Veículos":
             proprietario = st.text_input("Nome do Proprietário/Setor")
             
             # Requisito 2: Gerenciamento diferenciado
-            tipo_input = st.selectbox("Tipo de Veículo", ["PARTICULAR", "OFICIAL", "VISITANTE"])
+            tipo_input = st.selectbox("Tipo de Veículo", database.TIPOS_VEICULO)
             
             # Requisito 3 e 7: Marcação de Status
-            status_input = st.selectbox("Status de Acesso", ["AUTORIZADO", "NAO_AUTORIZADO", "OCORRENCIA"])
+            status_input = st.selectbox("Status de Acesso", database.STATUS_VEICULO)
             
             submit = st.form_submit_button("💾 Salvar Registro")
             
             if submit and placa_input:
                 database.atualizar_veiculo(placa_input, tipo_input, status_input, proprietario)
+                # CSV gerado antes da alteração ficou desatualizado
+                st.session_state.pop("csv_veiculos", None)
                 st.success(f"Veículo {placa_input} atualizado!")
                 st.rerun()
 
+        # Cadastro em lote (ex.: frota oficial e servidores do campus)
+        with st.expander("📤 Importar / 📥 Exportar CSV"):
+            st.caption("Colunas: " + ", ".join(database.COLUNAS_VEICULO) + " (separador , ou ;)")
+            arquivo_csv = st.file_uploader("Arquivo CSV", type=["csv"])
+            if arquivo_csv is not None and st.button("Importar"):
+                texto = io.StringIO(arquivo_csv.getvalue().decode("utf-8-sig"))
+                importados, erros = database.importar_veiculos_csv(texto)
+                st.session_state.pop("csv_veiculos", None)
+                st.success(f"{importados} veículo(s) importado(s)/atualizado(s).")
+                if erros:
+                    st.warning(f"{len(erros)} linha(s) ignorada(s):")
+                    st.dataframe(pd.DataFrame(erros, columns=["Linha", "Erro"]), use_container_width=True)
+
+            # O cadastro inteiro só é lido quando pedido (não a cada interação da tela)
+            if st.button("📄 Gerar CSV do Cadastro"):
+                saida_csv = io.StringIO()
+                database.exportar_veiculos_csv(saida_csv)
+                st.session_state["csv_veiculos"] = saida_csv.getvalue().encode("utf-8")
+            if "csv_veiculos" in st.session_state:
+                st.download_button("📥 Exportar Cadastro (CSV)", st.session_state["csv_veiculos"],
+                                   file_name="veiculos.csv", mime="text/csv")
+
     with col_view:
         st.subheader("Lista de Veículos Cadastrados")
-        conn = sqlite3.connect(database.DB_NAME)
-        
-        # --- CORREÇÃO DE BUG (ValueError: Usando dtype para forçar strings) ---
-        df_veiculos = pd.read_sql(
-            "SELECT * FROM veiculos", 
-            conn, 
-            dtype={
-                'placa': str, 
-                'tipo': str, 
-                'status': str, 
-                'proprietario': str, 
-                'observacao': str
-            }
-        )
-        # -------------------------------------------------------------------
-        conn.close()
+
+        # Busca e paginação feitas no SQL: só a página visível sai do banco
+        col_busca, col_tam = st.columns([3, 1])
+        busca = col_busca.text_input("Buscar placa ou proprietário").strip()
+        por_pagina = col_tam.selectbox("Por página", [25, 50, 100, 250], index=1)
+
+        total = database.contar_veiculos(busca)
+        total_paginas = max(1, -(-total // por_pagina))
+        pagina = st.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, value=1)
+
+        linhas = database.buscar_veiculos_paginado(busca, int(pagina), por_pagina)
+        df_veiculos = pd.DataFrame(linhas, columns=database.COLUNAS_VEICULO, dtype=str)
         
-        if df_veiculos.empty:
+        if total == 0 and not busca:
             st.info("Nenhum veículo cadastrado ainda. Use o formulário ao lado para começar.")
+        elif total == 0:
+            st.info("Nenhum veículo encontrado para a busca.")
         else:
-            st.dataframe(df_veiculos, use_container_width=True)
\ No newline at end of file
+            st.caption(f"{total} veículo(s) encontrado(s)")
+            st.dataframe(df_veiculos, use_container_width=True)
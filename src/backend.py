@@ -1,20 +1,157 @@
 # backend.py
 import database
+import time
+import alertas
 from datetime import datetime
+from indice_placas import IndicePlacas
 
 # Limite para alerta visual no console (apenas informativo)
-# O controle real de tempo fica nos relatórios do banco
-LIMITE_TEMPO_VISITANTE = 240 
+# O controle real de tempo fica nos relatórios do banco (agregados)
+LIMITE_TEMPO_VISITANTE = database.LIMITE_PERMANENCIA_MINUTOS
+
+# Debounce: leituras repetidas da mesma placa dentro desta janela (segundos)
+# são descartadas antes de chegar ao SQLite. A janela é deslizante: cada nova
+# leitura (aceita ou não) renova o "visto por último".
+JANELA_DEBOUNCE_SEGUNDOS = 120
+# Teto da janela deslizante: um carro relido sem parar (parado na frente da
+# câmera) teria todas as leituras descartadas e nunca registraria a saída.
+# Passado este tempo desde a última leitura ACEITA, a próxima é aceita.
+DEBOUNCE_MAXIMO_SEGUNDOS = 600
+
+# Índices em memória placa -> último instante visto / último aceito.
+# Carregados do banco na primeira leitura, então sobrevivem a reinícios.
+_ultima_leitura = None
+_ultima_aceita = None
+_estatisticas_debounce = {'aceitas': 0, 'descartadas': 0}
+
+# Índice aproximado das placas cadastradas (leituras com erro pequeno do OCR
+# são encaixadas na placa conhecida em vez de virarem um novo visitante).
+# Recarregado periodicamente para enxergar cadastros feitos pelo dashboard.
+RECARREGAR_INDICE_SEGUNDOS = 300
+
+# Status que disparam alerta de segurança
+STATUS_ALERTA = ['NAO_AUTORIZADO', 'OCORRENCIA']
+_indice_placas = None
+_indice_carregado_em = 0.0
+
+def _obter_indice_placas():
+    global _indice_placas, _indice_carregado_em
+    if _indice_placas is None or time.monotonic() - _indice_carregado_em > RECARREGAR_INDICE_SEGUNDOS:
+        _indice_placas = IndicePlacas(database.listar_placas())
+        _indice_carregado_em = time.monotonic()
+    return _indice_placas
+
+def encaixar_placa_conhecida(placa):
+    """
+    Devolve a placa cadastrada mais próxima da leitura (ou a própria leitura),
+    qualquer que seja o status dela. A segurança fica no índice: só encaixa
+    trocas dentro de um grupo de confusão (LIMIAR_DISTANCIA) e recusa empates.
+    Sem o encaixe, ABC1O23 de um AUTORIZADO viraria visitante NAO_AUTORIZADO,
+    com alerta falso, e todas as leituras erradas seguintes cairiam nele.
+    """
+    encontrada = _obter_indice_placas().mais_proxima(placa)
+    if encontrada and encontrada[0] != placa:
+        print(f"🔁 Leitura {placa} ajustada para a placa cadastrada {encontrada[0]} (distância {encontrada[1]:.1f})")
+        return encontrada[0]
+    return placa
+
+# Funções chamadas depois que uma leitura com alerta foi gravada:
+# ouvinte(placa, status, data_hora, arquivo_origem). Ex.: gravador de evidências.
+_ouvintes_alerta = []
+
+def adicionar_ouvinte_alerta(funcao):
+    _ouvintes_alerta.append(funcao)
+
+def remover_ouvinte_alerta(funcao):
+    if funcao in _ouvintes_alerta:
+        _ouvintes_alerta.remove(funcao)
+
+def _avisar_ouvintes(placa, status, data_hora, arquivo_origem):
+    for ouvinte in list(_ouvintes_alerta):
+        try:
+            ouvinte(placa, status, data_hora, arquivo_origem)
+        except Exception as e:
+            print(f"⚠️ Falha em ouvinte de alerta: {e}")
+
+def _converter_data(valor):
+    if isinstance(valor, datetime):
+        return valor
+    try:
+        return datetime.fromisoformat(str(valor))
+    except ValueError:
+        return None
+
+def _carregar_indice_debounce():
+    global _ultima_leitura, _ultima_aceita
+    _ultima_leitura = {}
+    for placa, visto_em in database.buscar_ultimas_leituras():
+        data = _converter_data(visto_em)
+        if data:
+            _ultima_leitura[placa] = data
+    # O que está no banco foi aceito
+    _ultima_aceita = dict(_ultima_leitura)
+
+def leitura_repetida(placa, data_hora):
+    """
+    True se a placa já foi vista dentro da janela de debounce (deslizante),
+    limitada a DEBOUNCE_MAXIMO_SEGUNDOS desde a última leitura aceita.
+    """
+    if _ultima_leitura is None:
+        _carregar_indice_debounce()
+
+    agora = _converter_data(data_hora) or datetime.now()
+    anterior = _ultima_leitura.get(placa)
+    _ultima_leitura[placa] = max(agora, anterior) if anterior else agora
+
+    aceita = _ultima_aceita.get(placa)
+    repetida = (anterior is not None
+                and abs((agora - anterior).total_seconds()) < JANELA_DEBOUNCE_SEGUNDOS
+                and (aceita is None or abs((agora - aceita).total_seconds()) < DEBOUNCE_MAXIMO_SEGUNDOS))
+    if not repetida:
+        _ultima_aceita[placa] = agora
+    return repetida
+
+def estatisticas_debounce():
+    """Contadores de leituras aceitas e descartadas pelo debounce neste processo."""
+    return dict(_estatisticas_debounce)
+
+def _avaliar_leitura(placa, data_hora):
+    """Encaixe na placa cadastrada + debounce. Devolve a placa final ou None se descartada."""
+    # Erros pequenos de OCR (ABC1O23 x ABC1D23) viram a placa já cadastrada
+    placa = encaixar_placa_conhecida(placa)
+
+    # Debounce: a mesma placa confirmada de novo logo em seguida
+    # (outro vídeo, reinício, foto relida) não abre/fecha permanência
+    if leitura_repetida(placa, data_hora):
+        _estatisticas_debounce['descartadas'] += 1
+        print(f"⏭️ Leitura repetida ignorada: {placa} (janela de {JANELA_DEBOUNCE_SEGUNDOS}s, "
+              f"{_estatisticas_debounce['descartadas']} descartadas)")
+        return None
+    _estatisticas_debounce['aceitas'] += 1
+    return placa
+
+def _alertar(placa, status, data_hora, arquivo_origem):
+    # Alerta de Segurança IMEDIATO (Requisito 7)
+    # Só enfileira no despachante (alertas.py): a entrega na guarita roda em
+    # outra thread, com deduplicação, limite de taxa e reenvio
+    if status in STATUS_ALERTA:
+        alertas.publicar(placa, status, data_hora, arquivo_origem)
 
 def registrar_leitura(placa, data_hora, tempo_video, arquivo_origem):
     """
     Recebe a leitura da Visão Computacional e delega para o Banco de Dados.
     Removemos a lógica duplicada de entrada/saída conforme solicitado.
+    Devolve False quando a leitura é descartada pelo debounce.
     """
     
     # 1. Garante que o banco existe (Auto-cura)
     database.inicializar_db()
 
+    # 1.1 Encaixe na placa cadastrada + debounce
+    placa = _avaliar_leitura(placa, data_hora)
+    if placa is None:
+        return False
+
     print(f"🔄 Processando: {placa}...")
     
     # 2. Verifica/Cria Cadastro (Regra de Negócio: Auto-cadastro de Visitantes)
@@ -24,18 +161,61 @@ def registrar_leitura(placa, data_hora, tempo_video, arquivo_origem):
     if not info_veiculo:
         print(f"🆕 Veículo Inédito. Cadastrando Visitante: {placa}")
         database.atualizar_veiculo(placa, 'VISITANTE', 'NAO_AUTORIZADO', 'Auto-detectado pelo vídeo')
+        _obter_indice_placas().adicionar(placa)
         status = 'NAO_AUTORIZADO'
     else:
         # info_veiculo retorna (tipo, status, proprietario)
         status = info_veiculo[1] 
 
-    # 3. Alerta de Segurança IMEDIATO (Requisito 7)
-    # Isso deve acontecer ANTES de salvar, para gerar o log de console
-    if status in ['NAO_AUTORIZADO', 'OCORRENCIA']:
-        print(f"🚨🚨 ALERTA CRÍTICO: Veículo {status} detectado na portaria: {placa}!")
+    # 3. Alerta de Segurança
+    _alertar(placa, status, data_hora, arquivo_origem)
 
     # 4. Persistência (Delega a lógica de Entrada/Saída para o database.py)
     # A função salvar_registro já verifica se o carro está dentro ou fora
     database.salvar_registro(placa, data_hora, arquivo_origem)
     
-    print(f"✅ Registro computado no banco para {placa}.")
\ No newline at end of file
+    print(f"✅ Registro computado no banco para {placa}.")
+
+    # 5. Registro já existe: evidências e demais ouvintes podem se ligar a ele
+    if status in STATUS_ALERTA:
+        _avisar_ouvintes(placa, status, data_hora, arquivo_origem)
+    return True
+
+def registrar_leituras_em_lote(leituras):
+    """
+    Versão em lote de registrar_leitura para [(placa, data_hora, arquivo_origem)].
+    Mesmas regras (encaixe, debounce, auto-cadastro, alerta), mas todas as
+    gravações saem em UMA transação. Devolve, para cada leitura, a placa
+    gravada ou None se foi descartada pelo debounce.
+    """
+    database.inicializar_db()
+
+    registros, visitantes, gravadas, pendentes_alerta = [], [], [], []
+    for placa, data_hora, arquivo_origem in leituras:
+        placa = _avaliar_leitura(placa, data_hora)
+        gravadas.append(placa)
+        if placa is None:
+            continue
+
+        info_veiculo = database.buscar_info_veiculo(placa)
+        if info_veiculo:
+            status = info_veiculo[1]
+        else:
+            # Ainda não está no banco: o cadastro sai junto com os registros
+            if placa not in visitantes:
+                print(f"🆕 Veículo Inédito. Cadastrando Visitante: {placa}")
+                visitantes.append(placa)
+                _obter_indice_placas().adicionar(placa)
+            status = 'NAO_AUTORIZADO'
+
+        _alertar(placa, status, data_hora, arquivo_origem)
+        registros.append((placa, data_hora, arquivo_origem))
+        if status in STATUS_ALERTA:
+            pendentes_alerta.append((placa, status, data_hora, arquivo_origem))
+
+    if registros:
+        database.salvar_registros_em_lote(registros, visitantes)
+        print(f"✅ {len(registros)} registro(s) computado(s) no banco em uma transação.")
+    for alerta in pendentes_alerta:
+        _avisar_ouvintes(*alerta)
+    return gravadas
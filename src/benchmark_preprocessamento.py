@@ -0,0 +1,130 @@
+# benchmark_preprocessamento.py
+# Compara o tratamento clássico (3x fixo + bilateral, padrão) com o adaptativo:
+# tempo por recorte e paridade das leituras de OCR nos arquivos de data/inputs.
+# Rode antes de ligar PREPROCESSAMENTO_ADAPTATIVO.
+import numpy as np
+import os
+import time
+import cv2
+from ultralytics import YOLO
+import easyocr
+from config_runtime import configurar_runtime
+from vision_core_videos_multiplos_veiculos import (
+    tratamento_classico, tratamento_adaptativo, corrigir_padrao_brasileiro, TAMANHO_YOLO, BASE_DIR
+)
+
+INPUTS_DIR = os.path.join(BASE_DIR, 'data', 'inputs')
+EXT_IMAGENS = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff')
+EXT_VIDEOS = ('.mp4', '.avi', '.mov', '.mkv')
+
+# Frames amostrados por vídeo (espaçados uniformemente)
+FRAMES_POR_VIDEO = 8
+# Repetições para medir o tempo de cada recorte
+REPETICOES = 5
+
+
+def tratamento_imagem_hd_classico(img):
+    """Versão que alocava a cada chamada: referência de pixels do tratamento_classico."""
+    img = cv2.resize(img, None, fx=3.0, fy=3.0, interpolation=cv2.INTER_CUBIC)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    gray = cv2.bilateralFilter(gray, 11, 17, 17)
+    return cv2.copyMakeBorder(gray, 20, 20, 20, 20, cv2.BORDER_CONSTANT, value=255)
+
+
+def coletar_frames():
+    """Gera (nome, frame) para todas as imagens e alguns frames de cada vídeo."""
+    for raiz, _, arquivos in os.walk(INPUTS_DIR):
+        for nome in sorted(arquivos):
+            caminho = os.path.join(raiz, nome)
+            rel = os.path.relpath(caminho, INPUTS_DIR)
+            if nome.lower().endswith(EXT_IMAGENS):
+                frame = cv2.imread(caminho)
+                if frame is not None:
+                    yield rel, frame
+            elif nome.lower().endswith(EXT_VIDEOS):
+                cap = cv2.VideoCapture(caminho)
+                total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                for i in range(FRAMES_POR_VIDEO):
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, int(total * (i + 0.5) / FRAMES_POR_VIDEO))
+                    ret, frame = cap.read()
+                    if ret:
+                        yield f"{rel}#{i}", frame
+                cap.release()
+
+
+def recortes_focais(yolo_model, frame):
+    """Mesmo recorte focal do script de múltiplos veículos."""
+    h_orig, w_orig = frame.shape[:2]
+    scale = TAMANHO_YOLO / max(h_orig, w_orig)
+    frame_input = cv2.resize(frame, None, fx=scale, fy=scale) if scale < 1 else frame
+    for r in yolo_model(frame_input, verbose=False):
+        for box in r.boxes:
+            if int(box.cls[0]) in [2, 3, 5, 7] and box.conf[0] > 0.4:
+                x1, y1, x2, y2 = map(int, box.xyxy[0])
+                if scale < 1:
+                    x1, x2 = int(x1/scale), int(x2/scale)
+                    y1, y2 = int(y1/scale), int(y2/scale)
+                veiculo = frame[max(0, y1):min(h_orig, y2), max(0, x1):min(w_orig, x2)]
+                if veiculo.size == 0: continue
+                h_v, w_v = veiculo.shape[:2]
+                roi = veiculo[int(h_v*0.55):int(h_v*0.95), int(w_v*0.20):int(w_v*0.80)]
+                if roi.size > 0:
+                    yield roi
+
+
+def medir(funcao, roi):
+    t0 = time.perf_counter()
+    for _ in range(REPETICOES):
+        saida = funcao(roi)
+    return (time.perf_counter() - t0) / REPETICOES * 1000, saida
+
+
+def ler(reader, img):
+    leituras = reader.readtext(img, detail=0, allowlist='ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
+    placas = [p for p in (corrigir_padrao_brasileiro(t) for t in leituras) if p]
+    return placas[0] if placas else None
+
+
+def executar():
+    configurar_runtime()
+    yolo_model = YOLO('yolov8n.pt')
+    reader = easyocr.Reader(['pt'], gpu=False, verbose=False, quantize=False)
+
+    print(f"{'ARQUIVO':<45} | {'ROI':<9} | {'ANTIGO (ms)':<11} | {'NOVO (ms)':<9} | {'OCR ANTIGO':<10} | {'OCR NOVO':<10}")
+    print("=" * 110)
+
+    tempo_antigo = tempo_novo = 0.0
+    total = iguais = lidas_antigo = lidas_novo = pixels_iguais = 0
+
+    for nome, frame in coletar_frames():
+        for roi in recortes_focais(yolo_model, frame):
+            t_antigo, img_antigo = medir(tratamento_classico, roi)
+            img_antigo = img_antigo.copy()
+            pixels_iguais += np.array_equal(img_antigo, tratamento_imagem_hd_classico(roi))
+            t_novo, img_novo = medir(tratamento_adaptativo, roi)
+            placa_antigo = ler(reader, img_antigo)
+            placa_novo = ler(reader, img_novo)
+
+            total += 1
+            tempo_antigo += t_antigo
+            tempo_novo += t_novo
+            iguais += placa_antigo == placa_novo
+            lidas_antigo += placa_antigo is not None
+            lidas_novo += placa_novo is not None
+
+            h, w = roi.shape[:2]
+            print(f"{nome[-45:]:<45} | {w}x{h:<5} | {t_antigo:<11.2f} | {t_novo:<9.2f} | {placa_antigo or '---':<10} | {placa_novo or '---':<10}")
+
+    if not total:
+        print("Nenhum veículo encontrado em data/inputs.")
+        return
+
+    print("=" * 110)
+    print(f"Recortes: {total} | Tempo médio: {tempo_antigo/total:.2f} ms -> {tempo_novo/total:.2f} ms "
+          f"({tempo_antigo/max(tempo_novo, 1e-9):.1f}x)")
+    print(f"Placas válidas: antigo {lidas_antigo} | novo {lidas_novo} | leituras idênticas: {iguais}/{total}")
+    print(f"Clássico com buffers idêntico ao original: {pixels_iguais}/{total} recortes")
+
+
+if __name__ == "__main__":
+    executar()
@@ -0,0 +1,254 @@
+# carga_banco.py
+# Gerador de carga sintética e benchmark de concorrência da camada de banco.
+# N escritores (processos ou threads) mandam leituras de placas sintéticas
+# por backend.registrar_leitura (ou direto em database.salvar_registro) em
+# uma taxa configurável, enquanto um leitor repete as consultas do dashboard.
+# Relata vazão, latência p50/p95/p99 e erros "database is locked", para
+# comparar mudanças na camada de armazenamento com os mesmos números.
+#
+# Roda SEMPRE em um banco separado (--banco), nunca no controle_acesso.db.
+# Os alertas das placas sintéticas ficam só em memória (SaidaMemoria): nada
+# vai para o alertas.log, webhook, socket ou som da guarita.
+#
+# Uso:
+#   python carga_banco.py --escritores 4 --taxa 20 --duracao 30
+#   python carga_banco.py --escritores 8 --taxa 0 --modo threads --alvo database
+#   python carga_banco.py ... --saida resultado.json   # guarda o relatório para comparar
+import os
+import sys
+import json
+import time
+import queue
+import random
+import sqlite3
+import string
+import argparse
+import threading
+import multiprocessing as mp
+from contextlib import redirect_stdout, nullcontext
+from datetime import datetime, timedelta
+import alertas
+import database
+import backend
+
+BANCO_PADRAO = "carga_teste.db"
+# Placas distintas por escritor: com poucas, entradas e saídas se alternam
+PLACAS_POR_ESCRITOR = 200
+# Veículos cadastrados antes do teste (parte das leituras cai em placas conhecidas)
+VEICULOS_CADASTRADOS = 2000
+# Pausa entre rodadas de consultas do leitor (segundos); 0 = sem pausa
+PAUSA_LEITOR = 0.2
+
+
+def _placa_aleatoria(rng):
+    letras = string.ascii_uppercase
+    return (''.join(rng.choice(letras) for _ in range(3)) + rng.choice(string.digits)
+            + rng.choice(letras) + ''.join(rng.choice(string.digits) for _ in range(2)))
+
+
+def _eh_lock(erro):
+    return 'locked' in str(erro) or 'busy' in str(erro)
+
+
+def preparar_banco(caminho, veiculos=VEICULOS_CADASTRADOS, semente=0):
+    """Cria um banco novo com `veiculos` cadastrados."""
+    for sufixo in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(caminho + sufixo):
+            os.remove(caminho + sufixo)
+    database.DB_NAME = caminho
+    database.inicializar_db()
+
+    rng = random.Random(semente)
+    linhas = {_placa_aleatoria(rng): None for _ in range(veiculos)}
+    conn = sqlite3.connect(caminho)
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO veiculos (placa, tipo, status, proprietario) VALUES (?, ?, ?, ?)",
+                         [(p, rng.choice(database.TIPOS_VEICULO), rng.choice(database.STATUS_VEICULO), 'carga')
+                          for p in linhas])
+    conn.close()
+    return list(linhas)
+
+
+def escritor(ident, caminho, alvo, taxa, duracao, cadastradas, saida):
+    """Envia leituras sintéticas até acabar o tempo. Põe o resultado em `saida`."""
+    database.DB_NAME = caminho
+    rng = random.Random(1000 + ident)
+    placas = rng.sample(cadastradas, min(len(cadastradas), PLACAS_POR_ESCRITOR // 2))
+    placas += [_placa_aleatoria(rng) for _ in range(PLACAS_POR_ESCRITOR - len(placas))]
+
+    # Relógio simulado: cada leitura fica além da janela de debounce da anterior,
+    # senão a maior parte seria descartada antes de chegar ao banco
+    relogio = datetime(2030, 1, 1) + timedelta(days=ident)
+    passo = timedelta(seconds=backend.JANELA_DEBOUNCE_SEGUNDOS + 1)
+
+    latencias, erros_lock, outros_erros, enviados = [], 0, 0, 0
+    inicio = time.perf_counter()
+    fim = inicio + duracao
+    while time.perf_counter() < fim:
+        if taxa > 0:
+            espera = inicio + enviados / taxa - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+        placa = rng.choice(placas)
+        relogio += passo
+        t0 = time.perf_counter()
+        try:
+            if alvo == 'backend':
+                backend.registrar_leitura(placa, relogio, "00:00", f"carga-{ident}")
+            else:
+                database.salvar_registro(placa, relogio, f"carga-{ident}")
+            latencias.append(time.perf_counter() - t0)
+        except sqlite3.OperationalError as e:
+            if _eh_lock(e):
+                erros_lock += 1
+            else:
+                outros_erros += 1
+        enviados += 1
+
+    saida.put({'papel': 'escritor', 'latencias': latencias, 'erros_lock': erros_lock,
+               'outros_erros': outros_erros, 'segundos': time.perf_counter() - inicio,
+               'debounce': backend.estatisticas_debounce()})
+
+
+def _alertas_em_memoria():
+    """Troca as saídas reais de alerta por uma SaidaMemoria. Devolve o despachante anterior."""
+    return alertas.instalar_despachante(alertas.DespachanteAlertas([alertas.SaidaMemoria()]))
+
+
+def _em_silencio(funcao, *args):
+    """Alvo dos processos: descarta o log de console do backend e os alertas reais."""
+    sys.stdout = open(os.devnull, 'w')
+    _alertas_em_memoria()
+    funcao(*args)
+
+
+def leitor(caminho, duracao, saida):
+    """Repete as consultas das telas do dashboard."""
+    database.DB_NAME = caminho
+    consultas = {
+        'carros_no_campus': database.buscar_carros_no_campus,
+        'historico': lambda: database.buscar_historico(),
+        'veiculos_pagina': lambda: database.buscar_veiculos_paginado('', 1, 50),
+        'contar_veiculos': lambda: database.contar_veiculos(''),
+        'agregado_hora': lambda: database.buscar_agregado_hora('2000-01-01', '2100-01-01'),
+    }
+    latencias = {nome: [] for nome in consultas}
+    erros_lock = outros_erros = 0
+    fim = time.perf_counter() + duracao
+    while time.perf_counter() < fim:
+        for nome, consulta in consultas.items():
+            t0 = time.perf_counter()
+            try:
+                consulta()
+                latencias[nome].append(time.perf_counter() - t0)
+            except sqlite3.OperationalError as e:
+                if _eh_lock(e):
+                    erros_lock += 1
+                else:
+                    outros_erros += 1
+        if PAUSA_LEITOR:
+            time.sleep(PAUSA_LEITOR)
+    saida.put({'papel': 'leitor', 'latencias': latencias, 'erros_lock': erros_lock, 'outros_erros': outros_erros})
+
+
+def percentis(valores):
+    if not valores:
+        return {'n': 0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+    ordenados = sorted(valores)
+    def p(q): return round(ordenados[min(len(ordenados) - 1, int(len(ordenados) * q))] * 1000, 2)
+    return {'n': len(ordenados), 'p50_ms': p(0.50), 'p95_ms': p(0.95), 'p99_ms': p(0.99),
+            'max_ms': round(ordenados[-1] * 1000, 2)}
+
+
+def executar(escritores=4, taxa=10.0, duracao=30.0, modo='processos', alvo='backend',
+             caminho=BANCO_PADRAO, veiculos=VEICULOS_CADASTRADOS, com_leitor=True):
+    cadastradas = preparar_banco(caminho, veiculos)
+
+    tarefas = [(escritor, (i, caminho, alvo, taxa, duracao, cadastradas)) for i in range(escritores)]
+    if com_leitor:
+        tarefas.append((leitor, (caminho, duracao)))
+
+    if modo == 'processos':
+        saida = mp.Queue()
+        trabalhadores = [mp.Process(target=_em_silencio, args=(funcao, *args, saida)) for funcao, args in tarefas]
+        silencio = nullcontext()
+    else:
+        saida = queue.Queue()
+        trabalhadores = [threading.Thread(target=funcao, args=(*args, saida)) for funcao, args in tarefas]
+        # Threads dividem o sys.stdout: silencia o processo todo durante o teste
+        silencio = redirect_stdout(open(os.devnull, 'w'))
+
+    # Threads: os escritores usam o despachante deste processo
+    anterior = _alertas_em_memoria() if modo == 'threads' else None
+    try:
+        with silencio:
+            for t in trabalhadores: t.start()
+            resultados = [saida.get() for _ in trabalhadores]
+            for t in trabalhadores: t.join()
+    finally:
+        if modo == 'threads':
+            alertas.instalar_despachante(anterior).fechar(timeout=0)
+
+    escritas = [r for r in resultados if r['papel'] == 'escritor']
+    latencias = [l for r in escritas for l in r['latencias']]
+    segundos = max(r['segundos'] for r in escritas) if escritas else duracao
+    relatorio = {
+        'config': {'escritores': escritores, 'taxa_por_escritor': taxa, 'duracao_s': duracao,
+                   'modo': modo, 'alvo': alvo, 'veiculos': veiculos, 'leitor': com_leitor},
+        'escrita': {**percentis(latencias), 'vazao_por_s': round(len(latencias) / segundos, 1),
+                    'erros_lock': sum(r['erros_lock'] for r in escritas),
+                    'outros_erros': sum(r['outros_erros'] for r in escritas)},
+    }
+    if alvo == 'backend':
+        # Em modo threads os escritores dividem os contadores do backend deste processo
+        relatorio['debounce'] = backend.estatisticas_debounce() if modo == 'threads' else {
+            chave: sum(r['debounce'][chave] for r in escritas) for chave in ('aceitas', 'descartadas')}
+    for r in resultados:
+        if r['papel'] == 'leitor':
+            relatorio['leitura'] = {nome: percentis(v) for nome, v in r['latencias'].items()}
+            relatorio['leitura_erros'] = {'erros_lock': r['erros_lock'], 'outros_erros': r['outros_erros']}
+    return relatorio
+
+
+def imprimir_relatorio(relatorio):
+    c, e = relatorio['config'], relatorio['escrita']
+    print("\n" + "=" * 105)
+    print(f"CARGA: {c['escritores']} escritor(es) [{c['modo']}] x {c['taxa_por_escritor'] or 'máx.'} leituras/s "
+          f"-> {c['alvo']} | {c['duracao_s']}s | leitor: {'sim' if c['leitor'] else 'não'}")
+    print("=" * 105)
+    print(f"{'OPERAÇÃO':<20} | {'N':<7} | {'P50 (ms)':<9} | {'P95 (ms)':<9} | {'P99 (ms)':<9} | {'MÁX (ms)':<9} | EXTRA")
+    print(f"{'escrita':<20} | {e['n']:<7} | {e['p50_ms']:<9} | {e['p95_ms']:<9} | {e['p99_ms']:<9} | {e['max_ms']:<9} | "
+          f"{e['vazao_por_s']}/s, locked: {e['erros_lock']}, outros: {e['outros_erros']}")
+    for nome, p in relatorio.get('leitura', {}).items():
+        print(f"{nome:<20} | {p['n']:<7} | {p['p50_ms']:<9} | {p['p95_ms']:<9} | {p['p99_ms']:<9} | {p['max_ms']:<9} |")
+    if 'debounce' in relatorio:
+        print(f"Debounce: {relatorio['debounce']['aceitas']} aceitas, {relatorio['debounce']['descartadas']} descartadas")
+    if 'leitura_erros' in relatorio:
+        print(f"Leitor: locked: {relatorio['leitura_erros']['erros_lock']}, outros: {relatorio['leitura_erros']['outros_erros']}")
+    print("=" * 105)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga sintética e concorrência no banco SQLite.")
+    parser.add_argument("--escritores", type=int, default=4, help="Escritores simultâneos (portarias simuladas)")
+    parser.add_argument("--taxa", type=float, default=10.0, help="Leituras por segundo por escritor (0 = máximo)")
+    parser.add_argument("--duracao", type=float, default=30.0, help="Duração do teste em segundos")
+    parser.add_argument("--modo", choices=["processos", "threads"], default="processos")
+    parser.add_argument("--alvo", choices=["backend", "database"], default="backend",
+                        help="backend.registrar_leitura (caminho completo) ou só database.salvar_registro")
+    parser.add_argument("--veiculos", type=int, default=VEICULOS_CADASTRADOS, help="Veículos cadastrados no início")
+    parser.add_argument("--sem-leitor", action="store_true", help="Não roda as consultas do dashboard")
+    parser.add_argument("--banco", default=BANCO_PADRAO, help="Banco de teste (apagado no início)")
+    parser.add_argument("--saida", default=None, help="Grava o relatório em JSON")
+    args = parser.parse_args()
+
+    if os.path.abspath(args.banco) == os.path.abspath(database.DB_NAME):
+        parser.error("Use um banco separado: o teste apaga o banco indicado em --banco.")
+
+    relatorio = executar(args.escritores, args.taxa, args.duracao, args.modo, args.alvo,
+                         args.banco, args.veiculos, not args.sem_leitor)
+    imprimir_relatorio(relatorio)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, indent=2)
+        print(f"📄 Relatório: {args.saida}")
@@ -0,0 +1,229 @@
+# config_runtime.py
+# Orçamento central de núcleos para o pipeline de visão.
+# PyTorch (YOLO e EasyOCR), OpenCV e os nossos laços de processamento criam
+# pools de threads independentes. Sem um limite comum eles disputam os mesmos
+# núcleos (oversubscription) e a latência por frame fica instável.
+import os
+import sys
+import json
+import time
+import subprocess
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Arquivo onde o modo benchmark grava a melhor divisão encontrada,
+# uma por combinação de núcleos x câmeras
+ARQUIVO_ORCAMENTO = os.path.join(BASE_DIR, 'runtime_config.json')
+
+# Total de núcleos do pipeline (None = detecção automática).
+# Também pode ser definido pela variável de ambiente CONTROLE_NUCLEOS.
+NUCLEOS_TOTAIS = None
+
+# Fração dos núcleos de cada câmera destinada a cada componente
+FRACAO_TORCH = 0.60   # threads intra-op do PyTorch (YOLO + EasyOCR)
+FRACAO_OPENCV = 0.25  # cv2.setNumThreads (resize, filtros, Haar)
+# O restante fica para os workers (decodificação, leitura de imagens)
+
+
+def detectar_nucleos():
+    """Núcleos disponíveis para este processo (respeita taskset/cgroups)."""
+    env = os.environ.get('CONTROLE_NUCLEOS')
+    if env:
+        return max(1, int(env))
+    if NUCLEOS_TOTAIS:
+        return NUCLEOS_TOTAIS
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def calcular_orcamento(total=None, cameras=1, fracao_torch=FRACAO_TORCH, fracao_opencv=FRACAO_OPENCV):
+    """
+    Divide os núcleos entre os componentes.
+    Com várias câmeras no mesmo host, cada uma recebe uma fatia igual.
+    A soma torch + opencv + workers nunca passa da fatia da câmera: com
+    poucos núcleos, opencv = 0 (OpenCV roda no próprio thread, sem pool) e
+    workers = 0 (sem threads auxiliares).
+    """
+    total = total or detectar_nucleos()
+    por_camera = max(1, total // max(1, cameras))
+
+    torch_intra = min(por_camera, max(1, int(round(por_camera * fracao_torch))))
+    opencv = min(por_camera - torch_intra, int(round(por_camera * fracao_opencv)))
+    workers = por_camera - torch_intra - opencv
+
+    return {
+        'nucleos': total,
+        'cameras': cameras,
+        'torch_intra': torch_intra,
+        # Inter-op só paraleliza ramos independentes do grafo; YOLO e EasyOCR
+        # quase não têm, então 1 evita threads ociosas disputando CPU
+        'torch_inter': 1,
+        'opencv': opencv,
+        'workers': workers,
+    }
+
+
+def _chave_benchmark(nucleos, cameras):
+    return f"{nucleos}_nucleos_{cameras}_cameras"
+
+
+def _ler_benchmarks():
+    try:
+        with open(ARQUIVO_ORCAMENTO, 'r', encoding='utf-8') as f:
+            salvos = json.load(f)
+    except (ValueError, OSError):
+        return {}
+    # Formato antigo (um único resultado, sem nº de câmeras) é ignorado
+    return salvos if isinstance(salvos, dict) and 'fracao_torch' not in salvos else {}
+
+
+def carregar_orcamento(cameras=1):
+    """Usa o resultado salvo pelo benchmark para estes núcleos/câmeras, se houver; senão calcula automaticamente."""
+    salvo = _ler_benchmarks().get(_chave_benchmark(detectar_nucleos(), cameras))
+    if salvo:
+        try:
+            return calcular_orcamento(
+                cameras=cameras,
+                fracao_torch=salvo['fracao_torch'],
+                fracao_opencv=salvo['fracao_opencv'],
+            )
+        except KeyError:
+            pass
+    return calcular_orcamento(cameras=cameras)
+
+
+def aplicar_orcamento(orcamento):
+    """Aplica os limites em OpenMP/MKL, PyTorch e OpenCV."""
+    # Variáveis de ambiente só valem para bibliotecas ainda não inicializadas,
+    # mas cobrem processos filhos e backends que as leem tardiamente
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(orcamento['torch_intra'])
+
+    try:
+        import torch
+        torch.set_num_threads(orcamento['torch_intra'])
+        try:
+            torch.set_num_interop_threads(orcamento['torch_inter'])
+        except RuntimeError:
+            # Só pode ser definido antes do primeiro trabalho paralelo do PyTorch
+            pass
+    except ImportError:
+        pass
+
+    try:
+        import cv2
+        cv2.setNumThreads(orcamento['opencv'])
+    except ImportError:
+        pass
+
+
+def configurar_runtime(cameras=1, verbose=True):
+    """Ponto de entrada usado pelos scripts de visão."""
+    orcamento = carregar_orcamento(cameras=cameras)
+    aplicar_orcamento(orcamento)
+    if verbose:
+        print(f"⚙️ Núcleos: {orcamento['nucleos']} | torch: {orcamento['torch_intra']}+{orcamento['torch_inter']} "
+              f"| opencv: {orcamento['opencv']} | workers: {orcamento['workers']}")
+    return orcamento
+
+
+# --- MODO BENCHMARK ---
+# Cada divisão roda em um subprocesso novo, pois torch.set_num_interop_threads
+# não pode ser alterado depois de usado.
+
+def _medir_divisao(fracao_torch, fracao_opencv, cameras, frames):
+    """Executado no subprocesso: roda um pipeline sintético e devolve latências."""
+    import threading
+    import numpy as np
+    import cv2
+    from ultralytics import YOLO
+    import easyocr
+
+    orcamento = calcular_orcamento(cameras=cameras, fracao_torch=fracao_torch, fracao_opencv=fracao_opencv)
+    aplicar_orcamento(orcamento)
+
+    yolo_model = YOLO('yolov8n.pt')
+    reader = easyocr.Reader(['pt'], gpu=False, verbose=False)
+
+    rng = np.random.default_rng(0)
+    frame_hd = rng.integers(0, 255, (1080, 1920, 3), dtype=np.uint8)
+    roi = rng.integers(0, 255, (60, 200, 3), dtype=np.uint8)
+
+    # Aquecimento
+    yolo_model(cv2.resize(frame_hd, (640, 360)), verbose=False)
+    reader.readtext(roi, detail=0)
+
+    latencias = []
+    trava = threading.Lock()
+
+    def camera():
+        for _ in range(frames):
+            t0 = time.perf_counter()
+            frame_input = cv2.resize(frame_hd, (640, 360))
+            yolo_model(frame_input, verbose=False)
+            gray = cv2.cvtColor(cv2.resize(roi, None, fx=2, fy=2), cv2.COLOR_BGR2GRAY)
+            reader.readtext(gray, detail=0)
+            with trava:
+                latencias.append(time.perf_counter() - t0)
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=camera) for _ in range(cameras)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    duracao = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        'fracao_torch': fracao_torch,
+        'fracao_opencv': fracao_opencv,
+        'fps': len(latencias) / duracao,
+        'p50_ms': latencias[len(latencias) // 2] * 1000,
+        'p95_ms': latencias[int(len(latencias) * 0.95) - 1] * 1000,
+    }
+
+
+def benchmark(cameras=1, frames=20):
+    """Testa várias divisões e salva a de menor latência p95."""
+    candidatos = [(t, o) for t in (0.4, 0.5, 0.6, 0.7, 0.8) for o in (0.1, 0.2, 0.3) if t + o <= 0.95]
+
+    print(f"--- BENCHMARK DE NÚCLEOS ({detectar_nucleos()} núcleos, {cameras} câmera(s)) ---")
+    print(f"{'TORCH':<7} | {'OPENCV':<7} | {'FPS':<8} | {'P50 (ms)':<10} | {'P95 (ms)':<10}")
+
+    resultados = []
+    for fracao_torch, fracao_opencv in candidatos:
+        cmd = [sys.executable, os.path.abspath(__file__), '--medir',
+               str(fracao_torch), str(fracao_opencv), str(cameras), str(frames)]
+        saida = subprocess.run(cmd, capture_output=True, text=True, cwd=BASE_DIR)
+        if saida.returncode != 0:
+            print(f"❌ Falha em torch={fracao_torch} opencv={fracao_opencv}: {saida.stderr.strip()[-200:]}")
+            continue
+        r = json.loads(saida.stdout.strip().splitlines()[-1])
+        resultados.append(r)
+        print(f"{r['fracao_torch']:<7} | {r['fracao_opencv']:<7} | {r['fps']:<8.2f} | {r['p50_ms']:<10.1f} | {r['p95_ms']:<10.1f}")
+
+    if not resultados:
+        return None
+
+    melhor = min(resultados, key=lambda r: r['p95_ms'])
+    melhor['nucleos'] = detectar_nucleos()
+    melhor['cameras'] = cameras
+    salvos = _ler_benchmarks()
+    salvos[_chave_benchmark(melhor['nucleos'], cameras)] = melhor
+    with open(ARQUIVO_ORCAMENTO, 'w', encoding='utf-8') as f:
+        json.dump(salvos, f, indent=2)
+
+    print(f"🏁 Melhor divisão: torch={melhor['fracao_torch']} opencv={melhor['fracao_opencv']} (salva em {ARQUIVO_ORCAMENTO})")
+    return melhor
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--medir':
+        ft, fo, cams, n = float(sys.argv[2]), float(sys.argv[3]), int(sys.argv[4]), int(sys.argv[5])
+        print(json.dumps(_medir_divisao(ft, fo, cams, n)))
+    elif len(sys.argv) > 1 and sys.argv[1] == '--benchmark':
+        cameras = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+        benchmark(cameras=cameras)
+    else:
+        print(json.dumps(carregar_orcamento(), indent=2))
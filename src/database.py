@@ -1,9 +1,26 @@
 # database.py
+import os
+import re
+import csv
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
 
 DB_NAME = "controle_acesso.db"
 
+# Pasta dos bancos mensais com permanências antigas (ver retencao.py)
+ARQUIVO_DIR = "arquivo_registros"
+
+# Valores aceitos no cadastro de veículos (formulário e importação CSV)
+TIPOS_VEICULO = ["PARTICULAR", "OFICIAL", "VISITANTE"]
+STATUS_VEICULO = ["AUTORIZADO", "NAO_AUTORIZADO", "OCORRENCIA"]
+COLUNAS_VEICULO = ["placa", "tipo", "status", "proprietario", "observacao"]
+
+# Padrão antigo (ABC1234) ou Mercosul (ABC1D23)
+PADRAO_PLACA = re.compile(r'^[A-Z]{3}[0-9][A-Z0-9][0-9]{2}$')
+
+# Permanência (minutos) acima da qual a estadia conta como excedida nos relatórios
+LIMITE_PERMANENCIA_MINUTOS = 240
+
 def inicializar_db():
     """Cria as tabelas se não existirem."""
     conn = sqlite3.connect(DB_NAME)
@@ -24,32 +41,159 @@ def inicializar_db():
         placa TEXT,
         entrada DATETIME,
         saida DATETIME,
-        arquivo_origem TEXT
+        arquivo_origem TEXT,
+        evidencia TEXT      -- chave do manifesto no repositório de evidências
+    )''')
+
+    # Bancos criados antes da coluna de evidência
+    if 'evidencia' not in [linha[1] for linha in c.execute("PRAGMA table_info(registros)")]:
+        c.execute("ALTER TABLE registros ADD COLUMN evidencia TEXT")
+
+    # Índices das consultas quentes (carro no campus e histórico por data)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_registros_placa_saida ON registros (placa, saida)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_registros_entrada ON registros (entrada)")
+
+    # Agregados para a tela de Relatórios (mantidos por salvar_registro)
+    c.execute('''CREATE TABLE IF NOT EXISTS agregado_hora (
+        hora TEXT PRIMARY KEY,              -- 'AAAA-MM-DD HH'
+        entradas INTEGER DEFAULT 0,
+        saidas INTEGER DEFAULT 0,
+        pico_ocupacao INTEGER DEFAULT 0,
+        ocupacao_final INTEGER DEFAULT 0    -- ocupação ao fim da hora (herdada pelas horas vazias)
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS agregado_tipo_dia (
+        dia TEXT,                           -- 'AAAA-MM-DD' (dia da saída)
+        tipo TEXT,
+        permanencias INTEGER DEFAULT 0,
+        segundos_total REAL DEFAULT 0,
+        excedidas INTEGER DEFAULT 0,        -- acima do limite de permanência
+        PRIMARY KEY (dia, tipo)
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS agregado_estado (
+        chave TEXT PRIMARY KEY,
+        valor INTEGER
     )''')
     
+    # Agregados criados antes da ocupação ao fim da hora: recalcula a partir do histórico
+    sem_ocupacao_final = 'ocupacao_final' not in [linha[1] for linha in c.execute("PRAGMA table_info(agregado_hora)")]
+    if sem_ocupacao_final:
+        c.execute("ALTER TABLE agregado_hora ADD COLUMN ocupacao_final INTEGER DEFAULT 0")
+
     conn.commit()
+    precisa_reconstruir = sem_ocupacao_final or \
+        c.execute("SELECT 1 FROM agregado_estado WHERE chave = 'ocupacao'").fetchone() is None
     conn.close()
 
-def salvar_registro(placa, data_hora, arquivo):
-    """Registra uma entrada. Se o carro já estiver dentro (sem saída), registra saída."""
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    
+    # Banco criado antes dos agregados: calcula tudo uma vez a partir do histórico
+    if precisa_reconstruir:
+        reconstruir_agregados()
+
+def _como_datetime(valor):
+    """Converte para datetime; None se o texto gravado estiver em formato inválido."""
+    if isinstance(valor, datetime):
+        return valor
+    try:
+        return datetime.fromisoformat(str(valor))
+    except ValueError:
+        return None
+
+def _agregar_entrada(c, data_hora):
+    instante = _como_datetime(data_hora)
+    if instante is None: return
+    hora = instante.strftime("%Y-%m-%d %H")
+    c.execute("UPDATE agregado_estado SET valor = valor + 1 WHERE chave = 'ocupacao'")
+    ocupacao = c.execute("SELECT valor FROM agregado_estado WHERE chave = 'ocupacao'").fetchone()[0]
+    c.execute('''INSERT INTO agregado_hora (hora, entradas, pico_ocupacao, ocupacao_final) VALUES (?, 1, ?, ?)
+                 ON CONFLICT(hora) DO UPDATE SET entradas = entradas + 1,
+                 pico_ocupacao = MAX(pico_ocupacao, excluded.pico_ocupacao),
+                 ocupacao_final = excluded.ocupacao_final''', (hora, ocupacao, ocupacao))
+
+def _agregar_saida(c, placa, entrada, saida):
+    entrada_dt, saida_dt = _como_datetime(entrada), _como_datetime(saida)
+    if entrada_dt is None or saida_dt is None: return
+    hora = saida_dt.strftime("%Y-%m-%d %H")
+
+    # O carro ainda estava dentro durante essa hora: conta no pico antes de sair
+    ocupacao = c.execute("SELECT valor FROM agregado_estado WHERE chave = 'ocupacao'").fetchone()[0]
+    c.execute("UPDATE agregado_estado SET valor = MAX(valor - 1, 0) WHERE chave = 'ocupacao'")
+    c.execute('''INSERT INTO agregado_hora (hora, saidas, pico_ocupacao, ocupacao_final) VALUES (?, 1, ?, ?)
+                 ON CONFLICT(hora) DO UPDATE SET saidas = saidas + 1,
+                 pico_ocupacao = MAX(pico_ocupacao, excluded.pico_ocupacao),
+                 ocupacao_final = excluded.ocupacao_final''', (hora, ocupacao, max(ocupacao - 1, 0)))
+
+    info = c.execute("SELECT tipo FROM veiculos WHERE placa = ?", (placa,)).fetchone()
+    tipo = info[0] if info and info[0] else "NÃO CADASTRADO"
+    segundos = max(0.0, (saida_dt - entrada_dt).total_seconds())
+    excedida = 1 if segundos > LIMITE_PERMANENCIA_MINUTOS * 60 else 0
+    c.execute('''INSERT INTO agregado_tipo_dia (dia, tipo, permanencias, segundos_total, excedidas)
+                 VALUES (?, ?, 1, ?, ?)
+                 ON CONFLICT(dia, tipo) DO UPDATE SET permanencias = permanencias + 1,
+                 segundos_total = segundos_total + excluded.segundos_total,
+                 excedidas = excedidas + excluded.excedidas''',
+              (saida_dt.strftime("%Y-%m-%d"), tipo, segundos, excedida))
+
+def _salvar_registro(c, placa, data_hora, arquivo):
     # Verifica se o carro está no campus (tem entrada mas não tem saída)
-    c.execute("SELECT id FROM registros WHERE placa = ? AND saida IS NULL", (placa,))
+    c.execute("SELECT id, entrada FROM registros WHERE placa = ? AND saida IS NULL", (placa,))
     registro_aberto = c.fetchone()
     
     if registro_aberto:
         # Se já está dentro, registra a SAÍDA (Fecha o ciclo)
         c.execute("UPDATE registros SET saida = ? WHERE id = ?", (data_hora, registro_aberto[0]))
+        _agregar_saida(c, placa, registro_aberto[1], data_hora)
     else:
         # Se não está dentro, registra ENTRADA
         c.execute("INSERT INTO registros (placa, entrada, arquivo_origem) VALUES (?, ?, ?)", 
                   (placa, data_hora, arquivo))
-        
+        _agregar_entrada(c, data_hora)
+
+def salvar_registro(placa, data_hora, arquivo):
+    """
+    Registra uma entrada. Se o carro já estiver dentro (sem saída), registra saída.
+    Os agregados de relatório são atualizados na mesma transação.
+    """
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    _salvar_registro(c, placa, data_hora, arquivo)
     conn.commit()
     conn.close()
 
+def salvar_registros_em_lote(registros, visitantes=()):
+    """
+    Grava várias leituras [(placa, data_hora, arquivo)] em UMA transação, na ordem
+    recebida. `visitantes` são placas a auto-cadastrar antes (se ainda não existirem).
+    """
+    conn = sqlite3.connect(DB_NAME, timeout=30)
+    try:
+        with conn:
+            c = conn.cursor()
+            c.executemany("""INSERT OR IGNORE INTO veiculos (placa, tipo, status, proprietario)
+                             VALUES (?, 'VISITANTE', 'NAO_AUTORIZADO', 'Auto-detectado pelo vídeo')""",
+                          [(placa,) for placa in visitantes])
+            for placa, data_hora, arquivo in registros:
+                _salvar_registro(c, placa, data_hora, arquivo)
+    finally:
+        conn.close()
+
+def anexar_evidencia(placa, data_hora, chave):
+    """Liga a evidência gravada ao registro criado/fechado por essa leitura."""
+    conn = sqlite3.connect(DB_NAME, timeout=30)
+    with conn:
+        conn.execute("""UPDATE registros SET evidencia = ?
+                        WHERE placa = ? AND (entrada = ? OR saida = ?)""",
+                     (chave, placa, data_hora, data_hora))
+    conn.close()
+
+def buscar_evidencias(limite=200):
+    """Registros mais recentes que têm evidência: (placa, entrada, saida, arquivo_origem, evidencia)."""
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute("""SELECT placa, entrada, saida, arquivo_origem, evidencia FROM registros
+                 WHERE evidencia IS NOT NULL ORDER BY id DESC LIMIT ?""", (limite,))
+    dados = c.fetchall()
+    conn.close()
+    return dados
+
 def buscar_carros_no_campus():
     conn = sqlite3.connect(DB_NAME)
     c = conn.cursor()
@@ -59,8 +203,29 @@ def buscar_carros_no_campus():
     conn.close()
     return dados
 
-def buscar_historico():
-    conn = sqlite3.connect(DB_NAME)
+def caminho_arquivo_mensal(periodo):
+    """Banco de arquivo de um mês no formato 'AAAA-MM'."""
+    return os.path.join(ARQUIVO_DIR, f"registros_{periodo.replace('-', '_')}.db")
+
+def listar_periodos_arquivados():
+    """Meses ('AAAA-MM') que já têm permanências arquivadas, do mais recente ao mais antigo."""
+    if not os.path.isdir(ARQUIVO_DIR):
+        return []
+    periodos = []
+    for nome in os.listdir(ARQUIVO_DIR):
+        if nome.startswith("registros_") and nome.endswith(".db"):
+            periodos.append(nome[len("registros_"):-len(".db")].replace('_', '-'))
+    return sorted(periodos, reverse=True)
+
+def buscar_historico(periodo=None):
+    """Histórico do banco principal ou, com `periodo` ('AAAA-MM'), de um mês arquivado."""
+    if periodo:
+        caminho = caminho_arquivo_mensal(periodo)
+        if not os.path.exists(caminho):
+            return []
+        conn = sqlite3.connect(caminho)
+    else:
+        conn = sqlite3.connect(DB_NAME)
     c = conn.cursor()
     c.execute("SELECT placa, entrada, saida, arquivo_origem FROM registros ORDER BY entrada DESC")
     dados = c.fetchall()
@@ -76,10 +241,207 @@ def atualizar_veiculo(placa, tipo, status, proprietario):
     conn.commit()
     conn.close()
 
+def _validar_linha_veiculo(linha):
+    """Normaliza uma linha do CSV. Devolve (tupla, None) ou (None, mensagem de erro)."""
+    placa = re.sub(r'[^A-Za-z0-9]', '', linha.get('placa') or '').upper()
+    tipo = (linha.get('tipo') or '').strip().upper()
+    status = (linha.get('status') or '').strip().upper()
+    if not PADRAO_PLACA.match(placa):
+        return None, f"placa inválida '{linha.get('placa')}'"
+    if tipo not in TIPOS_VEICULO:
+        return None, f"tipo inválido '{tipo}' (use {', '.join(TIPOS_VEICULO)})"
+    if status not in STATUS_VEICULO:
+        return None, f"status inválido '{status}' (use {', '.join(STATUS_VEICULO)})"
+    proprietario = (linha.get('proprietario') or '').strip()
+    observacao = (linha.get('observacao') or '').strip() or None
+    return (placa, tipo, status, proprietario, observacao), None
+
+def importar_veiculos_csv(arquivo):
+    """
+    Importa o cadastro em lote a partir de um CSV (arquivo texto já aberto)
+    com cabeçalho placa,tipo,status,proprietario[,observacao] (',' ou ';').
+    Linhas válidas entram em UMA transação (executemany com upsert);
+    devolve (quantidade_importada, [(numero_linha, erro), ...]).
+    """
+    amostra = arquivo.read(4096)
+    arquivo.seek(0)
+    try:
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=',;')
+    except csv.Error:
+        dialeto = csv.excel
+    leitor = csv.DictReader(arquivo, dialect=dialeto)
+    if not leitor.fieldnames or 'placa' not in [c.strip().lower() for c in leitor.fieldnames]:
+        return 0, [(1, "cabeçalho deve conter as colunas " + ", ".join(COLUNAS_VEICULO))]
+    leitor.fieldnames = [c.strip().lower() for c in leitor.fieldnames]
+
+    validas, erros, vistas = {}, [], {}
+    for numero, linha in enumerate(leitor, start=2):
+        valores, erro = _validar_linha_veiculo(linha)
+        if erro:
+            erros.append((numero, erro))
+            continue
+        if valores[0] in vistas:
+            erros.append((numero, f"placa {valores[0]} repetida (linha {vistas[valores[0]]} prevalece)"))
+            continue
+        vistas[valores[0]] = numero
+        validas[valores[0]] = valores
+
+    conn = sqlite3.connect(DB_NAME)
+    with conn:
+        conn.executemany('''INSERT INTO veiculos (placa, tipo, status, proprietario, observacao)
+                            VALUES (?, ?, ?, ?, ?)
+                            ON CONFLICT(placa) DO UPDATE SET tipo = excluded.tipo, status = excluded.status,
+                            proprietario = excluded.proprietario,
+                            observacao = COALESCE(excluded.observacao, veiculos.observacao)''',
+                         list(validas.values()))
+    conn.close()
+    return len(validas), erros
+
+def exportar_veiculos_csv(destino, lote=1000):
+    """Escreve o cadastro em CSV no arquivo `destino`, lendo o banco em blocos."""
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute("SELECT placa, tipo, status, proprietario, observacao FROM veiculos ORDER BY placa")
+    escritor = csv.writer(destino)
+    escritor.writerow(COLUNAS_VEICULO)
+    while True:
+        linhas = c.fetchmany(lote)
+        if not linhas:
+            break
+        escritor.writerows(linhas)
+    conn.close()
+
+def _filtro_veiculos(busca):
+    if not busca:
+        return "", []
+    return "WHERE placa LIKE ? OR proprietario LIKE ?", [f"%{busca}%", f"%{busca}%"]
+
+def contar_veiculos(busca=""):
+    filtro, parametros = _filtro_veiculos(busca)
+    conn = sqlite3.connect(DB_NAME)
+    total = conn.execute(f"SELECT COUNT(*) FROM veiculos {filtro}", parametros).fetchone()[0]
+    conn.close()
+    return total
+
+def buscar_veiculos_paginado(busca="", pagina=1, por_pagina=50):
+    """Uma página do cadastro (ordenado por placa), filtrada por placa ou proprietário."""
+    filtro, parametros = _filtro_veiculos(busca)
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute(f"""SELECT placa, tipo, status, proprietario, observacao FROM veiculos {filtro}
+                  ORDER BY placa LIMIT ? OFFSET ?""", parametros + [por_pagina, (max(1, pagina) - 1) * por_pagina])
+    dados = c.fetchall()
+    conn.close()
+    return dados
+
+def listar_placas():
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute("SELECT placa FROM veiculos")
+    dados = [linha[0] for linha in c.fetchall()]
+    conn.close()
+    return dados
+
 def buscar_info_veiculo(placa):
     conn = sqlite3.connect(DB_NAME)
     c = conn.cursor()
     c.execute("SELECT tipo, status, proprietario FROM veiculos WHERE placa = ?", (placa,))
     dado = c.fetchone()
     conn.close()
-    return dado
\ No newline at end of file
+    return dado
+
+def buscar_ultimas_leituras():
+    """Último evento (entrada ou saída) de cada placa. Usado para o debounce."""
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute("SELECT placa, MAX(COALESCE(saida, entrada)) FROM registros GROUP BY placa")
+    dados = c.fetchall()
+    conn.close()
+    return dados
+
+# --- AGREGADOS (Relatórios) ---
+
+def reconstruir_agregados():
+    """
+    Recalcula os agregados do zero a partir do banco principal e dos meses
+    arquivados. Usado na migração de bancos antigos ou após correções manuais.
+    """
+    linhas = []
+    for periodo in listar_periodos_arquivados():
+        conn_arq = sqlite3.connect(caminho_arquivo_mensal(periodo))
+        linhas += conn_arq.execute("SELECT placa, entrada, saida FROM registros").fetchall()
+        conn_arq.close()
+
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    linhas += c.execute("SELECT placa, entrada, saida FROM registros").fetchall()
+
+    # Reproduz entradas e saídas em ordem cronológica (saída antes de entrada no mesmo instante)
+    eventos = []
+    for placa, entrada, saida in linhas:
+        entrada_dt, saida_dt = _como_datetime(entrada), _como_datetime(saida) if saida else None
+        if entrada_dt is None: continue
+        eventos.append((entrada_dt, 1, placa, entrada, None))
+        if saida_dt is not None:
+            eventos.append((saida_dt, 0, placa, entrada, saida))
+    eventos.sort(key=lambda e: (e[0], e[1]))
+
+    c.execute("DELETE FROM agregado_hora")
+    c.execute("DELETE FROM agregado_tipo_dia")
+    c.execute("INSERT OR REPLACE INTO agregado_estado (chave, valor) VALUES ('ocupacao', 0)")
+    for instante, eh_entrada, placa, entrada, saida in eventos:
+        if eh_entrada:
+            _agregar_entrada(c, instante)
+        else:
+            _agregar_saida(c, placa, entrada, saida)
+
+    conn.commit()
+    conn.close()
+
+def buscar_agregado_hora(inicio, fim):
+    """
+    Linhas (hora, entradas, saidas, pico_ocupacao) entre as datas 'AAAA-MM-DD' (inclusive),
+    uma por hora. Horas sem movimento não têm linha gravada: entram com 0 entradas/saídas e
+    pico igual à ocupação herdada da última hora com movimento (os carros continuam lá dentro).
+    """
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute("""SELECT hora, entradas, saidas, pico_ocupacao, ocupacao_final FROM agregado_hora
+                 WHERE hora >= ? AND hora <= ? ORDER BY hora""", (inicio, fim + " 23"))
+    linhas = c.fetchall()
+    anterior = c.execute("SELECT ocupacao_final FROM agregado_hora WHERE hora < ? ORDER BY hora DESC LIMIT 1",
+                         (inicio,)).fetchone()
+    conn.close()
+
+    # Começa no início do período se havia carros dentro; senão, na primeira hora com movimento.
+    # Termina no fim do período, sem passar da hora atual (ou do último movimento gravado).
+    if anterior is None and not linhas:
+        return []
+    primeira = inicio + " 00" if anterior is not None else linhas[0][0]
+    ultima = max(datetime.now().strftime("%Y-%m-%d %H"), linhas[-1][0] if linhas else "")
+    ultima = min(fim + " 23", ultima)
+
+    por_hora = {linha[0]: linha for linha in linhas}
+    ocupacao = anterior[0] if anterior is not None else 0
+    dados = []
+    instante = datetime.strptime(primeira, "%Y-%m-%d %H")
+    hora = primeira
+    while hora <= ultima:
+        if hora in por_hora:
+            _, entradas, saidas, pico, ocupacao = por_hora[hora]
+            dados.append((hora, entradas, saidas, pico))
+        else:
+            dados.append((hora, 0, 0, ocupacao))
+        instante += timedelta(hours=1)
+        hora = instante.strftime("%Y-%m-%d %H")
+    return dados
+
+def buscar_agregado_tipo(inicio, fim):
+    """Linhas (dia, tipo, permanencias, segundos_total, excedidas) entre as datas (inclusive)."""
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute("""SELECT dia, tipo, permanencias, segundos_total, excedidas FROM agregado_tipo_dia
+                 WHERE dia >= ? AND dia <= ? ORDER BY dia""", (inicio, fim))
+    dados = c.fetchall()
+    conn.close()
+    return dados
@@ -0,0 +1,258 @@
+# evidencias.py
+# Evidências de alertas (NAO_AUTORIZADO / OCORRENCIA).
+# O pipeline de vídeo mantém em memória os últimos segundos de frames
+# (BufferPreEvento). Quando o backend grava uma leitura com alerta, o evento
+# junta esses frames, espera alguns frames depois do evento e vai para uma
+# thread de gravação: clipe curto + melhor recorte da placa + miniatura.
+# Nada disso roda na thread de inferência.
+#
+# Repositório endereçado por conteúdo: cada arquivo é salvo como
+# objetos/<sha256[:2]>/<sha256>.<ext>; o manifesto (JSON) de cada evento
+# também, e a chave dele vai para a coluna `evidencia` de `registros`.
+import os
+import json
+import queue
+import hashlib
+import tempfile
+import threading
+import time
+from collections import deque
+import cv2
+import database
+
+# Pasta do repositório (relativa, como o banco e o arquivo de registros)
+EVIDENCIAS_DIR = "evidencias"
+OBJETOS_DIR = os.path.join(EVIDENCIAS_DIR, "objetos")
+
+# Janela do clipe em torno da confirmação
+SEGUNDOS_PRE_EVENTO = 3.0
+SEGUNDOS_POS_EVENTO = 2.0
+# Frames guardados no buffer são reduzidos para este lado máximo (memória)
+LADO_MAXIMO_CLIPE = 640
+LADO_MINIATURA = 240
+# Eventos aguardando gravação; se lotar, o evento perde a evidência
+# (a inferência nunca espera o disco)
+FILA_MAXIMA = 8
+# Recortes guardados por placa lida (candidatos ao "melhor recorte" do alerta)
+# e por quanto tempo depois da última leitura daquela placa
+RECORTES_POR_PLACA = 4
+SEGUNDOS_RECORTES = 30.0
+
+
+def _reduzir(frame, lado_maximo):
+    escala = lado_maximo / max(frame.shape[:2])
+    if escala < 1:
+        return cv2.resize(frame, None, fx=escala, fy=escala, interpolation=cv2.INTER_AREA)
+    return frame.copy()
+
+
+def caminho_objeto(nome):
+    return os.path.join(OBJETOS_DIR, nome[:2], nome)
+
+
+def guardar_objeto(dados, extensao):
+    """Grava bytes pelo hash do conteúdo. Devolve o nome (<sha256>.<ext>)."""
+    nome = f"{hashlib.sha256(dados).hexdigest()}.{extensao}"
+    destino = caminho_objeto(nome)
+    if not os.path.exists(destino):
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        temporario = destino + '.tmp'
+        with open(temporario, 'wb') as f:
+            f.write(dados)
+        os.replace(temporario, destino)
+    return nome
+
+
+def carregar_manifesto(chave):
+    """Manifesto de um evento (dict) ou None se o arquivo não existir."""
+    try:
+        with open(caminho_objeto(chave), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def melhor_recorte(recortes):
+    """Recorte mais nítido (maior variância do Laplaciano)."""
+    melhor, nitidez_melhor = None, -1.0
+    for recorte in recortes:
+        if recorte is None or recorte.size == 0:
+            continue
+        cinza = cv2.cvtColor(recorte, cv2.COLOR_BGR2GRAY) if recorte.ndim == 3 else recorte
+        nitidez = cv2.Laplacian(cinza, cv2.CV_64F).var()
+        if nitidez > nitidez_melhor:
+            melhor, nitidez_melhor = recorte, nitidez
+    return melhor
+
+
+def codificar_clipe(quadros, fps):
+    """Codifica os frames em MP4 e devolve os bytes (None se não houver frames)."""
+    if not quadros:
+        return None
+    h, w = quadros[0].shape[:2]
+    descritor, temporario = tempfile.mkstemp(suffix='.mp4')
+    os.close(descritor)
+    try:
+        escritor = cv2.VideoWriter(temporario, cv2.VideoWriter_fourcc(*'mp4v'), max(1.0, fps), (w, h))
+        for quadro in quadros:
+            if quadro.shape[:2] == (h, w):
+                escritor.write(quadro)
+        escritor.release()
+        with open(temporario, 'rb') as f:
+            return f.read() or None
+    finally:
+        os.remove(temporario)
+
+
+def fps_efetivo(quadros):
+    """FPS real dos frames guardados (o modo ao vivo descarta frames atrasados)."""
+    if len(quadros) < 2 or quadros[-1][0] <= quadros[0][0]:
+        return 1.0
+    return (len(quadros) - 1) / (quadros[-1][0] - quadros[0][0])
+
+
+class BufferPreEvento:
+    """Frames dos últimos SEGUNDOS_PRE_EVENTO, já reduzidos e copiados: [(instante, frame)]."""
+
+    def __init__(self, segundos=SEGUNDOS_PRE_EVENTO):
+        self.segundos = segundos
+        self.quadros = deque()
+
+    def empurrar(self, frame, instante):
+        # Cópia obrigatória: as fontes de frames reaproveitam seus buffers
+        item = (instante, _reduzir(frame, LADO_MAXIMO_CLIPE))
+        self.quadros.append(item)
+        while instante - self.quadros[0][0] > self.segundos:
+            self.quadros.popleft()
+        return item
+
+    def instantaneo(self):
+        return list(self.quadros)
+
+
+class _Evento:
+    def __init__(self, placa, status, data_hora, origem, quadros, recortes, fim):
+        self.placa = placa
+        self.status = status
+        self.data_hora = data_hora
+        self.origem = origem
+        self.quadros = quadros
+        self.recortes = recortes
+        self.fim = fim      # instante até o qual o pós-evento é coletado
+
+
+class GravadorEvidencias:
+    """
+    Uso no laço de vídeo (uma instância por fonte):
+        gravador.empurrar(frame, instante)   # todo frame processado (instante em segundos)
+        gravador.associar(placa, roi)        # recorte de onde o OCR leu a placa
+        backend.adicionar_ouvinte_alerta(gravador.ao_alerta)
+        ...
+        gravador.fechar()
+    """
+
+    def __init__(self, origem):
+        self.origem = origem
+        self.buffer = BufferPreEvento()
+        self._ultimo_instante = 0.0
+        self._recortes = {}     # placa -> deque([(instante, recorte)])
+        self._pendentes = []
+        self._fila = queue.Queue(maxsize=FILA_MAXIMA)
+        self.gravadas = 0
+        self.perdidas = 0
+        self._thread = threading.Thread(target=self._laco, daemon=True)
+        self._thread.start()
+
+    # --- Thread de inferência (só operações baratas) ---
+
+    def empurrar(self, frame, instante=None):
+        """`instante`: tempo do frame em segundos (tempo do vídeo ou, ao vivo, relógio)."""
+        instante = time.monotonic() if instante is None else instante
+        self._ultimo_instante = instante
+        item = self.buffer.empurrar(frame, instante)
+        concluidos = []
+        for evento in self._pendentes:
+            evento.quadros.append(item)
+            if instante >= evento.fim:
+                concluidos.append(evento)
+        for evento in concluidos:
+            self._pendentes.remove(evento)
+            self._enfileirar(evento)
+
+        # Placas que não são lidas há muito tempo não vão mais gerar alerta
+        for placa in [p for p, r in self._recortes.items() if instante - r[-1][0] > SEGUNDOS_RECORTES]:
+            del self._recortes[placa]
+
+    def associar(self, placa, recorte):
+        """Recorte de onde o OCR leu `placa`: só ele pode ilustrar um alerta desta placa."""
+        if recorte is None or recorte.size == 0:
+            return
+        # Cópia: o frame HD e os recortes apontam para buffers reaproveitados pela fonte
+        fila = self._recortes.setdefault(placa, deque(maxlen=RECORTES_POR_PLACA))
+        fila.append((self._ultimo_instante, recorte.copy()))
+
+    def ao_alerta(self, placa, status, data_hora, arquivo_origem):
+        """Ouvinte do backend: chamado depois que a leitura com alerta foi gravada."""
+        if arquivo_origem != self.origem:
+            return
+        # Só recortes lidos como esta placa (nunca o de outro veículo do mesmo frame)
+        recortes = [r for _, r in self._recortes.pop(placa, ())]
+        evento = _Evento(placa, status, data_hora, self.origem, self.buffer.instantaneo(),
+                         recortes, self._ultimo_instante + SEGUNDOS_POS_EVENTO)
+        self._pendentes.append(evento)
+
+    def _enfileirar(self, evento):
+        try:
+            self._fila.put_nowait(evento)
+        except queue.Full:
+            self.perdidas += 1
+            print(f"⚠️ Fila de evidências cheia: evento de {evento.placa} sem evidência.")
+
+    def fechar(self):
+        """Envia os eventos pendentes (com o pós-evento que houver) e espera a gravação."""
+        for evento in self._pendentes:
+            self._fila.put(evento)
+        self._pendentes = []
+        self._fila.put(None)
+        self._thread.join()
+
+    # --- Thread de gravação ---
+
+    def _laco(self):
+        while True:
+            evento = self._fila.get()
+            if evento is None:
+                break
+            try:
+                self._gravar(evento)
+                self.gravadas += 1
+            except Exception as e:
+                self.perdidas += 1
+                print(f"⚠️ Falha ao gravar evidência de {evento.placa}: {e}")
+
+    def _gravar(self, evento):
+        manifesto = {
+            'placa': evento.placa,
+            'status': evento.status,
+            'data_hora': str(evento.data_hora),
+            'origem': evento.origem,
+            'segundos_pre': SEGUNDOS_PRE_EVENTO,
+            'segundos_pos': SEGUNDOS_POS_EVENTO,
+        }
+
+        clipe = codificar_clipe([q for _, q in evento.quadros], fps_efetivo(evento.quadros))
+        if clipe:
+            manifesto['clipe'] = guardar_objeto(clipe, 'mp4')
+
+        recorte = melhor_recorte(evento.recortes)
+        if recorte is not None:
+            manifesto['recorte'] = guardar_objeto(cv2.imencode('.jpg', recorte)[1].tobytes(), 'jpg')
+
+        # Miniatura para a listagem do dashboard: recorte da placa ou frame do evento
+        base = recorte if recorte is not None else (evento.quadros[len(evento.quadros) // 2][1] if evento.quadros else None)
+        if base is not None:
+            miniatura = _reduzir(base, LADO_MINIATURA)
+            manifesto['miniatura'] = guardar_objeto(cv2.imencode('.jpg', miniatura)[1].tobytes(), 'jpg')
+
+        chave = guardar_objeto(json.dumps(manifesto, ensure_ascii=False, sort_keys=True).encode('utf-8'), 'json')
+        database.anexar_evidencia(evento.placa, evento.data_hora, chave)
@@ -0,0 +1,267 @@
+# fonte_frames.py
+# Fontes de frames para os scripts de vídeo.
+# Entregam apenas os frames amostrados (1 a cada PULAR_FRAMES), já reduzidos
+# para o tamanho do YOLO. O frame em resolução cheia do mesmo instante sai
+# da mesma decodificação (ler_frame_hd), sem abrir o vídeo uma segunda vez,
+# e só é convertido para BGR quando pedido (frames com veículo).
+#
+# Vídeos com quadros P/B não permitem pular a decodificação dos frames
+# descartados (eles são referência para os seguintes): o ganho está em não
+# converter/copiar esses frames, não em não decodificá-los.
+import os
+import json
+import shutil
+import subprocess
+import cv2
+import numpy as np
+
+# Quantos buffers pré-alocados giram no backend ffmpeg.
+# O frame reduzido entregue continua válido até (N_BUFFERS - 1) iterações depois;
+# o HD de ler_frame_hd, só até o próximo frame pedido.
+N_BUFFERS = 2
+
+# Distância máxima (em frames) para avançar com grab() em vez de fazer seek
+MAX_AVANCO_SEQUENCIAL = 90
+
+
+class LeitorHD:
+    """
+    Busca frames em resolução cheia por índice (1-based, como frame_count).
+    Para acesso esparso (re-análise pelo índice de detecções); no laço
+    normal o frame HD vem da própria fonte.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.cap = None
+        self.posicao = 0  # Último frame decodificado (1-based)
+
+    def ler(self, indice):
+        if self.cap is None:
+            self.cap = cv2.VideoCapture(self.caminho)
+
+        distancia = indice - self.posicao
+        if distancia <= 0 or distancia > MAX_AVANCO_SEQUENCIAL:
+            # CAP_PROP_POS_FRAMES é 0-based: aponta para o próximo frame lido
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, indice - 1)
+        else:
+            # grab() avança sem converter o frame para BGR
+            for _ in range(distancia - 1):
+                if not self.cap.grab():
+                    return None
+
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        self.posicao = indice
+        return frame
+
+    def fechar(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class FonteFramesOpenCV:
+    """
+    Backend padrão (sem dependências externas).
+    Usa grab() nos frames descartados, que pula a conversão de cor.
+    """
+
+    def __init__(self, caminho, pular_frames, tamanho):
+        self.caminho = caminho
+        self.pular_frames = pular_frames
+        self.tamanho = tamanho
+        self.cap = cv2.VideoCapture(caminho)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        self.largura = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.altura = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self._frame_hd = None
+        self._indice_hd = 0
+
+    def __iter__(self):
+        frame_count = 0
+        while self.cap.isOpened():
+            frame_count += 1
+            if frame_count % self.pular_frames != 0:
+                if not self.cap.grab(): break
+                continue
+
+            ret, frame = self.cap.read()
+            if not ret: break
+
+            h_orig, w_orig = frame.shape[:2]
+            scale = self.tamanho / max(h_orig, w_orig)
+            if scale < 1:
+                frame_input = cv2.resize(frame, None, fx=scale, fy=scale)
+            else:
+                frame_input, scale = frame, 1.0
+
+            # O frame HD já foi decodificado: guarda para ler_frame_hd
+            self._frame_hd, self._indice_hd = frame, frame_count
+            yield frame_count, frame_input, scale
+
+    def ler_frame_hd(self, indice):
+        if indice == self._indice_hd:
+            return self._frame_hd
+        return None
+
+    def fechar(self):
+        self.cap.release()
+
+
+class FonteFramesFFmpeg:
+    """
+    Decodifica via subprocesso ffmpeg. Amostragem (select) e redução para o
+    YOLO (scale) rodam no grafo de filtros do ffmpeg: só o frame reduzido
+    atravessa o pipe principal em BGR. Um segundo ramo (split) manda o mesmo
+    frame em resolução cheia por outro pipe, em YUV 4:2:0 (metade dos bytes
+    do BGR, sem conversão de cor no ffmpeg); ler_frame_hd converte para BGR
+    só os frames que alguém pediu. Todos os buffers são pré-alocados.
+    """
+
+    def __init__(self, caminho, pular_frames, tamanho):
+        self.caminho = caminho
+        self.pular_frames = pular_frames
+        self.tamanho = tamanho
+
+        info = _sondar_video(caminho)
+        self.largura, self.altura, self.fps = info['largura'], info['altura'], info['fps'] or 30
+        # Mesma regra do backend OpenCV: reduz o maior lado para `tamanho`, nunca amplia
+        self.escala = min(1.0, tamanho / max(self.largura, self.altura))
+        self.larg_saida = max(1, int(round(self.largura * self.escala)))
+        self.alt_saida = max(1, int(round(self.altura * self.escala)))
+
+        # Sem redução o frame do YOLO já é o HD: um pipe só, em BGR
+        self.reduz = self.escala < 1
+        # YUV 4:2:0 exige largura e altura pares; senão o ramo HD vai em BGR
+        self.hd_yuv = self.largura % 2 == 0 and self.altura % 2 == 0
+        forma_yuv = (self.altura * 3 // 2, self.largura)
+
+        self._buffers = [np.empty((self.alt_saida, self.larg_saida, 3), dtype=np.uint8) for _ in range(N_BUFFERS)]
+        self._buffers_hd = [np.empty(forma_yuv if self.hd_yuv else (self.altura, self.largura, 3), dtype=np.uint8)
+                            for _ in range(N_BUFFERS)] if self.reduz else []
+        self._bgr_hd = np.empty((self.altura, self.largura, 3), dtype=np.uint8) if self.reduz and self.hd_yuv else None
+        self._proc = None
+        self._pipe_hd = None
+        self._frame_hd = None
+        self._indice_hd = 0
+        self._convertido = 0   # índice do frame que está em _bgr_hd
+
+    def _comando(self, fd_hd=None):
+        # select mantém a numeração do vídeo original: o k-ésimo frame de saída
+        # é o frame k*PULAR_FRAMES (1-based), igual ao laço com cap.read()
+        selecao = f"select='eq(mod(n+1\\,{self.pular_frames})\\,0)'"
+        comando = ['ffmpeg', '-v', 'error', '-nostdin', '-i', self.caminho]
+        if not self.reduz:
+            return comando + ['-vf', selecao, '-vsync', 'passthrough',
+                              '-f', 'rawvideo', '-pix_fmt', 'bgr24', 'pipe:1']
+        # flags=area: mesma interpolação que o cv2.INTER_AREA do backend OpenCV
+        grafo = (f"[0:v]{selecao},split=2[hd][red];"
+                 f"[red]scale={self.larg_saida}:{self.alt_saida}:flags=area[yolo]")
+        return comando + [
+            '-filter_complex', grafo, '-vsync', 'passthrough',
+            '-map', '[yolo]', '-f', 'rawvideo', '-pix_fmt', 'bgr24', 'pipe:1',
+            '-map', '[hd]', '-f', 'rawvideo', '-pix_fmt', 'yuv420p' if self.hd_yuv else 'bgr24', f'pipe:{fd_hd}',
+        ]
+
+    @staticmethod
+    def _ler_exato(arquivo, buf):
+        visao = memoryview(buf).cast('B')
+        lidos = 0
+        while lidos < len(visao):
+            n = arquivo.readinto(visao[lidos:])
+            if not n:
+                return False
+            lidos += n
+        return True
+
+    def __iter__(self):
+        if self.reduz:
+            # Os dois pipes são lidos em sequência (reduzido, depois HD) a cada frame
+            leitura, escrita = os.pipe()
+            self._proc = subprocess.Popen(self._comando(escrita), stdout=subprocess.PIPE,
+                                          bufsize=self._buffers[0].nbytes, pass_fds=(escrita,))
+            os.close(escrita)
+            self._pipe_hd = os.fdopen(leitura, 'rb', buffering=self._buffers_hd[0].nbytes)
+        else:
+            self._proc = subprocess.Popen(self._comando(), stdout=subprocess.PIPE, bufsize=self._buffers[0].nbytes)
+        try:
+            k = 0
+            while True:
+                buf = self._buffers[k % N_BUFFERS]
+                if not self._ler_exato(self._proc.stdout, buf):
+                    break
+                hd = buf
+                if self.reduz:
+                    hd = self._buffers_hd[k % N_BUFFERS]
+                    if not self._ler_exato(self._pipe_hd, hd):
+                        break
+                k += 1
+                self._frame_hd, self._indice_hd = hd, k * self.pular_frames
+                yield self._indice_hd, buf, self.escala
+        finally:
+            self._encerrar_processo()
+
+    def ler_frame_hd(self, indice):
+        if indice != self._indice_hd:
+            return None
+        if self._bgr_hd is None:
+            return self._frame_hd
+        # Conversão de cor só para os frames pedidos (com veículo), uma vez por frame
+        if self._convertido != indice:
+            cv2.cvtColor(self._frame_hd, cv2.COLOR_YUV2BGR_I420, dst=self._bgr_hd)
+            self._convertido = indice
+        return self._bgr_hd
+
+    def _encerrar_processo(self):
+        if self._proc is not None:
+            if self._proc.poll() is None:
+                self._proc.kill()
+            self._proc.stdout.close()
+            if self._pipe_hd is not None:
+                self._pipe_hd.close()
+                self._pipe_hd = None
+            self._proc.wait()
+            self._proc = None
+
+    def fechar(self):
+        self._encerrar_processo()
+
+
+def _sondar_video(caminho):
+    """Lê largura, altura e fps com ffprobe."""
+    cmd = ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+           '-show_entries', 'stream=width,height,r_frame_rate',
+           '-of', 'json', caminho]
+    saida = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    stream = json.loads(saida.stdout)['streams'][0]
+    num, _, den = stream.get('r_frame_rate', '0/1').partition('/')
+    fps = float(num) / float(den or 1) if float(den or 1) else 0
+    return {'largura': int(stream['width']), 'altura': int(stream['height']), 'fps': fps}
+
+
+def ffmpeg_disponivel():
+    return shutil.which('ffmpeg') is not None and shutil.which('ffprobe') is not None
+
+
+def abrir_fonte(caminho, pular_frames, tamanho, backend='auto'):
+    """
+    Abre a fonte de frames de um vídeo.
+    backend: 'ffmpeg', 'opencv' ou 'auto' (variável FONTE_FRAMES, senão OpenCV).
+    O ffmpeg não é o padrão: em 1 núcleo a fonte ffmpeg mediu ~1,4x mais lenta
+    que a OpenCV (mesmo decoder, mais filtros e pipe); ela só compensa quando
+    sobra núcleo para decodificar em paralelo com a inferência.
+    """
+    if backend == 'auto':
+        backend = os.environ.get('FONTE_FRAMES', 'opencv')
+    if backend == 'ffmpeg' and not ffmpeg_disponivel():
+        print("⚠️ FONTE_FRAMES=ffmpeg, mas ffmpeg/ffprobe não estão no PATH. Usando OpenCV.")
+        backend = 'opencv'
+
+    if backend == 'ffmpeg':
+        try:
+            return FonteFramesFFmpeg(caminho, pular_frames, tamanho)
+        except (OSError, subprocess.CalledProcessError, KeyError, IndexError, ValueError):
+            print(f"⚠️ ffmpeg não conseguiu abrir {os.path.basename(caminho)}. Usando OpenCV.")
+    return FonteFramesOpenCV(caminho, pular_frames, tamanho)
@@ -0,0 +1,157 @@
+# indice_deteccoes.py
+# Índice de detecções por vídeo, gravado ao lado do vídeo ("sidecar").
+# Guarda, para cada frame amostrado, as caixas do YOLO (já em coordenadas HD
+# do frame inteiro, mesmo com ROI), a classe e a confiança. Assim, ao ajustar OCR/votação/pré-processamento, o
+# vídeo não precisa passar de novo pelo decoder + YOLO: a re-análise vai
+# direto aos frames que têm veículo e reaproveita as caixas.
+#
+# Arquivos (chave = modelo + TAMANHO_YOLO):
+#   video.mp4.<modelo>_<tamanho>.det.npy   array estruturado (np.load com mmap_mode='r')
+#   video.mp4.<modelo>_<tamanho>.det.json  metadados (amostragem, fps, ROI, assinatura do vídeo)
+#
+# Com ROI o YOLO vê outro recorte: o índice só vale para a mesma ROI.
+import os
+import json
+import numpy as np
+from regiao_interesse import caixas_para_frame
+
+VERSAO_INDICE = 1
+
+# Uma linha por caixa, ordenadas por frame
+DTYPE_DETECCAO = np.dtype([
+    ('frame', '<i4'),
+    ('x1', '<i4'), ('y1', '<i4'), ('x2', '<i4'), ('y2', '<i4'),
+    ('classe', 'u1'),
+    ('confianca', '<f4'),
+])
+
+# Confiança mínima gravada. Abaixo do limiar de produção (0.4) para que
+# ajustes de CONFIANCA_MINIMA também possam usar o índice.
+CONFIANCA_INDICE = 0.25
+
+
+def _pontos(regiao):
+    return regiao.poligono.tolist() if regiao is not None else None
+
+
+def caminho_indice(caminho_video, modelo, tamanho):
+    """Prefixo dos arquivos do índice (sem .npy/.json)."""
+    nome_modelo = os.path.splitext(os.path.basename(modelo))[0]
+    return f"{caminho_video}.{nome_modelo}_{tamanho}.det"
+
+
+def _assinatura_video(caminho_video):
+    info = os.stat(caminho_video)
+    return {'tamanho_bytes': info.st_size, 'modificado_ns': info.st_mtime_ns}
+
+
+class GravadorIndice:
+    """Acumula as detecções durante o processamento e grava o índice no fim."""
+
+    def __init__(self, caminho_video, modelo, tamanho, pular_frames, fps, regiao=None):
+        self.prefixo = caminho_indice(caminho_video, modelo, tamanho)
+        self.meta = {
+            'versao': VERSAO_INDICE,
+            'modelo': os.path.basename(modelo),
+            'tamanho_yolo': tamanho,
+            'pular_frames': pular_frames,
+            'fps': fps,
+            'confianca_minima': CONFIANCA_INDICE,
+            'roi': _pontos(regiao),
+            'video': _assinatura_video(caminho_video),
+        }
+        self._blocos = []
+        self._ultimo_frame = 0
+
+    def adicionar(self, frame_count, resultados, scale, origem=(0, 0)):
+        """
+        Recebe a saída do YOLO de um frame amostrado (mesmo caixas_para_frame de extrair_veiculos).
+        `origem`: canto do recorte da ROI no frame, para gravar coordenadas do frame inteiro.
+        """
+        self._ultimo_frame = frame_count
+        for r in resultados:
+            if len(r.boxes) == 0:
+                continue
+            conf = r.boxes.conf.cpu().numpy()
+            manter = conf >= CONFIANCA_INDICE
+            if not manter.any():
+                continue
+            xyxy = caixas_para_frame(r.boxes.xyxy.cpu().numpy()[manter], scale, origem)
+
+            bloco = np.empty(len(xyxy), dtype=DTYPE_DETECCAO)
+            bloco['frame'] = frame_count
+            bloco['x1'], bloco['y1'], bloco['x2'], bloco['y2'] = xyxy.T
+            bloco['classe'] = r.boxes.cls.cpu().numpy()[manter]
+            bloco['confianca'] = conf[manter]
+            self._blocos.append(bloco)
+
+    def concluir(self):
+        """Grava .npy + .json (o .json por último: índice sem ele é ignorado)."""
+        deteccoes = np.concatenate(self._blocos) if self._blocos else np.empty(0, dtype=DTYPE_DETECCAO)
+        self.meta['ultimo_frame'] = self._ultimo_frame
+        self.meta['deteccoes'] = int(len(deteccoes))
+
+        temporario = self.prefixo + '.npy.tmp'
+        with open(temporario, 'wb') as f:
+            np.save(f, deteccoes)
+        os.replace(temporario, self.prefixo + '.npy')
+        with open(self.prefixo + '.json.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(self.prefixo + '.json.tmp', self.prefixo + '.json')
+
+
+class IndiceDeteccoes:
+    """Índice carregado do disco. `deteccoes` é um memmap somente leitura."""
+
+    def __init__(self, meta, deteccoes):
+        self.meta = meta
+        self.deteccoes = deteccoes
+
+    @property
+    def fps(self):
+        return self.meta['fps']
+
+    def frames_com_veiculos(self, classes, confianca_minima, pular_frames=None):
+        """
+        Gera (frame_count, caixas) só para os frames amostrados que têm veículo.
+        `pular_frames` precisa ser múltiplo da amostragem com que o índice foi gravado.
+        """
+        base = self.meta['pular_frames']
+        pular_frames = pular_frames or base
+        if pular_frames % base != 0:
+            raise ValueError(f"Índice gravado com PULAR_FRAMES={base}; {pular_frames} não é múltiplo.")
+        if confianca_minima < self.meta['confianca_minima']:
+            raise ValueError(f"Índice só guarda confiança >= {self.meta['confianca_minima']}.")
+
+        d = self.deteccoes
+        mascara = np.isin(d['classe'], classes) & (d['confianca'] > confianca_minima)
+        if pular_frames != base:
+            mascara &= (d['frame'] % pular_frames == 0)
+        selecionadas = d[mascara]
+        if len(selecionadas) == 0:
+            return
+
+        frames, inicios = np.unique(selecionadas['frame'], return_index=True)
+        fins = list(inicios[1:]) + [len(selecionadas)]
+        for frame, ini, fim in zip(frames, inicios, fins):
+            linhas = selecionadas[ini:fim]
+            caixas = [(int(l['x1']), int(l['y1']), int(l['x2']), int(l['y2'])) for l in linhas]
+            yield int(frame), caixas
+
+
+def carregar_indice(caminho_video, modelo, tamanho, regiao=None):
+    """Devolve o IndiceDeteccoes válido para o vídeo e a ROI, ou None (ausente/desatualizado)."""
+    prefixo = caminho_indice(caminho_video, modelo, tamanho)
+    try:
+        with open(prefixo + '.json', 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('versao') != VERSAO_INDICE or meta.get('video') != _assinatura_video(caminho_video):
+            return None
+        if meta.get('roi') != _pontos(regiao):
+            return None
+        deteccoes = np.load(prefixo + '.npy', mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    if deteccoes.dtype != DTYPE_DETECCAO:
+        return None
+    return IndiceDeteccoes(meta, deteccoes)
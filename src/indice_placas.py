@@ -0,0 +1,155 @@
+# indice_placas.py
+# Índice aproximado de placas cadastradas.
+# Serve para "encaixar" uma leitura do OCR com erro pequeno (ex.: ABC1O23)
+# na placa conhecida mais próxima (ABC1D23) antes de auto-cadastrar visitante.
+#
+# Distância: Levenshtein com custo reduzido (CUSTO_CONFUSAO) para trocas
+# entre caracteres do mesmo grupo de confusão do OCR, montado a partir de
+# dict_letra_num/dict_num_letra (ex.: O, Q, D, U e 0 formam um grupo).
+#
+# Estrutura: em vez de percorrer uma BK-tree (que em Python visita milhares de
+# nós com dezenas de milhares de placas), cada placa é reduzida à sua "forma
+# canônica" (cada grupo de confusão vira um único símbolo) e indexada junto
+# com todas as variantes de uma deleção. Uma consulta faz ~8 buscas em dict e
+# calcula a distância exata só nos poucos candidatos. O resultado é exato para
+# qualquer limiar < 2 (no máximo uma edição "comum" + trocas de confusão).
+from collections import defaultdict
+
+# Dicionários de Correção (Letra <-> Número)
+dict_letra_num = {
+    'O': '0', 'Q': '0', 'D': '0', 'U': '0',
+    'I': '1', 'J': '1', 'L': '1',
+    'Z': '2',
+    'A': '4',
+    'S': '5', '$': '5',
+    'G': '6', 'b': '6',
+    'T': '7',
+    'B': '8',
+    'g': '9'
+}
+dict_num_letra = {
+    '0': 'O',
+    '1': 'I',
+    '2': 'Z',
+    '4': 'A',
+    '5': 'S',
+    '6': 'G',
+    '7': 'T',
+    '8': 'B'
+}
+
+# Custo de trocar dois caracteres do mesmo grupo (troca comum, inserção e remoção = 1)
+CUSTO_CONFUSAO = 0.5
+# Distância máxima para considerar que a leitura é a placa conhecida.
+# 0.5 = uma troca entre caracteres de um grupo de confusão, e nada mais.
+# Uma edição comum (troca qualquer, inserção, remoção) custa 1.0 e nunca
+# encaixa por padrão: ABC1D24 ou XBC1D23 são outra placa, não um erro do OCR.
+LIMIAR_DISTANCIA = 0.5
+
+
+def _pares_confusao():
+    pares = set()
+    for origem, destino in list(dict_letra_num.items()) + list(dict_num_letra.items()):
+        pares.add((origem, destino))
+        pares.add((destino, origem))
+    return pares
+
+PARES_CONFUSAO = _pares_confusao()
+
+
+def _grupos_confusao():
+    """Caractere -> representante do seu grupo (componentes conexos dos pares)."""
+    pai = {}
+
+    def raiz(c):
+        pai.setdefault(c, c)
+        while pai[c] != c:
+            pai[c] = pai[pai[c]]
+            c = pai[c]
+        return c
+
+    for a, b in PARES_CONFUSAO:
+        ra, rb = raiz(a), raiz(b)
+        if ra != rb:
+            pai[max(ra, rb)] = min(ra, rb)
+    return {c: raiz(c) for c in pai}
+
+GRUPO = _grupos_confusao()
+
+
+def forma_canonica(placa):
+    return ''.join(GRUPO.get(c, c) for c in placa)
+
+
+def _delecoes(texto):
+    return {texto[:i] + texto[i+1:] for i in range(len(texto))}
+
+
+def distancia(a, b):
+    """Levenshtein ponderado pelos grupos de confusão do OCR."""
+    anterior = [float(j) for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        atual = [float(i)]
+        for j, cb in enumerate(b, 1):
+            if ca == cb:
+                troca = 0.0
+            elif GRUPO.get(ca, ca) == GRUPO.get(cb, cb):
+                troca = CUSTO_CONFUSAO
+            else:
+                troca = 1.0
+            atual.append(min(anterior[j] + 1, atual[j-1] + 1, anterior[j-1] + troca))
+        anterior = atual
+    return anterior[-1]
+
+
+class IndicePlacas:
+    def __init__(self, placas=()):
+        self.placas = set()
+        self._vizinhos = defaultdict(set)  # forma canônica (ou deleção dela) -> placas
+        for placa in placas:
+            self.adicionar(placa)
+
+    def __len__(self):
+        return len(self.placas)
+
+    def __contains__(self, placa):
+        return placa in self.placas
+
+    def adicionar(self, placa):
+        if placa in self.placas:
+            return
+        self.placas.add(placa)
+        canonica = forma_canonica(placa)
+        self._vizinhos[canonica].add(placa)
+        for variante in _delecoes(canonica):
+            self._vizinhos[variante].add(placa)
+
+    def candidatos(self, placa):
+        canonica = forma_canonica(placa)
+        chaves = _delecoes(canonica)
+        chaves.add(canonica)
+        encontrados = set()
+        for chave in chaves:
+            encontrados |= self._vizinhos.get(chave, set())
+        return encontrados
+
+    def mais_proxima(self, placa, limiar=LIMIAR_DISTANCIA):
+        """
+        Devolve (placa_conhecida, distancia) dentro do limiar, ou None.
+        Empate entre duas ou mais placas na menor distância também devolve
+        None: a leitura é ambígua e não deve virar nenhuma delas.
+        """
+        if placa in self.placas:
+            return placa, 0.0
+        melhores, menor = [], None
+        for candidata in self.candidatos(placa):
+            d = distancia(placa, candidata)
+            if d > limiar:
+                continue
+            if menor is None or d < menor:
+                melhores, menor = [candidata], d
+            elif d == menor:
+                melhores.append(candidata)
+        if len(melhores) != 1:
+            return None
+        return melhores[0], menor
@@ -0,0 +1,164 @@
+# qualidade_roi.py
+# Seleção dos melhores recortes de placa antes do OCR.
+# Cada recorte candidato recebe uma nota barata (nitidez pela variância do
+# Laplaciano, tamanho, contraste e, quando houver, acerto do Haar Cascade x
+# recorte de fallback; só vision_core_videos.py informa o Haar, nos demais
+# scripts a nota usa os três primeiros critérios). Um rastreador simples por
+# IoU liga as caixas do mesmo veículo entre frames.
+#
+# Cada bloco de `janela` candidatos de um veículo tem `top_k` envios ao
+# tratamento + OCR. No primeiro bloco não há com o que comparar: os
+# candidatos ficam retidos e os `top_k` melhores saem quando o bloco fecha.
+# Depois, o recorte vai na hora se está entre os `top_k` melhores dos
+# últimos `janela` candidatos do veículo; os que não foram ficam retidos e,
+# se o bloco fechar (ou o veículo sair) com envios sobrando, os melhores
+# retidos completam a cota. O OCR continua em top_k/janela dos recortes, e a
+# partir do segundo bloco a votação não espera a janela encher.
+from collections import deque
+import cv2
+
+# Referências para normalizar cada critério em 0..1
+NITIDEZ_REFERENCIA = 150.0   # variância do Laplaciano (mesma ordem do LIMIAR_NITIDEZ)
+ALTURA_REFERENCIA = 40       # px de altura do recorte
+CONTRASTE_REFERENCIA = 50.0  # desvio padrão dos tons de cinza
+
+# Peso de cada critério na nota final
+PESO_NITIDEZ = 0.4
+PESO_TAMANHO = 0.3
+PESO_CONTRASTE = 0.2
+PESO_HAAR = 0.1
+
+# Rastreamento: IoU mínimo para ser o mesmo veículo e frames amostrados
+# sem ver o veículo antes de esquecer a trilha dele
+IOU_MINIMO = 0.3
+MAX_AUSENCIA = 2
+
+
+def pontuar_roi(roi, haar=None):
+    """Nota 0..1 do recorte. `haar`: True/False se veio do Haar ou do fallback; None ignora o critério."""
+    cinza = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY) if roi.ndim == 3 else roi
+    nitidez = min(1.0, float(cv2.Laplacian(cinza, cv2.CV_32F).var()) / NITIDEZ_REFERENCIA)
+    tamanho = min(1.0, cinza.shape[0] / ALTURA_REFERENCIA)
+    contraste = min(1.0, float(cinza.std()) / CONTRASTE_REFERENCIA)
+
+    termos = [(PESO_NITIDEZ, nitidez), (PESO_TAMANHO, tamanho), (PESO_CONTRASTE, contraste)]
+    if haar is not None:
+        termos.append((PESO_HAAR, 1.0 if haar else 0.0))
+    return sum(p * v for p, v in termos) / sum(p for p, _ in termos)
+
+
+def iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    uniao = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / uniao if uniao > 0 else 0.0
+
+
+class _Trilha:
+    def __init__(self, caixa, janela):
+        self.caixa = caixa
+        self.ausente = 0
+        self.notas = deque(maxlen=janela)   # notas dos últimos candidatos
+        self.vistos = 0
+        self.no_bloco = 0                   # candidatos já vistos no bloco atual
+        self.restantes = 0                  # envios que sobram no bloco atual
+        self.retidos = []                   # (nota, ordem, cópia do recorte) do bloco atual
+
+
+class SeletorQualidade:
+    """
+    Uso por frame amostrado:
+        rois = seletor.adicionar([(caixa, roi, haar), ...])   # só estes vão ao OCR
+    No fim do vídeo/stream:
+        rois = seletor.esvaziar()   # cotas dos blocos incompletos
+    Os recortes devolvidos são cópias (o frame HD e os buffers de tratamento são reaproveitados).
+    """
+
+    def __init__(self, janela, top_k, iou_minimo=IOU_MINIMO, max_ausencia=MAX_AUSENCIA):
+        self.janela = max(1, janela)
+        self.top_k = max(1, top_k)
+        self.iou_minimo = iou_minimo
+        self.max_ausencia = max_ausencia
+        self._trilhas = []
+        self.candidatos = 0
+        self.enviados = 0
+
+    def _liberar_retidos(self, trilha):
+        """Fim do bloco (ou saída do veículo): os melhores retidos completam a cota."""
+        melhores = sorted(trilha.retidos, key=lambda c: c[0], reverse=True)[:trilha.restantes]
+        trilha.retidos = []
+        trilha.restantes -= len(melhores)
+        self.enviados += len(melhores)
+        # Ordem de chegada: a votação continua cronológica
+        return [roi for _, _, roi in sorted(melhores, key=lambda c: c[1])]
+
+    def _decidir(self, trilha, nota, roi):
+        """Registra o candidato na trilha e devolve os recortes que vão ao OCR agora."""
+        if trilha.no_bloco == 0:
+            trilha.restantes = self.top_k
+        liberados = []
+        # Só compara depois do primeiro bloco: os janela-1 anteriores + este formam a janela
+        if trilha.vistos >= self.janela and trilha.restantes > 0 \
+                and 1 + sum(1 for n in list(trilha.notas)[1:] if n > nota) <= self.top_k:
+            trilha.restantes -= 1
+            self.enviados += 1
+            liberados.append(roi.copy())
+        elif trilha.restantes > 0:
+            trilha.retidos.append((nota, trilha.vistos, roi.copy()))
+
+        trilha.notas.append(nota)
+        trilha.vistos += 1
+        trilha.no_bloco = (trilha.no_bloco + 1) % self.janela
+        if trilha.no_bloco == 0:
+            liberados.extend(self._liberar_retidos(trilha))
+        return liberados
+
+    def _associar(self, caixas):
+        """Greedy por IoU: caixa -> trilha existente (ou None para veículo novo)."""
+        pares = sorted(((iou(c, t.caixa), i, j) for i, c in enumerate(caixas) for j, t in enumerate(self._trilhas)),
+                       reverse=True)
+        associacao, usadas = {}, set()
+        for valor, i, j in pares:
+            if valor < self.iou_minimo:
+                break
+            if i not in associacao and j not in usadas:
+                associacao[i] = self._trilhas[j]
+                usadas.add(j)
+        return associacao
+
+    def adicionar(self, candidatos):
+        """`candidatos`: [(caixa, roi ou None, haar ou None)] de um frame. Devolve os recortes para o OCR."""
+        for trilha in self._trilhas:
+            trilha.ausente += 1
+
+        liberados = []
+        associacao = self._associar([caixa for caixa, _, _ in candidatos])
+        for i, (caixa, roi, haar) in enumerate(candidatos):
+            trilha = associacao.get(i)
+            if trilha is None:
+                trilha = _Trilha(caixa, self.janela)
+                self._trilhas.append(trilha)
+            trilha.caixa, trilha.ausente = caixa, 0
+
+            if roi is None or roi.size == 0:
+                continue
+            self.candidatos += 1
+            liberados.extend(self._decidir(trilha, pontuar_roi(roi, haar), roi))
+
+        # Veículo saiu de cena: a cota que sobrou no bloco dele ainda vai ao OCR
+        for trilha in [t for t in self._trilhas if t.ausente > self.max_ausencia]:
+            liberados.extend(self._liberar_retidos(trilha))
+            self._trilhas.remove(trilha)
+        return liberados
+
+    def esvaziar(self):
+        liberados = []
+        for trilha in self._trilhas:
+            liberados.extend(self._liberar_retidos(trilha))
+        self._trilhas = []
+        return liberados
+
+    def economia(self):
+        """Fração dos recortes candidatos que não foram ao OCR."""
+        return 1 - self.enviados / self.candidatos if self.candidatos else 0.0
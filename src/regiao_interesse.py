@@ -0,0 +1,83 @@
+# regiao_interesse.py
+# Região de interesse (polígono) por câmera.
+# A câmera da portaria também enxerga a rua, carros estacionados e o outro
+# lado da via. Com uma ROI configurada:
+#   1. o YOLO recebe só o retângulo que envolve o polígono (mais pixels por
+#      placa com o mesmo TAMANHO_YOLO);
+#   2. veículos com o centro da caixa fora do polígono são descartados antes
+#      do recorte da placa e do OCR.
+# Coordenadas em pixels do frame em resolução cheia: [[x, y], [x, y], ...]
+import cv2
+import numpy as np
+
+
+class RegiaoInteresse:
+    def __init__(self, pontos):
+        self.poligono = np.array(pontos, dtype=np.int32).reshape(-1, 2)
+        if len(self.poligono) < 3:
+            raise ValueError("A ROI precisa de pelo menos 3 pontos.")
+        self.retangulo = cv2.boundingRect(self.poligono)  # (x, y, largura, altura)
+
+    @classmethod
+    def de_texto(cls, texto):
+        """'x1,y1 x2,y2 x3,y3 ...' (formato da linha de comando)."""
+        return cls([tuple(int(v) for v in par.split(',')) for par in texto.split()])
+
+    def recorte(self, frame):
+        """Retângulo da ROI limitado ao frame: (x, y, largura, altura)."""
+        h, w = frame.shape[:2]
+        x, y, rw, rh = self.retangulo
+        x0, y0 = min(max(0, x), w), min(max(0, y), h)
+        x1, y1 = min(w, x + rw), min(h, y + rh)
+        return x0, y0, x1 - x0, y1 - y0
+
+    def contem_centro(self, caixa):
+        x1, y1, x2, y2 = caixa
+        centro = ((x1 + x2) / 2.0, (y1 + y2) / 2.0)
+        return cv2.pointPolygonTest(self.poligono, centro, False) >= 0
+
+
+def preparar_entrada(frame, tamanho, regiao=None):
+    """
+    Recorta a ROI (se houver) e reduz para o YOLO.
+    Devolve (frame_input, scale, origem), com origem = (x, y) do recorte no frame.
+    """
+    origem = (0, 0)
+    if regiao is not None:
+        x, y, w, h = regiao.recorte(frame)
+        if w > 0 and h > 0:
+            frame = frame[y:y + h, x:x + w]
+            origem = (x, y)
+
+    h_orig, w_orig = frame.shape[:2]
+    scale = tamanho / max(h_orig, w_orig)
+    frame_input = cv2.resize(frame, None, fx=scale, fy=scale) if scale < 1 else frame
+    return frame_input, scale, origem
+
+
+def caixas_para_frame(xyxy, scale, origem=(0, 0)):
+    """
+    Leva caixas (N x 4) da entrada do YOLO para pixels do frame inteiro: trunca,
+    desfaz a redução, trunca de novo e soma a origem do recorte. Único mapeamento
+    usado no processamento, no índice de detecções e, por ele, na re-análise.
+    """
+    caixas = np.asarray(xyxy).astype(np.int64)
+    if scale < 1:
+        caixas = (caixas / scale).astype(np.int64)
+    if origem[0] or origem[1]:
+        caixas += np.array(tuple(origem) * 2, dtype=np.int64)
+    return caixas
+
+
+def caixas_na_regiao(caixas, origem, regiao=None):
+    """
+    Leva as caixas do recorte (já em escala HD) para o frame inteiro e descarta
+    as que têm o centro fora do polígono. Devolve (caixas_aceitas, quantidade_descartada).
+    """
+    ox, oy = origem
+    if ox or oy:
+        caixas = [(x1 + ox, y1 + oy, x2 + ox, y2 + oy) for x1, y1, x2, y2 in caixas]
+    if regiao is None:
+        return caixas, 0
+    aceitas = [c for c in caixas if regiao.contem_centro(c)]
+    return aceitas, len(caixas) - len(aceitas)
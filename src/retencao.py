@@ -0,0 +1,110 @@
+# retencao.py
+# Retenção e manutenção da tabela `registros`.
+# Permanências FECHADAS (com saída) mais antigas que RETENCAO_DIAS saem do
+# banco principal e vão para um banco SQLite por mês (arquivo_registros/).
+# O banco principal fica só com o recente + carros ainda no campus, então as
+# consultas do dashboard e dos scripts de visão não crescem com o tempo.
+#
+# Uso (agendar no cron/Agendador de Tarefas, ex.: toda madrugada):
+#   python retencao.py                 # arquiva + manutenção
+#   python retencao.py --dias 30       # retenção diferente
+#   python retencao.py --so-manutencao # só VACUUM incremental / ANALYZE
+import os
+import sqlite3
+import argparse
+from datetime import datetime, timedelta
+import database
+
+# Idade mínima (dias desde a saída) para uma permanência ser arquivada
+RETENCAO_DIAS = 90
+# Registros movidos por transação (evita travar os escritores por muito tempo)
+LOTE_ARQUIVAMENTO = 5000
+# Páginas liberadas por execução do VACUUM incremental (0 = todas)
+PAGINAS_VACUUM = 0
+
+
+def _colunas(conn, esquema='main'):
+    return [linha[1] for linha in conn.execute(f"PRAGMA {esquema}.table_info(registros)")]
+
+
+def _preparar_arquivo(conn, periodo):
+    """Anexa o banco do mês e garante que tenha as mesmas colunas do principal."""
+    os.makedirs(database.ARQUIVO_DIR, exist_ok=True)
+    conn.execute("ATTACH DATABASE ? AS arq", (database.caminho_arquivo_mensal(periodo),))
+    conn.execute("CREATE TABLE IF NOT EXISTS arq.registros AS SELECT * FROM main.registros WHERE 0")
+    conn.execute("CREATE INDEX IF NOT EXISTS arq.idx_registros_placa ON registros (placa)")
+
+    # Colunas adicionadas depois no principal também entram no arquivo
+    existentes = set(_colunas(conn, 'arq'))
+    for coluna in _colunas(conn):
+        if coluna not in existentes:
+            conn.execute(f"ALTER TABLE arq.registros ADD COLUMN {coluna}")
+
+
+def arquivar_registros(dias=RETENCAO_DIAS):
+    """Move permanências fechadas antigas para os bancos mensais. Devolve o total movido."""
+    database.inicializar_db()
+    limite = str(datetime.now() - timedelta(days=dias))
+
+    conn = sqlite3.connect(database.DB_NAME, timeout=30)
+    total = 0
+    try:
+        periodos = [linha[0] for linha in conn.execute(
+            "SELECT DISTINCT substr(entrada, 1, 7) FROM registros WHERE saida IS NOT NULL AND saida < ?",
+            (limite,))]
+
+        for periodo in periodos:
+            _preparar_arquivo(conn, periodo)
+            colunas = ', '.join(_colunas(conn))
+            while True:
+                # Uma transação por lote: cópia + remoção são atômicas
+                with conn:
+                    ids = [linha[0] for linha in conn.execute(
+                        """SELECT id FROM registros
+                           WHERE saida IS NOT NULL AND saida < ? AND substr(entrada, 1, 7) = ?
+                           LIMIT ?""", (limite, periodo, LOTE_ARQUIVAMENTO))]
+                    if not ids:
+                        break
+                    marcadores = ','.join('?' * len(ids))
+                    conn.execute(f"INSERT OR IGNORE INTO arq.registros ({colunas}) "
+                                 f"SELECT {colunas} FROM main.registros WHERE id IN ({marcadores})", ids)
+                    conn.execute(f"DELETE FROM main.registros WHERE id IN ({marcadores})", ids)
+                total += len(ids)
+            conn.execute("DETACH DATABASE arq")
+            print(f"📦 {periodo}: permanências arquivadas em {database.caminho_arquivo_mensal(periodo)}")
+    finally:
+        conn.close()
+    return total
+
+
+def manutencao():
+    """VACUUM incremental + ANALYZE no banco principal."""
+    conn = sqlite3.connect(database.DB_NAME, timeout=30)
+    try:
+        modo = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if modo != 2:
+            # Só na primeira vez: troca para INCREMENTAL (exige um VACUUM completo)
+            print("🧹 Ativando auto_vacuum=INCREMENTAL (VACUUM completo, só nesta execução)...")
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        else:
+            # O PRAGMA libera uma página por passo: fetchall() executa até o fim
+            conn.execute(f"PRAGMA incremental_vacuum({PAGINAS_VACUUM})" if PAGINAS_VACUUM else "PRAGMA incremental_vacuum").fetchall()
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA optimize")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Arquivamento e manutenção da tabela registros.")
+    parser.add_argument("--dias", type=int, default=RETENCAO_DIAS, help="Idade mínima (dias) para arquivar")
+    parser.add_argument("--so-manutencao", action="store_true", help="Não arquiva; só VACUUM/ANALYZE")
+    args = parser.parse_args()
+
+    if not args.so_manutencao:
+        movidos = arquivar_registros(args.dias)
+        print(f"✅ {movidos} permanência(s) arquivada(s).")
+    manutencao()
+    print("🏁 MANUTENÇÃO FINALIZADA.")
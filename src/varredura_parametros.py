@@ -0,0 +1,266 @@
+# varredura_parametros.py
+# Varredura de parâmetros (precisão x velocidade) com gabarito.
+# Roda um dos pipelines de vídeo offline, sem banco de dados e sem gravar
+# evidências, para cada combinação de PULAR_FRAMES,
+# AMOSTRAS_PARA_CONFIRMAR, TAMANHO_YOLO, CONFIANCA_MINIMA e da seleção por
+# qualidade (JANELA_QUALIDADE / TOP_K_QUALIDADE), e compara as placas
+# confirmadas com o gabarito.
+#
+# Pipelines (--script):
+#   multiplos: vision_core_videos_multiplos_veiculos (vários veículos por vídeo,
+#              tratamento adaptativo, voto com frequência >= 2). Padrão.
+#   videos:    vision_core_videos (Haar + CLAHE, uma placa por vídeo, voto com
+#              frequência >= 3). Não usa o índice de detecções.
+#
+# Gabarito (JSON, caminhos relativos a data/inputs):
+#   {"videos/video-01.mp4": ["ABC1D23"],
+#    "videos/outros-videos/video-02.mp4": ["XYZ9876", "BRA2E19"]}
+#
+# Uso:
+#   python varredura_parametros.py --pular 2 3 --amostras 3 5 --tamanho 480 640 --confianca 0.3 0.4
+#   python varredura_parametros.py --janela 1 4 6 --top-k 1 2   # janela 1 = todo recorte vai ao OCR
+#   python varredura_parametros.py --usar-indice   # OCR/votação reaproveitando as caixas gravadas
+#   python varredura_parametros.py --script videos --pular 3 --amostras 5
+#   python varredura_parametros.py --roi "200,300 1700,300 1900,1080 0,1080"   # mesma ROI das câmeras
+import os
+import csv
+import json
+import time
+import argparse
+import itertools
+from contextlib import contextmanager
+import cv2
+from config_runtime import configurar_runtime
+from indice_deteccoes import carregar_indice
+from regiao_interesse import RegiaoInteresse
+import vision_core_videos
+import vision_core_videos_multiplos_veiculos as nucleo
+
+INPUTS_DIR = os.path.join(nucleo.BASE_DIR, 'data', 'inputs')
+GABARITO_PADRAO = os.path.join(INPUTS_DIR, 'gabarito.json')
+SAIDA_DIR = os.path.join(nucleo.BASE_DIR, 'data', 'outputs')
+
+SCRIPTS = {'multiplos': nucleo, 'videos': vision_core_videos}
+
+# Grade padrão: cobre os valores usados hoje nos dois scripts de vídeo
+# (multiplos: pular 2, amostras 3; videos: pular 3, amostras 5)
+GRADE_PADRAO = {
+    'PULAR_FRAMES': [2, 3],
+    'AMOSTRAS_PARA_CONFIRMAR': [3, 5],
+    'TAMANHO_YOLO': [640],
+    'CONFIANCA_MINIMA': [0.4],
+    'JANELA_QUALIDADE': [4],
+    'TOP_K_QUALIDADE': [2],
+}
+
+COLUNAS = ['script', 'PULAR_FRAMES', 'AMOSTRAS_PARA_CONFIRMAR', 'TAMANHO_YOLO', 'CONFIANCA_MINIMA',
+           'JANELA_QUALIDADE', 'TOP_K_QUALIDADE',
+           'precisao', 'revocacao', 'acerto', 'tempo_confirmacao_s', 'fps', 'pareto']
+
+
+@contextmanager
+def parametros(modulo, **valores):
+    """Troca temporariamente as constantes do script de vídeo."""
+    antigos = {nome: getattr(modulo, nome) for nome in valores}
+    for nome, valor in valores.items():
+        setattr(modulo, nome, valor)
+    try:
+        yield
+    finally:
+        for nome, valor in antigos.items():
+            setattr(modulo, nome, valor)
+
+
+def carregar_gabarito(caminho):
+    with open(caminho, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+    gabarito = {}
+    for relativo, placas in dados.items():
+        caminho_video = os.path.join(INPUTS_DIR, relativo)
+        if not os.path.exists(caminho_video):
+            print(f"⚠️ Amostra do gabarito não encontrada: {relativo}")
+            continue
+        gabarito[caminho_video] = {p.upper() for p in placas}
+    return gabarito
+
+
+def avaliar_video(caminho_video, esperadas, modelos, usar_indice, script, regiao=None):
+    """Roda um vídeo com as constantes atuais. Devolve (confirmadas, tempos, frames, segundos)."""
+    confirmadas = {}
+
+    # Substitui o banco: só anota placa e instante (no vídeo) da confirmação
+    def ao_confirmar(placa, frame_count, fps, nome_video):
+        confirmadas.setdefault(placa, frame_count / fps)
+
+    cap = cv2.VideoCapture(caminho_video)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    inicio = time.perf_counter()
+    if script == 'videos':
+        yolo_model, reader, plate_cascade = modelos
+        placa, frame_count, fps = vision_core_videos.processar_video(caminho_video, yolo_model, reader, plate_cascade,
+                                                                     regiao)
+        if placa:
+            ao_confirmar(placa, frame_count, fps, os.path.basename(caminho_video))
+    else:
+        yolo_model, reader = modelos
+        indice = carregar_indice(caminho_video, nucleo.MODELO_YOLO, nucleo.TAMANHO_YOLO, regiao) if usar_indice else None
+        if indice is not None and nucleo.PULAR_FRAMES % indice.meta['pular_frames'] == 0 \
+                and nucleo.CONFIANCA_MINIMA >= indice.meta['confianca_minima']:
+            nucleo.reanalisar_video(caminho_video, indice, reader, ao_confirmar=ao_confirmar, regiao=regiao)
+        else:
+            # Sem índice e sem evidências: o FPS mede só o pipeline de leitura
+            nucleo.processar_video(caminho_video, yolo_model, reader, gravar_indice=False,
+                                   gravar_evidencias=False, ao_confirmar=ao_confirmar, regiao=regiao)
+    segundos = time.perf_counter() - inicio
+
+    tempos = [confirmadas[p] for p in esperadas if p in confirmadas]
+    return set(confirmadas), tempos, total_frames, segundos
+
+
+def avaliar_configuracao(gabarito, modelos, usar_indice, script, regiao=None):
+    verdadeiros = confirmadas_total = esperadas_total = 0
+    tempos, frames, segundos = [], 0, 0.0
+    for caminho_video, esperadas in gabarito.items():
+        confirmadas, t, n_frames, s = avaliar_video(caminho_video, esperadas, modelos, usar_indice, script, regiao)
+        verdadeiros += len(confirmadas & esperadas)
+        confirmadas_total += len(confirmadas)
+        esperadas_total += len(esperadas)
+        tempos.extend(t)
+        frames += n_frames
+        segundos += s
+
+    precisao = verdadeiros / confirmadas_total if confirmadas_total else 0.0
+    revocacao = verdadeiros / esperadas_total if esperadas_total else 0.0
+    return {
+        'precisao': round(precisao, 3),
+        'revocacao': round(revocacao, 3),
+        # F1: uma nota só para o gráfico / fronteira de Pareto
+        'acerto': round(2 * precisao * revocacao / (precisao + revocacao), 3) if precisao + revocacao else 0.0,
+        'tempo_confirmacao_s': round(sum(tempos) / len(tempos), 2) if tempos else None,
+        'fps': round(frames / segundos, 1) if segundos else 0.0,
+    }
+
+
+def marcar_pareto(linhas):
+    """Fronteira de Pareto: maior acerto, maior FPS, menor tempo até confirmar."""
+    def chave(l):
+        tempo = l['tempo_confirmacao_s']
+        return l['acerto'], l['fps'], -(tempo if tempo is not None else float('inf'))
+
+    for l in linhas:
+        a = chave(l)
+        l['pareto'] = not any(
+            all(x >= y for x, y in zip(chave(o), a)) and chave(o) != a for o in linhas)
+
+
+def imprimir_tabela(linhas):
+    print(f"\nScript: {linhas[0]['script']}" if linhas else "")
+    print("=" * 120)
+    print(f"{'PULAR':<6} | {'AMOSTRAS':<8} | {'YOLO':<5} | {'CONF.':<5} | {'JANELA':<6} | {'TOP-K':<5} | "
+          f"{'PRECISÃO':<8} | {'REVOC.':<6} | {'F1':<5} | {'CONFIRMA (s)':<12} | {'FPS':<6} | PARETO")
+    print("=" * 120)
+    for l in sorted(linhas, key=lambda l: (-l['acerto'], -l['fps'])):
+        tempo = '---' if l['tempo_confirmacao_s'] is None else l['tempo_confirmacao_s']
+        print(f"{l['PULAR_FRAMES']:<6} | {l['AMOSTRAS_PARA_CONFIRMAR']:<8} | {l['TAMANHO_YOLO']:<5} | "
+              f"{l['CONFIANCA_MINIMA']:<5} | {l['JANELA_QUALIDADE']:<6} | {l['TOP_K_QUALIDADE']:<5} | "
+              f"{l['precisao']:<8} | {l['revocacao']:<6} | {l['acerto']:<5} | "
+              f"{tempo:<12} | {l['fps']:<6} | {'★' if l['pareto'] else ''}")
+    print("=" * 120)
+
+
+def salvar_grafico(linhas, destino):
+    """Acerto x FPS (opcional: só se o matplotlib estiver instalado)."""
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("ℹ️ matplotlib não instalado: gráfico não gerado.")
+        return
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    for l in linhas:
+        ax.scatter(l['fps'], l['acerto'], c='tab:red' if l['pareto'] else 'tab:gray')
+        ax.annotate(f"p{l['PULAR_FRAMES']} a{l['AMOSTRAS_PARA_CONFIRMAR']} "
+                    f"y{l['TAMANHO_YOLO']} c{l['CONFIANCA_MINIMA']} "
+                    f"j{l['JANELA_QUALIDADE']}k{l['TOP_K_QUALIDADE']}",
+                    (l['fps'], l['acerto']), fontsize=7)
+    ax.set_xlabel("FPS (frames do vídeo por segundo)")
+    ax.set_ylabel("Acerto (F1 das placas)")
+    ax.set_title("Varredura de parâmetros (vermelho = fronteira de Pareto)")
+    fig.tight_layout()
+    fig.savefig(destino)
+    print(f"📈 Gráfico: {destino}")
+
+
+def varrer(gabarito, grade, usar_indice=False, destino=None, script='multiplos', regiao=None):
+    configurar_runtime()
+    modulo = SCRIPTS[script]
+    modelos = modulo.carregar_modelos()
+    if script == 'videos':
+        modelos = (*modelos, vision_core_videos.carregar_cascade())
+
+    combinacoes = list(itertools.product(*grade.values()))
+    linhas = []
+    for n, valores in enumerate(combinacoes, 1):
+        config = dict(zip(grade.keys(), valores))
+        print(f"🔧 [{n}/{len(combinacoes)}] {config}")
+        with parametros(modulo, **config):
+            resultado = avaliar_configuracao(gabarito, modelos, usar_indice, script, regiao)
+        linhas.append({'script': script, **config, **resultado})
+
+    marcar_pareto(linhas)
+    imprimir_tabela(linhas)
+
+    if destino is None:
+        os.makedirs(SAIDA_DIR, exist_ok=True)
+        destino = os.path.join(SAIDA_DIR, f"varredura_{time.strftime('%Y%m%d_%H%M%S')}.csv")
+    with open(destino, 'w', newline='', encoding='utf-8') as f:
+        escritor = csv.DictWriter(f, fieldnames=COLUNAS)
+        escritor.writeheader()
+        escritor.writerows(linhas)
+    print(f"📄 Resultados: {destino}")
+    salvar_grafico(linhas, os.path.splitext(destino)[0] + '.png')
+    return linhas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Varredura de parâmetros do pipeline de vídeo contra um gabarito.")
+    parser.add_argument("--gabarito", default=GABARITO_PADRAO, help="JSON {amostra: [placas esperadas]}")
+    parser.add_argument("--pular", type=int, nargs="+", default=GRADE_PADRAO['PULAR_FRAMES'])
+    parser.add_argument("--amostras", type=int, nargs="+", default=GRADE_PADRAO['AMOSTRAS_PARA_CONFIRMAR'])
+    parser.add_argument("--tamanho", type=int, nargs="+", default=GRADE_PADRAO['TAMANHO_YOLO'])
+    parser.add_argument("--confianca", type=float, nargs="+", default=GRADE_PADRAO['CONFIANCA_MINIMA'])
+    parser.add_argument("--janela", type=int, nargs="+", default=GRADE_PADRAO['JANELA_QUALIDADE'],
+                        help="Recortes por veículo em cada janela da seleção por qualidade")
+    parser.add_argument("--top-k", type=int, nargs="+", default=GRADE_PADRAO['TOP_K_QUALIDADE'],
+                        help="Recortes de cada janela que vão ao OCR")
+    parser.add_argument("--script", choices=sorted(SCRIPTS), default='multiplos',
+                        help="Pipeline avaliado: multiplos (vision_core_videos_multiplos_veiculos) ou videos (vision_core_videos)")
+    parser.add_argument("--usar-indice", action="store_true",
+                        help="Reaproveita o índice de detecções quando compatível (FPS passa a medir só OCR/votação; só --script multiplos)")
+    parser.add_argument("--roi", default=None,
+                        help="Polígono da portaria em pixels, igual para todos os vídeos: 'x1,y1 x2,y2 x3,y3 ...'")
+    parser.add_argument("--saida", default=None, help="CSV de resultados (o gráfico vai ao lado, .png)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.gabarito):
+        print(f"❌ ERRO: Gabarito não encontrado: {args.gabarito}")
+        raise SystemExit(1)
+
+    gabarito = carregar_gabarito(args.gabarito)
+    if not gabarito:
+        print("❌ ERRO: Nenhuma amostra válida no gabarito.")
+    else:
+        grade = {
+            'PULAR_FRAMES': args.pular,
+            'AMOSTRAS_PARA_CONFIRMAR': args.amostras,
+            'TAMANHO_YOLO': args.tamanho,
+            'CONFIANCA_MINIMA': args.confianca,
+            'JANELA_QUALIDADE': args.janela,
+            'TOP_K_QUALIDADE': args.top_k,
+        }
+        regiao = RegiaoInteresse.de_texto(args.roi) if args.roi else None
+        varrer(gabarito, grade, args.usar_indice, args.saida, args.script, regiao)
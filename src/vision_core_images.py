@@ -1,5 +1,9 @@
 import cv2
 import numpy as np
+import csv
+import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from ultralytics import YOLO
 import easyocr
 import re
@@ -7,7 +11,8 @@ import os
 import urllib.request
 from datetime import datetime
 from collections import Counter
-from backend import registrar_leitura
+from backend import registrar_leitura, registrar_leituras_em_lote
+from config_runtime import configurar_runtime
 
 HAAR_FILENAME = 'haarcascade_russian_plate_number.xml'
 
@@ -18,6 +23,15 @@ IMAGES_DIR = os.path.join(BASE_DIR, 'data', 'inputs', 'images')
 
 XML_PATH = os.path.join(BASE_DIR, HAAR_FILENAME)
 
+EXTENSOES_IMAGEM = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff')
+ALLOWLIST_PLACA = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+# MODO LOTE (--lote)
+# Imagens por lote: uma transação no banco. YOLO e OCR rodam em lote por tamanho
+# de imagem (nada é redimensionado: o lote lê os mesmos pixels do modo normal)
+TAMANHO_LOTE_IMAGENS = 16
+SAIDA_DIR = os.path.join(BASE_DIR, 'data', 'outputs')
+
 def baixar_cascade_silencioso():
     """Baixa o arquivo Haar Cascade se não existir."""
     if not os.path.exists(XML_PATH):
@@ -45,6 +59,20 @@ def preprocessamento_rapido(img_crop):
     contraste = clahe.apply(gray)
     return contraste
 
+def localizar_roi_placa(veiculo_crop, plate_cascade):
+    """Recorte da placa pelo Haar Cascade; sem detecção, usa a faixa inferior do veículo."""
+    veiculo_gray = cv2.cvtColor(veiculo_crop, cv2.COLOR_BGR2GRAY)
+    plates = plate_cascade.detectMultiScale(veiculo_gray, 1.1, 4)
+
+    if len(plates) > 0:
+        px, py, pw, ph = max(plates, key=lambda b: b[2] * b[3])
+        mx, my = int(pw * 0.1), int(ph * 0.1)
+        return veiculo_crop[max(0, py-my):py+ph+my, max(0, px-mx):px+pw+mx]
+
+    # FALLBACK
+    h, w = veiculo_crop.shape[:2]
+    return veiculo_crop[int(h*0.60):, int(w*0.15):int(w*0.85)]
+
 # IMPRESSÃO DE TABELA
 def imprimir_cabecalho_tabela():
     print("\n" + "=" * 105)
@@ -61,6 +89,9 @@ def imprimir_linha_tabela(status, placa, data, hora, arquivo):
 def processar_todas_imagens():
     print(f"--- SISTEMA DE DETECÇÃO: PROCESSAMENTO DE IMAGENS (EM LOTE) ---")
 
+    # DIVIDE OS NÚCLEOS ENTRE TORCH, OPENCV E WORKERS
+    configurar_runtime()
+
     baixar_cascade_silencioso()
 
     if not os.path.exists(IMAGES_DIR):
@@ -70,7 +101,7 @@ def processar_todas_imagens():
     # LISTA AS IMAGENS DA PASTA
     imagens = [
         f for f in os.listdir(IMAGES_DIR)
-        if f.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp', '.tiff'))
+        if f.lower().endswith(EXTENSOES_IMAGEM)
     ]
 
     if not imagens:
@@ -116,18 +147,8 @@ def processar_todas_imagens():
                     if veiculo_crop.size == 0:
                         continue
 
-                    veiculo_gray = cv2.cvtColor(veiculo_crop, cv2.COLOR_BGR2GRAY)
-                    plates = plate_cascade.detectMultiScale(veiculo_gray, 1.1, 4)
-
                     # ROI DA PLACA
-                    if len(plates) > 0:
-                        px, py, pw, ph = max(plates, key=lambda b: b[2] * b[3])
-                        mx, my = int(pw * 0.1), int(ph * 0.1)
-                        roi = veiculo_crop[max(0, py-my):py+ph+my, max(0, px-mx):px+pw+mx]
-                    else:
-                        # FALLBACK
-                        h, w = veiculo_crop.shape[:2]
-                        roi = veiculo_crop[int(h*0.60):, int(w*0.15):int(w*0.85)]
+                    roi = localizar_roi_placa(veiculo_crop, plate_cascade)
 
                     if roi is None or roi.size == 0:
                         continue
@@ -138,7 +159,7 @@ def processar_todas_imagens():
                         textos = reader.readtext(
                             img_proc,
                             detail=0,
-                            allowlist="ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+                            allowlist=ALLOWLIST_PLACA
                         )
                         for txt in textos:
                             limpo = limpar_texto(txt)
@@ -168,6 +189,190 @@ def processar_todas_imagens():
     print("=" * 105)
     print("🏁 PROCESSAMENTO DE IMAGENS FINALIZADO.")
 
+# MODO LOTE: PASTAS RECURSIVAS, DECODIFICAÇÃO EM THREADS, YOLO/OCR EM LOTE
+def listar_imagens_recursivo(pasta):
+    """Todas as imagens da pasta e subpastas, em ordem estável."""
+    caminhos = []
+    for raiz, subpastas, arquivos in os.walk(pasta):
+        subpastas.sort()
+        for nome in sorted(arquivos):
+            if nome.lower().endswith(EXTENSOES_IMAGEM):
+                caminhos.append(os.path.join(raiz, nome))
+    return caminhos
+
+def decodificar_imagem(caminho):
+    """Roda nas threads: lê a imagem e prepara a entrada do YOLO. Devolve (frame, entrada, escala)."""
+    frame = cv2.imread(caminho)
+    if frame is None:
+        return None, None, 1.0
+    escala = 640 / max(frame.shape[:2])
+    frame_input = cv2.resize(frame, None, fx=escala, fy=escala) if escala < 1 else frame
+    return frame, frame_input, escala
+
+def agrupar_por_tamanho(imagens):
+    """
+    Índices agrupados pelo shape da imagem. Lotes mistos mudariam a entrada:
+    o YOLO preencheria todas até 640x640 e o readtext_batched exigiria redimensionar.
+    """
+    grupos = {}
+    for i, img in enumerate(imagens):
+        grupos.setdefault(img.shape, []).append(i)
+    return list(grupos.values())
+
+def ler_textos(reader, rois):
+    """OCR das ROIs em lotes de mesmo tamanho (ROI sozinha no tamanho: readtext, como no modo normal)."""
+    textos_por_roi = [[] for _ in rois]
+    for grupo in agrupar_por_tamanho(rois):
+        try:
+            if len(grupo) == 1:
+                textos_por_roi[grupo[0]] = reader.readtext(rois[grupo[0]], detail=0, allowlist=ALLOWLIST_PLACA)
+                continue
+            textos = reader.readtext_batched([rois[j] for j in grupo], detail=0, allowlist=ALLOWLIST_PLACA,
+                                             batch_size=len(grupo))
+        except Exception as e:
+            print(f"⚠️ Falha no OCR em lote: {e}")
+            continue
+        for j, t in zip(grupo, textos):
+            textos_por_roi[j] = t
+    return textos_por_roi
+
+def ler_lote(decodificados, yolo_model, reader, plate_cascade):
+    """Leituras válidas de cada imagem do lote (lista de listas, mesma ordem)."""
+    leituras = [[] for _ in decodificados]
+    validos = [i for i, (frame, _, _) in enumerate(decodificados) if frame is not None]
+    if not validos:
+        return leituras
+
+    # Uma chamada do YOLO por tamanho de imagem (mesmo preenchimento do modo normal)
+    entradas = [decodificados[i][1] for i in validos]
+    resultados = [None] * len(validos)
+    for grupo in agrupar_por_tamanho(entradas):
+        for j, r in zip(grupo, yolo_model([entradas[j] for j in grupo], verbose=False)):
+            resultados[j] = r
+
+    rois, donos = [], []
+    for i, r in zip(validos, resultados):
+        frame, _, escala = decodificados[i]
+        for box in r.boxes:
+            if int(box.cls[0]) in [2, 3, 5, 7] and box.conf[0] > 0.40:
+                x1, y1, x2, y2 = map(int, box.xyxy[0])
+                if escala < 1:
+                    x1, x2 = int(x1 / escala), int(x2 / escala)
+                    y1, y2 = int(y1 / escala), int(y2 / escala)
+
+                veiculo_crop = frame[y1:y2, x1:x2]
+                if veiculo_crop.size == 0:
+                    continue
+                roi = localizar_roi_placa(veiculo_crop, plate_cascade)
+                if roi is None or roi.size == 0:
+                    continue
+                rois.append(preprocessamento_rapido(roi))
+                donos.append(i)
+
+    if not rois:
+        return leituras
+
+    for i, textos in zip(donos, ler_textos(reader, rois)):
+        for txt in textos:
+            limpo = limpar_texto(txt)
+            if validar_padrao_placa(limpo):
+                leituras[i].append(limpo)
+    return leituras
+
+def salvar_resultados(linhas, destino):
+    """Grava o resumo por imagem em CSV ou JSON (pela extensão do destino)."""
+    os.makedirs(os.path.dirname(os.path.abspath(destino)), exist_ok=True)
+    if destino.lower().endswith('.json'):
+        with open(destino, 'w', encoding='utf-8') as f:
+            json.dump(linhas, f, ensure_ascii=False, indent=2)
+    else:
+        with open(destino, 'w', newline='', encoding='utf-8') as f:
+            escritor = csv.DictWriter(f, fieldnames=['arquivo', 'status', 'placa', 'placa_gravada', 'votos', 'data_hora'])
+            escritor.writeheader()
+            escritor.writerows(linhas)
+
+def processar_imagens_em_lote(pasta=IMAGES_DIR, destino=None, tamanho_lote=TAMANHO_LOTE_IMAGENS):
+    print(f"--- SISTEMA DE DETECÇÃO: PROCESSAMENTO DE IMAGENS (MODO LOTE) ---")
+
+    orcamento = configurar_runtime()
+    baixar_cascade_silencioso()
+
+    if not os.path.exists(pasta):
+        print(f"❌ ERRO: Pasta não encontrada: {pasta}")
+        return
+
+    caminhos = listar_imagens_recursivo(pasta)
+    if not caminhos:
+        print("Nenhuma imagem encontrada.")
+        return
+
+    if destino is None:
+        destino = os.path.join(SAIDA_DIR, f"resultados_imagens_{datetime.now():%Y%m%d_%H%M%S}.csv")
+
+    yolo_model = YOLO('yolov8n.pt')
+    reader = easyocr.Reader(['pt', 'en'], gpu=False, verbose=False)
+    plate_cascade = cv2.CascadeClassifier(XML_PATH)
+
+    lotes = [caminhos[i:i + tamanho_lote] for i in range(0, len(caminhos), tamanho_lote)]
+    linhas = []
+
+    imprimir_cabecalho_tabela()
+
+    # Com workers = 0 (1-2 núcleos) ainda há um único thread de leitura para o prefetch
+    with ThreadPoolExecutor(max_workers=max(1, orcamento['workers'])) as pool:
+        # O lote seguinte é decodificado enquanto o atual passa pelo YOLO/OCR
+        pendente = [pool.submit(decodificar_imagem, c) for c in lotes[0]]
+        for n, lote in enumerate(lotes):
+            decodificados = [f.result() for f in pendente]
+            if n + 1 < len(lotes):
+                pendente = [pool.submit(decodificar_imagem, c) for c in lotes[n + 1]]
+
+            leituras = ler_lote(decodificados, yolo_model, reader, plate_cascade)
+
+            linhas_lote, confirmadas = [], []
+            for caminho, (frame, _, _), votos in zip(lote, decodificados, leituras):
+                nome_img = os.path.relpath(caminho, pasta)
+                linha = {'arquivo': nome_img, 'status': 'NÃO ENC.', 'placa': '', 'placa_gravada': '',
+                         'votos': 0, 'data_hora': ''}
+                if frame is None:
+                    linha['status'] = 'ERRO'
+                    imprimir_linha_tabela("ERRO", "---", "---", "---", nome_img)
+                elif votos:
+                    placa_final, freq = Counter(votos).most_common(1)[0]
+                    agora = datetime.now()
+                    linha.update(status='DETECTADA', placa=placa_final, votos=freq, data_hora=str(agora))
+                    imprimir_linha_tabela("DETECTADA", placa_final, agora.strftime("%d/%m/%Y"),
+                                          agora.strftime("%H:%M:%S"), nome_img)
+                    confirmadas.append(linha)
+                else:
+                    imprimir_linha_tabela("NÃO ENC.", "---", "---", "---", nome_img)
+                linhas_lote.append(linha)
+
+            # Todas as placas do lote em UMA transação
+            if confirmadas:
+                gravadas = registrar_leituras_em_lote(
+                    [(l['placa'], l['data_hora'], l['arquivo']) for l in confirmadas])
+                for linha, gravada in zip(confirmadas, gravadas):
+                    linha['placa_gravada'] = gravada or ''
+            linhas.extend(linhas_lote)
+
+    salvar_resultados(linhas, destino)
+
+    print("=" * 105)
+    print(f"📄 Resultados: {destino}")
+    print("🏁 PROCESSAMENTO DE IMAGENS FINALIZADO.")
+
 # EXECUÇÃO DIRETA
 if __name__ == "__main__":
-    processar_todas_imagens()
+    parser = argparse.ArgumentParser(description="Processamento de imagens estáticas.")
+    parser.add_argument("--lote", action="store_true",
+                        help="Percorre subpastas e processa em lotes (YOLO/OCR em lote, uma transação por lote)")
+    parser.add_argument("--pasta", default=IMAGES_DIR, help="Pasta de imagens (modo lote)")
+    parser.add_argument("--saida", default=None, help="Arquivo de resultados .csv ou .json (modo lote)")
+    parser.add_argument("--tamanho-lote", type=int, default=TAMANHO_LOTE_IMAGENS, help="Imagens por lote")
+    args = parser.parse_args()
+
+    if args.lote:
+        processar_imagens_em_lote(args.pasta, args.saida, max(1, args.tamanho_lote))
+    else:
+        processar_todas_imagens()
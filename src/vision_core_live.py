@@ -0,0 +1,218 @@
+# vision_core_live.py
+# Modo ao vivo: processa uma câmera (RTSP/HTTP, dispositivo V4L2) ou um
+# arquivo reproduzido na velocidade nativa como substituto local.
+# Uma thread de captura guarda sempre o frame MAIS RECENTE; se a inferência
+# atrasar, os frames antigos são descartados em vez de enfileirados.
+# A latência fim a fim (captura -> decisão) é medida contra LATENCIA_ALVO.
+import os
+import sys
+import time
+import argparse
+import threading
+from collections import deque
+from datetime import datetime
+import cv2
+from config_runtime import configurar_runtime
+from backend import registrar_leitura, adicionar_ouvinte_alerta, remover_ouvinte_alerta, estatisticas_debounce
+from evidencias import GravadorEvidencias
+import vision_core_videos_multiplos_veiculos as nucleo
+from regiao_interesse import RegiaoInteresse, preparar_entrada, caixas_na_regiao
+
+# Latência fim a fim desejada (segundos)
+LATENCIA_ALVO = 1.0
+# Leituras mais antigas que isso saem da votação (o carro já passou)
+JANELA_LEITURAS = 5.0
+# Intervalo mínimo para reenviar a mesma placa ao backend
+INTERVALO_REPETICAO = 60.0
+# Intervalo entre relatórios de desempenho no console
+INTERVALO_RELATORIO = 10.0
+# Tentativas de reconexão para fontes de rede
+ESPERA_RECONEXAO = 2.0
+
+
+def abrir_captura(fonte):
+    """Aceita URL, índice de dispositivo ('0'), caminho /dev/videoN ou arquivo."""
+    if fonte.isdigit():
+        return cv2.VideoCapture(int(fonte), cv2.CAP_V4L2 if sys.platform.startswith('linux') else cv2.CAP_ANY)
+    if fonte.startswith('/dev/video'):
+        return cv2.VideoCapture(fonte, cv2.CAP_V4L2)
+    cap = cv2.VideoCapture(fonte)
+    # Menor buffer interno possível: queremos o frame mais novo, não a fila
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+class CapturaAoVivo:
+    """Thread que lê a fonte continuamente e mantém só o último frame."""
+
+    def __init__(self, fonte, replay=False):
+        self.fonte = fonte
+        self.replay = replay
+        self.eh_rede = '://' in fonte
+        self.cap = abrir_captura(fonte)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+
+        self._condicao = threading.Condition()
+        self._frame = None
+        self._capturado_em = 0.0
+        self._numero = 0
+        self._entregue = 0
+        self.descartados = 0
+        self.ativo = True
+        self._thread = threading.Thread(target=self._laco, daemon=True)
+
+    def iniciar(self):
+        self._thread.start()
+        return self
+
+    def _laco(self):
+        inicio = time.monotonic()
+        lidos = 0
+        while self.ativo:
+            ret, frame = self.cap.read()
+            if not ret:
+                if self.eh_rede:
+                    # Câmera de rede caiu: tenta reconectar
+                    time.sleep(ESPERA_RECONEXAO)
+                    self.cap.release()
+                    self.cap = abrir_captura(self.fonte)
+                    continue
+                break
+
+            lidos += 1
+            if self.replay:
+                # Arquivo como substituto da câmera: respeita o tempo real
+                atraso = inicio + lidos / self.fps - time.monotonic()
+                if atraso > 0:
+                    time.sleep(atraso)
+
+            with self._condicao:
+                if self._frame is not None and self._numero != self._entregue:
+                    # O frame anterior nunca foi processado: descartado
+                    self.descartados += 1
+                self._frame = frame
+                self._capturado_em = time.monotonic()
+                self._numero = lidos
+                self._condicao.notify()
+
+        with self._condicao:
+            self.ativo = False
+            self._condicao.notify_all()
+
+    def ultimo_frame(self, timeout=1.0):
+        """Espera um frame ainda não entregue; devolve (numero, frame, capturado_em) ou None."""
+        with self._condicao:
+            self._condicao.wait_for(lambda: self._numero != self._entregue or not self.ativo, timeout=timeout)
+            if self._numero == self._entregue:
+                return None
+            self._entregue = self._numero
+            return self._numero, self._frame, self._capturado_em
+
+    def parar(self):
+        self.ativo = False
+        self._thread.join(timeout=2)
+        self.cap.release()
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def processar_ao_vivo(fonte, replay=False, latencia_alvo=LATENCIA_ALVO, regiao=None):
+    print(f"--- SISTEMA DE DETECÇÃO: MODO AO VIVO ({fonte}) ---")
+
+    configurar_runtime()
+    yolo_model, reader = nucleo.carregar_modelos()
+
+    captura = CapturaAoVivo(fonte, replay=replay).iniciar()
+    nome_origem = os.path.basename(fonte) if os.path.exists(fonte) else fonte
+
+    # Pré-evento em memória; clipe/recorte gravados em outra thread se houver alerta
+    evidencias = GravadorEvidencias(nome_origem)
+    adicionar_ouvinte_alerta(evidencias.ao_alerta)
+
+    # Só os melhores recortes de cada veículo vão ao OCR
+    seletor = nucleo.criar_seletor()
+    leituras = deque()              # (instante, placa)
+    ultimo_envio = {}               # placa -> instante do último envio
+    latencias = deque(maxlen=500)
+    processados = 0
+    fora_roi = 0
+    inicio = ultimo_relatorio = time.monotonic()
+
+    nucleo.imprimir_cabecalho_tabela()
+
+    try:
+        while True:
+            item = captura.ultimo_frame()
+            if item is None:
+                if not captura.ativo: break
+                continue
+            numero, frame, capturado_em = item
+            evidencias.empurrar(frame, capturado_em)
+
+            # Com ROI, o YOLO vê só o retângulo da portaria
+            frame_input, scale, origem = preparar_entrada(frame, nucleo.TAMANHO_YOLO, regiao)
+
+            caixas, descartadas = caixas_na_regiao(
+                nucleo.extrair_veiculos(yolo_model(frame_input, verbose=False), scale), origem, regiao)
+            fora_roi += descartadas
+            agora_mono = time.monotonic()
+            for placa in nucleo.ler_placas_frame(reader, frame, caixas, seletor, evidencias.associar):
+                leituras.append((agora_mono, placa))
+
+            # Votação só com as leituras recentes
+            while leituras and agora_mono - leituras[0][0] > JANELA_LEITURAS:
+                leituras.popleft()
+            placa_vencedora, restantes = nucleo.decidir_placa([p for _, p in leituras])
+            if not restantes:
+                leituras.clear()
+
+            if placa_vencedora and agora_mono - ultimo_envio.get(placa_vencedora, -INTERVALO_REPETICAO) >= INTERVALO_REPETICAO:
+                ultimo_envio[placa_vencedora] = agora_mono
+                agora = datetime.now()
+                tempo_stream = nucleo.formatar_tempo_video(agora_mono - inicio, 1)
+                nucleo.imprimir_linha_tabela("DETECTADA", placa_vencedora, agora.strftime("%d/%m/%Y"),
+                                             agora.strftime("%H:%M:%S"), tempo_stream, nome_origem)
+                # Envia na hora, sem esperar o fim de um lote
+                registrar_leitura(placa_vencedora, agora, tempo_stream, nome_origem)
+
+            latencia = time.monotonic() - capturado_em
+            latencias.append(latencia)
+            processados += 1
+            if latencia > latencia_alvo * 2:
+                print(f"⏱️ Latência {latencia:.2f}s acima do alvo ({latencia_alvo:.2f}s) no frame {numero}")
+
+            if time.monotonic() - ultimo_relatorio >= INTERVALO_RELATORIO:
+                decorrido = time.monotonic() - ultimo_relatorio
+                p50, p95 = percentil(latencias, 0.50), percentil(latencias, 0.95)
+                estado = "OK" if p95 <= latencia_alvo else "ACIMA DO ALVO"
+                print(f"📊 {processados / decorrido:.1f} fps processados | descartados: {captura.descartados} "
+                      f"| fora da ROI: {fora_roi} | debounce: {estatisticas_debounce()['descartadas']} "
+                      f"| OCR poupado: {seletor.economia():.0%} "
+                      f"| latência p50 {p50*1000:.0f} ms / p95 {p95*1000:.0f} ms (alvo {latencia_alvo*1000:.0f} ms) {estado}")
+                processados = 0
+                ultimo_relatorio = time.monotonic()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        captura.parar()
+        remover_ouvinte_alerta(evidencias.ao_alerta)
+        evidencias.fechar()
+
+    print("="*105)
+    print("🏁 MODO AO VIVO ENCERRADO.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconhecimento de placas em tempo real.")
+    parser.add_argument("fonte", help="URL rtsp:// ou http://, índice/caminho V4L2 (0, /dev/video0) ou arquivo de vídeo")
+    parser.add_argument("--replay", action="store_true", help="Reproduz o arquivo na velocidade nativa (simula câmera)")
+    parser.add_argument("--latencia-alvo", type=float, default=LATENCIA_ALVO, help="Latência alvo em segundos")
+    parser.add_argument("--roi", default=None, help="Polígono da portaria em pixels: 'x1,y1 x2,y2 x3,y3 ...'")
+    args = parser.parse_args()
+    regiao = RegiaoInteresse.de_texto(args.roi) if args.roi else None
+    processar_ao_vivo(args.fonte, replay=args.replay, latencia_alvo=args.latencia_alvo, regiao=regiao)
@@ -0,0 +1,188 @@
+# vision_core_multicameras.py
+# Várias câmeras em um único processo, compartilhando o mesmo YOLO e o mesmo
+# EasyOCR. A cada ciclo o escalonador escolhe as câmeras com frame novo
+# (priorizando prazos vencidos, depois prioridade x tempo de espera) e manda
+# os frames de câmeras diferentes na MESMA chamada do YOLO.
+import os
+import json
+import time
+import argparse
+from collections import deque
+from datetime import datetime
+from config_runtime import configurar_runtime
+from backend import registrar_leitura
+from vision_core_live import CapturaAoVivo, percentil, JANELA_LEITURAS, INTERVALO_REPETICAO
+from regiao_interesse import RegiaoInteresse, preparar_entrada, caixas_na_regiao
+import vision_core_videos_multiplos_veiculos as nucleo
+
+# Arquivo de configuração das câmeras (lista de objetos JSON):
+# [{"nome": "portaria-1", "fonte": "rtsp://...", "prioridade": 2, "prazo": 1.0,
+#   "roi": [[200, 300], [1700, 300], [1900, 1080], [0, 1080]]}]
+# "roi" (opcional) é o polígono da portaria em pixels do frame cheio.
+CONFIG_CAMERAS = os.path.join(nucleo.BASE_DIR, 'cameras.json')
+
+# Máximo de frames (de câmeras diferentes) por chamada do YOLO
+TAMANHO_LOTE = 4
+# Prazo padrão (segundos) entre captura e decisão
+PRAZO_PADRAO = 1.0
+INTERVALO_RELATORIO = 10.0
+
+
+class Camera:
+    """Estado de uma câmera: captura, votação e estatísticas próprias."""
+
+    def __init__(self, nome, fonte, prioridade=1, prazo=PRAZO_PADRAO, replay=False, roi=None):
+        self.nome = nome
+        self.fonte = fonte
+        self.prioridade = max(1, prioridade)
+        self.prazo = prazo
+        self.regiao = RegiaoInteresse(roi) if roi else None
+        self.captura = CapturaAoVivo(fonte, replay=replay)
+
+        self.leituras = deque()
+        self.seletor = nucleo.criar_seletor()
+        self.ultimo_envio = {}
+        self.ultimo_atendimento = time.monotonic()
+        self.pendente = None   # (numero, frame, capturado_em) aguardando o lote
+
+        # Estatísticas
+        self.processados = 0
+        self.prazos_perdidos = 0
+        # Frames substituídos antes de entrar num lote. Contador só do escalonador:
+        # captura.descartados é da thread de captura (atualizado sob a trava dela)
+        self.descartados_lote = 0
+        self.confirmadas = 0
+        self.fora_roi = 0
+        self.latencias = deque(maxlen=300)
+
+    def urgencia(self, agora):
+        """Maior = atender antes. Prazo vencido tem precedência absoluta."""
+        _, _, capturado_em = self.pendente
+        folga = capturado_em + self.prazo - agora
+        espera = agora - self.ultimo_atendimento
+        return (folga <= 0, espera * self.prioridade)
+
+
+def carregar_cameras(caminho=CONFIG_CAMERAS):
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def escolher_lote(cameras, agora):
+    prontas = [c for c in cameras if c.pendente is not None]
+    prontas.sort(key=lambda c: c.urgencia(agora), reverse=True)
+    return prontas[:TAMANHO_LOTE]
+
+
+def processar_resultado(camera, frame, scale, origem, resultado, reader, inicio):
+    # Caixas voltam para o frame inteiro; fora do polígono não vão ao OCR
+    caixas, descartadas = caixas_na_regiao(nucleo.extrair_veiculos([resultado], scale), origem, camera.regiao)
+    camera.fora_roi += descartadas
+    agora_mono = time.monotonic()
+    for placa in nucleo.ler_placas_frame(reader, frame, caixas, camera.seletor):
+        camera.leituras.append((agora_mono, placa))
+
+    while camera.leituras and agora_mono - camera.leituras[0][0] > JANELA_LEITURAS:
+        camera.leituras.popleft()
+    placa_vencedora, restantes = nucleo.decidir_placa([p for _, p in camera.leituras])
+    if not restantes:
+        camera.leituras.clear()
+
+    if placa_vencedora and agora_mono - camera.ultimo_envio.get(placa_vencedora, -INTERVALO_REPETICAO) >= INTERVALO_REPETICAO:
+        camera.ultimo_envio[placa_vencedora] = agora_mono
+        camera.confirmadas += 1
+        agora = datetime.now()
+        tempo_stream = nucleo.formatar_tempo_video(agora_mono - inicio, 1)
+        nucleo.imprimir_linha_tabela("DETECTADA", placa_vencedora, agora.strftime("%d/%m/%Y"),
+                                     agora.strftime("%H:%M:%S"), tempo_stream, camera.nome)
+        registrar_leitura(placa_vencedora, agora, tempo_stream, camera.nome)
+
+
+def imprimir_estatisticas(cameras, decorrido):
+    print(f"{'CÂMERA':<20} | {'FPS':<6} | {'DESCART.':<8} | {'PRAZO PERD.':<11} | {'P95 (ms)':<8} | {'FORA ROI':<8} | "
+          f"{'OCR POUP.':<9} | {'CONFIRM.'}")
+    for c in cameras:
+        print(f"{c.nome:<20} | {c.processados / decorrido:<6.1f} | {c.captura.descartados + c.descartados_lote:<8} | "
+              f"{c.prazos_perdidos:<11} | {percentil(c.latencias, 0.95)*1000:<8.0f} | {c.fora_roi:<8} | "
+              f"{c.seletor.economia():<9.0%} | {c.confirmadas}")
+        c.processados = 0
+
+
+def processar_cameras(configs):
+    print(f"--- SISTEMA DE DETECÇÃO: {len(configs)} CÂMERAS / UM PROCESSO ---")
+
+    configurar_runtime(cameras=1)
+    # Um único detector e um único leitor para todas as câmeras
+    yolo_model, reader = nucleo.carregar_modelos()
+
+    cameras = [Camera(**cfg) for cfg in configs]
+    for c in cameras: c.captura.iniciar()
+
+    inicio = ultimo_relatorio = time.monotonic()
+    nucleo.imprimir_cabecalho_tabela()
+
+    try:
+        while any(c.captura.ativo or c.pendente is not None for c in cameras):
+            # Recolhe (sem esperar) o frame mais novo de cada câmera
+            for c in cameras:
+                item = c.captura.ultimo_frame(timeout=0)
+                if item is not None:
+                    if c.pendente is not None:
+                        c.descartados_lote += 1
+                    c.pendente = item
+
+            agora = time.monotonic()
+            lote = escolher_lote(cameras, agora)
+            if not lote:
+                time.sleep(0.005)
+                continue
+
+            frames, escalas, origens, itens = [], [], [], []
+            for c in lote:
+                item, c.pendente = c.pendente, None
+                _, frame, _ = item
+                # Só o retângulo da ROI (se configurada) vai para o YOLO
+                frame_input, scale, origem = preparar_entrada(frame, nucleo.TAMANHO_YOLO, c.regiao)
+                frames.append(frame_input)
+                escalas.append(scale)
+                origens.append(origem)
+                itens.append(item)
+
+            # UMA chamada do YOLO para frames de câmeras diferentes
+            resultados = yolo_model(frames, verbose=False)
+
+            for c, item, scale, origem, resultado in zip(lote, itens, escalas, origens, resultados):
+                _, frame, capturado_em = item
+                processar_resultado(c, frame, scale, origem, resultado, reader, inicio)
+
+                latencia = time.monotonic() - capturado_em
+                c.latencias.append(latencia)
+                c.processados += 1
+                c.ultimo_atendimento = time.monotonic()
+                if latencia > c.prazo:
+                    c.prazos_perdidos += 1
+
+            if time.monotonic() - ultimo_relatorio >= INTERVALO_RELATORIO:
+                imprimir_estatisticas(cameras, time.monotonic() - ultimo_relatorio)
+                ultimo_relatorio = time.monotonic()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for c in cameras: c.captura.parar()
+
+    print("="*105)
+    print("🏁 MULTICÂMERAS ENCERRADO.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Várias câmeras com modelos compartilhados.")
+    parser.add_argument("fontes", nargs="*", help="Fontes (URL, dispositivo ou arquivo). Se omitido, lê cameras.json")
+    parser.add_argument("--config", default=CONFIG_CAMERAS, help="Arquivo JSON com as câmeras")
+    parser.add_argument("--replay", action="store_true", help="Reproduz arquivos na velocidade nativa")
+    args = parser.parse_args()
+
+    if args.fontes:
+        configs = [{'nome': f"cam-{i+1}", 'fonte': f, 'replay': args.replay} for i, f in enumerate(args.fontes)]
+    else:
+        configs = carregar_cameras(args.config)
+    processar_cameras(configs)
@@ -6,9 +6,14 @@ import re
 import os
 import urllib.request
 import time
+import argparse
 from datetime import datetime
 from collections import Counter
 from backend import registrar_leitura
+from config_runtime import configurar_runtime
+from fonte_frames import abrir_fonte
+from qualidade_roi import SeletorQualidade
+from regiao_interesse import RegiaoInteresse, preparar_entrada
 
 HAAR_FILENAME = 'haarcascade_russian_plate_number.xml'
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -19,6 +24,10 @@ XML_PATH = os.path.join(BASE_DIR, HAAR_FILENAME)
 PULAR_FRAMES = 3           
 AMOSTRAS_PARA_CONFIRMAR = 5 
 TAMANHO_YOLO = 640         
+CONFIANCA_MINIMA = 0.4
+# SELEÇÃO POR QUALIDADE: A CADA 4 RECORTES DE UM VEÍCULO, SÓ OS 2 MELHORES VÃO AO OCR
+JANELA_QUALIDADE = 4
+TOP_K_QUALIDADE = 2
 
 def baixar_cascade_silencioso():
     if not os.path.exists(XML_PATH):
@@ -46,6 +55,25 @@ def preprocessamento_rapido(img_crop):
     contraste = clahe.apply(gray)
     return contraste
 
+def ler_placas(reader, roi_placa, leituras):
+    img_proc = preprocessamento_rapido(roi_placa)
+    try:
+        res = reader.readtext(img_proc, detail=0, allowlist='ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
+        for txt in res:
+            limpo = limpar_texto(txt)
+            if validar_padrao_placa(limpo):
+                leituras.append(limpo)
+    except: pass
+
+def votar(leituras):
+    """Placa vencedora (3 ou mais votos em AMOSTRAS_PARA_CONFIRMAR leituras) ou None."""
+    if len(leituras) >= AMOSTRAS_PARA_CONFIRMAR:
+        placa_vencedora, frequencia = Counter(leituras).most_common(1)[0]
+        # SE TEMOS UM VENCEDOR CLARO (3 OU MAIS)
+        if frequencia >= 3:
+            return placa_vencedora
+    return None
+
 def imprimir_cabecalho_tabela():
     print("\n" + "="*105)
     print(f"{'STATUS':<15} | {'PLACA':<10} | {'DATA':<12} | {'HORA':<10} | {'TEMPO VÍDEO':<12} | {'ARQUIVO'}")
@@ -56,16 +84,111 @@ def imprimir_linha_tabela(status, placa, data, hora, tempo_vid, arquivo):
     cor_status = "✅" if status == "DETECTADA" else "⚠️"
     print(f"{cor_status} {status:<12} | {placa:<10} | {data:<12} | {hora:<10} | {tempo_vid:<12} | {arquivo}")
 
-def processar_todos_videos():
-    print(f"--- SISTEMA DE DETECÇÃO: PROCESSAMENTO SOBRE VÍDEOS (EM LOTE) ---")
-    
+def carregar_cascade():
     baixar_cascade_silencioso()
     original_cwd = os.getcwd()
     try:
         os.chdir(BASE_DIR)
-        plate_cascade = cv2.CascadeClassifier(HAAR_FILENAME)
+        return cv2.CascadeClassifier(HAAR_FILENAME)
+    except: return None
+    finally:
         os.chdir(original_cwd)
-    except: return
+
+def carregar_modelos():
+    yolo_model = YOLO('yolov8n.pt') 
+    reader = easyocr.Reader(['pt', 'en'], gpu=False, verbose=False) 
+    return yolo_model, reader
+
+def processar_video(caminho_video, yolo_model, reader, plate_cascade, regiao=None):
+    """
+    DEVOLVE (PLACA CONFIRMADA OU None, FRAME DA CONFIRMAÇÃO, FPS). NÃO GRAVA NADA NO BANCO.
+    COM `regiao` (RegiaoInteresse), O YOLO VÊ SÓ A PORTARIA E VEÍCULOS FORA DO POLÍGONO SÃO IGNORADOS.
+    """
+    # OTIMIZAÇÃO: A FONTE JÁ ENTREGA 1 A CADA PULAR_FRAMES, REDUZIDO PARA O YOLO
+    fonte = abrir_fonte(caminho_video, PULAR_FRAMES, TAMANHO_YOLO)
+    fps = fonte.fps
+
+    leituras_do_video = []
+    placa_vencedora = None # PREENCHIDA QUANDO ENCONTRAMOS A PLACA DESSE VÍDEO
+    seletor = SeletorQualidade(JANELA_QUALIDADE, TOP_K_QUALIDADE)
+    frame_count = 0
+
+    for frame_count, frame_input, scale in fonte:
+        ox, oy = 0, 0
+        if regiao is not None:
+            # COM ROI, O RETÂNGULO DA PORTARIA SAI DO FRAME HD (MAIS PIXELS POR PLACA)
+            frame_hd = fonte.ler_frame_hd(frame_count)
+            if frame_hd is not None:
+                frame_input, scale, (ox, oy) = preparar_entrada(frame_hd, TAMANHO_YOLO, regiao)
+
+        resultados = yolo_model(frame_input, verbose=False)
+        frame = None
+        candidatos = [] # (CAIXA, ROI, ACHADA PELO HAAR?)
+        
+        for r in resultados:
+            for box in r.boxes:
+                if int(box.cls[0]) in [2, 3, 5, 7] and box.conf[0] > CONFIANCA_MINIMA:
+                    # FRAME HD SÓ É BUSCADO QUANDO HÁ VEÍCULO
+                    if frame is None:
+                        frame = fonte.ler_frame_hd(frame_count)
+                        if frame is None: break
+
+                    x1, y1, x2, y2 = map(int, box.xyxy[0])
+                    
+                    # MAPEIA COORDENADAS DE VOLTA PARA HD
+                    if scale < 1:
+                        x1, x2 = int(x1/scale), int(x2/scale)
+                        y1, y2 = int(y1/scale), int(y2/scale)
+                    x1, x2, y1, y2 = x1 + ox, x2 + ox, y1 + oy, y2 + oy
+
+                    # CENTRO DO VEÍCULO FORA DA PORTARIA: NÃO VAI AO OCR
+                    if regiao is not None and not regiao.contem_centro((x1, y1, x2, y2)): continue
+                    
+                    veiculo_crop = frame[y1:y2, x1:x2]
+                    if veiculo_crop.size == 0: continue
+                    
+                    # HAAR CASCADE
+                    veiculo_gray = cv2.cvtColor(veiculo_crop, cv2.COLOR_BGR2GRAY)
+                    plates = plate_cascade.detectMultiScale(veiculo_gray, 1.1, 4)
+                    
+                    roi_placa = None
+                    if len(plates) > 0:
+                        px, py, pw, ph = max(plates, key=lambda b: b[2] * b[3])
+                        mx, my = int(pw*0.1), int(ph*0.1) # Margem
+                        roi_placa = veiculo_crop[max(0, py-my):py+ph+my, max(0, px-mx):px+pw+mx]
+                    else:
+                        # FALLBACK
+                        h, w = veiculo_crop.shape[:2]
+                        roi_placa = veiculo_crop[int(h*0.60):, int(w*0.15):int(w*0.85)]
+
+                    candidatos.append(((x1, y1, x2, y2), roi_placa, len(plates) > 0))
+
+        # SÓ OS MELHORES RECORTES DE CADA VEÍCULO NA JANELA VÃO AO OCR
+        for roi_placa in seletor.adicionar(candidatos):
+            ler_placas(reader, roi_placa, leituras_do_video)
+
+        # --- VOTAÇÃO E DECISÃO ---
+        placa_vencedora = votar(leituras_do_video)
+        if placa_vencedora:
+            break # SAI DO LOOP DESTE VÍDEO
+
+    # JANELAS INCOMPLETAS DO FIM DO VÍDEO AINDA VÃO AO OCR
+    if not placa_vencedora:
+        for roi_placa in seletor.esvaziar():
+            ler_placas(reader, roi_placa, leituras_do_video)
+        placa_vencedora = votar(leituras_do_video)
+
+    fonte.fechar()
+    return placa_vencedora, frame_count, fps
+
+def processar_todos_videos(regiao=None):
+    print(f"--- SISTEMA DE DETECÇÃO: PROCESSAMENTO SOBRE VÍDEOS (EM LOTE) ---")
+    
+    # DIVIDE OS NÚCLEOS ENTRE TORCH, OPENCV E WORKERS
+    configurar_runtime()
+
+    plate_cascade = carregar_cascade()
+    if plate_cascade is None: return
 
     if not os.path.exists(VIDEOS_DIR):
         print(f"❌ ERRO: Pasta não encontrada: {VIDEOS_DIR}")
@@ -77,109 +200,37 @@ def processar_todos_videos():
         print("Nenhum vídeo encontrado.")
         return
 
-    yolo_model = YOLO('yolov8n.pt') 
-    reader = easyocr.Reader(['pt', 'en'], gpu=False, verbose=False) 
+    yolo_model, reader = carregar_modelos()
 
     # IMPRESSÃO DO CABEÇALHO DA TABELA:
     imprimir_cabecalho_tabela()
 
     for nome_video in arquivos_video:
         caminho_video = os.path.join(VIDEOS_DIR, nome_video)
-        cap = cv2.VideoCapture(caminho_video)
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        if fps == 0: fps = 30
-
-        leituras_do_video = []
-        frame_count = 0
-        video_resolvido = False # FLAG PARA SABER SE JÁ ENCONTRAMOS A PLACA DESSE VÍDEO
-
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret: break 
-            
-            frame_count += 1
-            if frame_count % PULAR_FRAMES != 0: continue
-
-            # OTIMIZAÇÃO YOLO
-            h_orig, w_orig = frame.shape[:2]
-            scale = TAMANHO_YOLO / max(h_orig, w_orig)
-            if scale < 1:
-                frame_input = cv2.resize(frame, None, fx=scale, fy=scale)
-            else:
-                frame_input = frame
-
-            resultados = yolo_model(frame_input, verbose=False)
-            
-            for r in resultados:
-                for box in r.boxes:
-                    if int(box.cls[0]) in [2, 3, 5, 7] and box.conf[0] > 0.4:
-                        x1, y1, x2, y2 = map(int, box.xyxy[0])
-                        
-                        # MAPEIA COORDENADAS DE VOLTA PARA HD
-                        if scale < 1:
-                            x1, x2 = int(x1/scale), int(x2/scale)
-                            y1, y2 = int(y1/scale), int(y2/scale)
-                        
-                        veiculo_crop = frame[y1:y2, x1:x2]
-                        if veiculo_crop.size == 0: continue
-                        
-                        # HAAR CASCADE
-                        veiculo_gray = cv2.cvtColor(veiculo_crop, cv2.COLOR_BGR2GRAY)
-                        plates = plate_cascade.detectMultiScale(veiculo_gray, 1.1, 4)
-                        
-                        roi_placa = None
-                        if len(plates) > 0:
-                            px, py, pw, ph = max(plates, key=lambda b: b[2] * b[3])
-                            mx, my = int(pw*0.1), int(ph*0.1) # Margem
-                            roi_placa = veiculo_crop[max(0, py-my):py+ph+my, max(0, px-mx):px+pw+mx]
-                        else:
-                            # FALLBACK
-                            h, w = veiculo_crop.shape[:2]
-                            roi_placa = veiculo_crop[int(h*0.60):, int(w*0.15):int(w*0.85)]
-
-                        if roi_placa is not None and roi_placa.size > 0:
-                            img_proc = preprocessamento_rapido(roi_placa)
-                            try:
-                                res = reader.readtext(img_proc, detail=0, allowlist='ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
-                                for txt in res:
-                                    limpo = limpar_texto(txt)
-                                    if validar_padrao_placa(limpo):
-                                        leituras_do_video.append(limpo)
-                            except: pass
-
-            # --- VOTAÇÃO E DECISÃO ---
-            if len(leituras_do_video) >= AMOSTRAS_PARA_CONFIRMAR:
-                contagem = Counter(leituras_do_video)
-                placa_vencedora, frequencia = contagem.most_common(1)[0]
-                
-                # SE TEMOS UM VENCEDOR CLARO (3 OU MAIS)
-                if frequencia >= 3:
-                    agora = datetime.now()
-                    
-                    # CALCULA TEMPO EXATO NO VÍDEO ONDE A PLACA FOI CONFIRMADA
-                    segundos_totais = int(frame_count / fps)
-                    tempo_video = f"{segundos_totais//60:02d}:{segundos_totais%60:02d}"
-                    
-                    # IMPRIME NA TABELA
-                    imprimir_linha_tabela(
-                        status="DETECTADA",
-                        placa=placa_vencedora,
-                        data=agora.strftime("%d/%m/%Y"),
-                        hora=agora.strftime("%H:%M:%S"),
-                        tempo_vid=tempo_video,
-                        arquivo=nome_video
-                    )
-                    
-                    # MANDA PARA O BANCO (RAIA 2)
-                    registrar_leitura(placa_vencedora, agora, tempo_video, nome_video)
-                    
-                    video_resolvido = True
-                    break # SAI DO LOOP DESTE VÍDEO
+        placa_vencedora, frame_count, fps = processar_video(caminho_video, yolo_model, reader, plate_cascade, regiao)
+
+        if placa_vencedora:
+            agora = datetime.now()
+
+            # CALCULA TEMPO EXATO NO VÍDEO ONDE A PLACA FOI CONFIRMADA
+            segundos_totais = int(frame_count / fps)
+            tempo_video = f"{segundos_totais//60:02d}:{segundos_totais%60:02d}"
+
+            # IMPRIME NA TABELA
+            imprimir_linha_tabela(
+                status="DETECTADA",
+                placa=placa_vencedora,
+                data=agora.strftime("%d/%m/%Y"),
+                hora=agora.strftime("%H:%M:%S"),
+                tempo_vid=tempo_video,
+                arquivo=nome_video
+            )
+
+            # MANDA PARA O BANCO (RAIA 2)
+            registrar_leitura(placa_vencedora, agora, tempo_video, nome_video)
 
-        cap.release()
-        
         # SE ACABOU O VÍDEO E NÃO CONFIRMAMOS NADA
-        if not video_resolvido:
+        else:
              imprimir_linha_tabela("NÃO ENC.", "---", "---", "---", "---", nome_video)
 
     print("="*105)
@@ -187,4 +238,8 @@ def processar_todos_videos():
 
 # EXECUÇÃO DIRETA
 if __name__ == "__main__":
-    processar_todos_videos()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Reconhecimento de placas em vídeos (em lote).")
+    parser.add_argument("--roi", default=None,
+                        help="Polígono da portaria em pixels, igual para todos os vídeos: 'x1,y1 x2,y2 x3,y3 ...'")
+    args = parser.parse_args()
+    processar_todos_videos(RegiaoInteresse.de_texto(args.roi) if args.roi else None)
\ No newline at end of file
@@ -9,6 +9,8 @@ import time
 from datetime import datetime
 from collections import Counter
 from backend import registrar_leitura
+from config_runtime import configurar_runtime
+from fonte_frames import abrir_fonte
 
 HAAR_FILENAME = 'haarcascade_russian_plate_number.xml'
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -59,6 +61,9 @@ def imprimir_linha_tabela(status, placa, data, hora, tempo_vid, arquivo):
 def processar_todos_videos():
     print(f"--- SISTEMA DE DETECÇÃO: PROCESSAMENTO SOBRE VÍDEOS AVULSOS (EM LOTE) ---")
     
+    # DIVIDE OS NÚCLEOS ENTRE TORCH, OPENCV E WORKERS
+    configurar_runtime()
+
     baixar_cascade_silencioso()
     original_cwd = os.getcwd()
     try:
@@ -85,34 +90,26 @@ def processar_todos_videos():
 
     for nome_video in arquivos_video:
         caminho_video = os.path.join(VIDEOS_DIR, nome_video)
-        cap = cv2.VideoCapture(caminho_video)
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        if fps == 0: fps = 30
+        # OTIMIZAÇÃO: A FONTE JÁ ENTREGA 1 A CADA PULAR_FRAMES, REDUZIDO PARA O YOLO
+        fonte = abrir_fonte(caminho_video, PULAR_FRAMES, TAMANHO_YOLO)
+        fps = fonte.fps
 
         leituras_do_video = []
-        frame_count = 0
         video_resolvido = False # FLAG PARA SABER SE JÁ ENCONTRAMOS A PLACA DESSE VÍDEO
 
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret: break 
-            
-            frame_count += 1
-            if frame_count % PULAR_FRAMES != 0: continue
-
-            # OTIMIZAÇÃO YOLO
-            h_orig, w_orig = frame.shape[:2]
-            scale = TAMANHO_YOLO / max(h_orig, w_orig)
-            if scale < 1:
-                frame_input = cv2.resize(frame, None, fx=scale, fy=scale)
-            else:
-                frame_input = frame
+        for frame_count, frame_input, scale in fonte:
 
             resultados = yolo_model(frame_input, verbose=False)
+            frame = None
             
             for r in resultados:
                 for box in r.boxes:
                     if int(box.cls[0]) in [2, 3, 5, 7] and box.conf[0] > 0.4:
+                        # FRAME HD SÓ É BUSCADO QUANDO HÁ VEÍCULO
+                        if frame is None:
+                            frame = fonte.ler_frame_hd(frame_count)
+                            if frame is None: break
+
                         x1, y1, x2, y2 = map(int, box.xyxy[0])
                         
                         # MAPEIA COORDENADAS DE VOLTA PARA HD
@@ -176,7 +173,7 @@ def processar_todos_videos():
                     video_resolvido = True
                     break # SAI DO LOOP DESTE VÍDEO
 
-        cap.release()
+        fonte.fechar()
         
         # SE ACABOU O VÍDEO E NÃO CONFIRMAMOS NADA
         if not video_resolvido:
@@ -5,9 +5,19 @@ import easyocr
 import re
 import os
 import urllib.request
+import argparse
+import threading
 from datetime import datetime
 from collections import Counter
-from backend import registrar_leitura
+from backend import registrar_leitura, adicionar_ouvinte_alerta, remover_ouvinte_alerta
+from config_runtime import configurar_runtime
+from fonte_frames import abrir_fonte, LeitorHD
+from indice_deteccoes import GravadorIndice, carregar_indice
+from evidencias import GravadorEvidencias
+from regiao_interesse import RegiaoInteresse, preparar_entrada, caixas_na_regiao, caixas_para_frame
+from qualidade_roi import SeletorQualidade
+# Dicionários de Correção (Letra <-> Número), compartilhados com o índice de placas
+from indice_placas import dict_letra_num, dict_num_letra
 
 # --- Configurações ---
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -20,29 +30,33 @@ PULAR_FRAMES = 2
 AMOSTRAS_PARA_CONFIRMAR = 3
 # Tamanho original da imagem para o OCR não perder detalhes
 TAMANHO_YOLO = 640 
+# Pesos do detector (também fazem parte da chave do índice de detecções)
+MODELO_YOLO = 'yolov8n.pt'
 
-# Dicionários de Correção (Letra <-> Número)
-dict_letra_num = {
-    'O': '0', 'Q': '0', 'D': '0', 'U': '0',
-    'I': '1', 'J': '1', 'L': '1',
-    'Z': '2',
-    'A': '4',
-    'S': '5', '$': '5',
-    'G': '6', 'b': '6',
-    'T': '7',
-    'B': '8',
-    'g': '9'
-}
-dict_num_letra = {
-    '0': 'O',
-    '1': 'I',
-    '2': 'Z',
-    '4': 'A',
-    '5': 'S',
-    '6': 'G',
-    '7': 'T',
-    '8': 'B'
-}
+# --- PRÉ-PROCESSAMENTO DA PLACA ---
+# False = caminho clássico (3x fixo + bilateral), com os mesmos pixels de sempre.
+# O adaptativo é bem mais rápido, mas só deve virar padrão depois que
+# benchmark_preprocessamento.py mostrar a mesma taxa de leitura do OCR.
+PREPROCESSAMENTO_ADAPTATIVO = False
+# Parâmetros do adaptativo: altura desejada (px) de cada caractere na imagem enviada ao OCR
+ALTURA_ALVO_CARACTERE = 48
+# Altura aproximada do caractere em relação ao recorte focal (ROI)
+FRACAO_CARACTERE_ROI = 0.20
+# Nunca amplia mais que o fator fixo antigo (3x)
+ESCALA_MAXIMA = 3.0
+# Variância do Laplaciano acima da qual o recorte é considerado nítido
+LIMIAR_NITIDEZ = 150.0
+
+# Classes COCO de veículos (carro, moto, ônibus, caminhão) e confiança mínima do YOLO
+CLASSES_VEICULOS = [2, 3, 5, 7]
+CONFIANCA_MINIMA = 0.4
+
+# --- SELEÇÃO POR QUALIDADE ---
+# A cada JANELA_QUALIDADE recortes de um mesmo veículo, só TOP_K_QUALIDADE
+# (os mais nítidos/maiores/contrastados) vão para o tratamento + OCR.
+# Sem Haar aqui: a nota não usa o critério PESO_HAAR (haar=None)
+JANELA_QUALIDADE = 4
+TOP_K_QUALIDADE = 2
 
 def corrigir_padrao_brasileiro(texto_bruto):
     """
@@ -84,23 +98,89 @@ def corrigir_padrao_brasileiro(texto_bruto):
 
     return "".join(chars)
 
+# Buffers de trabalho reaproveitados entre chamadas (só crescem).
+# Um conjunto por thread: duas threads chamando tratamento_imagem_hd não
+# escrevem uma no resultado da outra.
+_LOCAL = threading.local()
+
+def _buffer(nome, shape, dtype=np.uint8):
+    """View contígua com o shape exato, apoiada em memória pré-alocada."""
+    buffers = getattr(_LOCAL, 'buffers', None)
+    if buffers is None:
+        buffers = _LOCAL.buffers = {}
+    tamanho = int(np.prod(shape))
+    base = buffers.get(nome)
+    if base is None or base.size < tamanho:
+        # Folga de 50% para não realocar a cada recorte um pouco maior
+        base = np.empty(int(tamanho * 1.5), dtype=dtype)
+        buffers[nome] = base
+    return base[:tamanho].reshape(shape)
+
 def tratamento_imagem_hd(img):
     """
-    Prepara o recorte para o OCR com nitidez máxima.
+    Prepara o recorte para o OCR com nitidez máxima (clássico ou adaptativo,
+    conforme PREPROCESSAMENTO_ADAPTATIVO).
+    CONTRATO: o retorno é uma view de um buffer da thread que chamou e é
+    sobrescrito na próxima chamada da mesma thread. Consuma (OCR) antes de
+    chamar de novo ou guarde uma cópia (.copy()).
     """
-    # 1. Upscaling (3x) com interpolação suave
-    img = cv2.resize(img, None, fx=3.0, fy=3.0, interpolation=cv2.INTER_CUBIC)
-    
-    # 2. Converte para Cinza
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    
-    # 3. Bilateral Filter (Remove ruído mas mantém bordas das letras)
-    gray = cv2.bilateralFilter(gray, 11, 17, 17)
-    
+    if PREPROCESSAMENTO_ADAPTATIVO:
+        return tratamento_adaptativo(img)
+    return tratamento_classico(img)
+
+def tratamento_classico(img):
+    """3x fixo + cinza + bilateral, nos buffers da thread (pixels iguais à versão que alocava)."""
+    h, w = img.shape[:2]
+    H, W = h * 3, w * 3
+
+    # 1. Upscaling (Aumenta a imagem 3x)
+    ampliada = cv2.resize(img, (W, H), dst=_buffer('ampliada_cor', (H, W, 3)), interpolation=cv2.INTER_CUBIC)
+    gray = cv2.cvtColor(ampliada, cv2.COLOR_BGR2GRAY, dst=_buffer('cinza', (H, W)))
+
+    # 2. Filtro Bilateral (Remove ruído mas mantém bordas das letras)
+    filtrada = cv2.bilateralFilter(gray, 11, 17, 17, dst=_buffer('filtrada', (H, W)))
+
+    # 3. Borda Branca (Padding)
+    saida = _buffer('saida', (H + 40, W + 40))
+    cv2.copyMakeBorder(filtrada, 20, 20, 20, 20, cv2.BORDER_CONSTANT, dst=saida, value=255)
+    return saida
+
+def tratamento_adaptativo(img):
+    """
+    A ampliação mira uma altura de caractere (e não um fator fixo) e o filtro
+    bilateral só é usado quando o recorte está borrado.
+    """
+    h, w = img.shape[:2]
+
+    # 1. Converte para Cinza ANTES de ampliar (1 canal = 1/3 do custo do resize)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY, dst=_buffer('cinza', (h, w)))
+
+    # 2. Upscaling adaptativo: caractere estimado -> ALTURA_ALVO_CARACTERE
+    altura_caractere = max(1.0, h * FRACAO_CARACTERE_ROI)
+    escala = min(ESCALA_MAXIMA, max(1.0, ALTURA_ALVO_CARACTERE / altura_caractere))
+    H, W = int(round(h * escala)), int(round(w * escala))
+    if escala > 1.0:
+        ampliada = cv2.resize(gray, (W, H), dst=_buffer('ampliada', (H, W)), interpolation=cv2.INTER_CUBIC)
+    else:
+        ampliada = gray
+
+    # 3. Remoção de ruído conforme a nitidez (variância do Laplaciano no recorte pequeno)
+    lap = cv2.Laplacian(gray, cv2.CV_32F, dst=_buffer('laplaciano', (h, w), np.float32))
+    nitidez = float(lap.var())
+    filtrada = _buffer('filtrada', (H, W))
+    if nitidez >= LIMIAR_NITIDEZ:
+        # Recorte já nítido: suavização leve basta
+        cv2.GaussianBlur(ampliada, (3, 3), 0, dst=filtrada)
+    else:
+        # Bilateral (Remove ruído mas mantém bordas das letras), diâmetro proporcional à escala
+        diametro = max(5, int(round(11 * escala / 3.0))) | 1
+        cv2.bilateralFilter(ampliada, diametro, 17, 17, dst=filtrada)
+
     # 4. Borda Branca (Padding)
-    gray = cv2.copyMakeBorder(gray, 20, 20, 20, 20, cv2.BORDER_CONSTANT, value=255)
-    
-    return gray
+    saida = _buffer('saida', (H + 40, W + 40))
+    cv2.copyMakeBorder(filtrada, 20, 20, 20, 20, cv2.BORDER_CONSTANT, dst=saida, value=255)
+
+    return saida
 
 def imprimir_cabecalho_tabela():
     print("\n" + "="*105)
@@ -111,9 +191,269 @@ def imprimir_linha_tabela(status, placa, data, hora, tempo_vid, arquivo):
     cor_status = "✅" if status == "DETECTADA" else "⚠️"
     print(f"{cor_status} {status:<12} | {placa:<10} | {data:<12} | {hora:<10} | {tempo_vid:<12} | {arquivo}")
 
-def processar_todos_videos():
+def extrair_veiculos(resultados, scale):
+    """
+    Filtra apenas carros/motos/ônibus/caminhões com confiança média e
+    devolve as caixas mapeadas de volta para HD (Imagem Original).
+    O índice de detecções usa o mesmo caixas_para_frame: a re-análise recorta os mesmos pixels.
+    """
+    caixas = []
+    for r in resultados:
+        if len(r.boxes) == 0:
+            continue
+        manter = np.isin(r.boxes.cls.cpu().numpy().astype(int), CLASSES_VEICULOS) & \
+            (r.boxes.conf.cpu().numpy() > CONFIANCA_MINIMA)
+        if manter.any():
+            caixas += [tuple(c) for c in caixas_para_frame(r.boxes.xyxy.cpu().numpy()[manter], scale).tolist()]
+    return caixas
+
+def recortar_roi_foco(frame, caixa):
+    """
+    --- TÉCNICA DE VARREDURA FOCAL ---
+    Em vez de tentar achar a placa ou ler o para-choque inteiro,
+    vamos focar estritamente no CENTRO INFERIOR, onde 99% das placas estão.
+    """
+    h_orig, w_orig = frame.shape[:2]
+    x1, y1, x2, y2 = caixa
+
+    # Recorte do Veículo
+    veiculo_crop = frame[max(0, y1):min(h_orig, y2), max(0, x1):min(w_orig, x2)]
+    if veiculo_crop.size == 0: return None
+
+    h_v, w_v = veiculo_crop.shape[:2]
+
+    # Define área de interesse (ROI) - 40% inferior, centralizado
+    corte_topo = int(h_v * 0.55)
+    corte_base = int(h_v * 0.95)
+    corte_esq = int(w_v * 0.20)
+    corte_dir = int(w_v * 0.80)
+
+    roi_foco = veiculo_crop[corte_topo:corte_base, corte_esq:corte_dir]
+    return roi_foco if roi_foco.size > 0 else None
+
+def ler_placas(reader, roi_foco):
+    """Tratamento HD + OCR. Devolve as leituras que viraram placas válidas."""
+    placas = []
+    img_ocr = tratamento_imagem_hd(roi_foco)
+    try:
+        # OCR: detail=0 retorna apenas o texto
+        leituras = reader.readtext(img_ocr, detail=0, allowlist='ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
+
+        for texto_cru in leituras:
+            # Tenta "consertar" o texto lido
+            placa_limpa = corrigir_padrao_brasileiro(texto_cru)
+
+            if placa_limpa:
+                placas.append(placa_limpa)
+    except: pass
+    return placas
+
+def ler_placas_rois(reader, rois, ao_ler=None):
+    """`ao_ler(placa, roi)`: chamado para cada placa válida com o recorte de onde ela saiu."""
+    placas = []
+    for roi_foco in rois:
+        if roi_foco is not None:
+            lidas = ler_placas(reader, roi_foco)
+            if ao_ler is not None:
+                for placa in lidas:
+                    ao_ler(placa, roi_foco)
+            placas.extend(lidas)
+    return placas
+
+def criar_seletor():
+    return SeletorQualidade(JANELA_QUALIDADE, TOP_K_QUALIDADE)
+
+def ler_placas_frame(reader, frame, caixas, seletor=None, ao_ler=None):
+    """
+    Com `seletor`, só os melhores recortes de cada veículo na janela vão ao OCR.
+    Chame também nos frames sem veículo (caixas vazias): é assim que o
+    seletor percebe que o veículo saiu e libera o que sobrou da janela dele.
+    """
+    rois = [recortar_roi_foco(frame, caixa) for caixa in caixas]
+    if seletor is not None:
+        rois = seletor.adicionar([(caixa, roi, None) for caixa, roi in zip(caixas, rois)])
+    return ler_placas_rois(reader, rois, ao_ler)
+
+def decidir_placa(leituras_buffer):
+    """
+    --- SISTEMA DE DECISÃO RÁPIDA ---
+    Devolve (placa_vencedora ou None, buffer atualizado).
+    """
+    # Se acumulamos 3 leituras (buffer cheio)
+    if len(leituras_buffer) < AMOSTRAS_PARA_CONFIRMAR:
+        return None, leituras_buffer
+
+    contagem = Counter(leituras_buffer)
+    placa_vencedora, frequencia = contagem.most_common(1)[0]
+
+    # Se a placa apareceu na maioria das vezes
+    if frequencia >= 2: # Reduzi para 2/3 para ser mais ágil no início do vídeo
+        # Limpa buffer para pegar o próximo carro
+        return placa_vencedora, []
+
+    # Limpa buffer se ficar muito sujo
+    if len(leituras_buffer) > 10:
+        return None, []
+    return None, leituras_buffer
+
+def formatar_tempo_video(frame_count, fps):
+    segundos_totais = int(frame_count / fps)
+    return f"{segundos_totais//60:02d}:{segundos_totais%60:02d}"
+
+def imprimir_placa(placa_vencedora, frame_count, fps, nome_video):
+    """Só imprime na tabela (re-análise: as passagens já foram gravadas no banco)."""
+    agora = datetime.now()
+    tempo_video = formatar_tempo_video(frame_count, fps)
+
+    imprimir_linha_tabela(
+        status="DETECTADA",
+        placa=placa_vencedora,
+        data=agora.strftime("%d/%m/%Y"),
+        hora=agora.strftime("%H:%M:%S"),
+        tempo_vid=tempo_video,
+        arquivo=nome_video
+    )
+    return agora, tempo_video
+
+def confirmar_placa(placa_vencedora, frame_count, fps, nome_video):
+    """Imprime na tabela e manda para o banco."""
+    agora, tempo_video = imprimir_placa(placa_vencedora, frame_count, fps, nome_video)
+    registrar_leitura(placa_vencedora, agora, tempo_video, nome_video)
+
+def processar_video(caminho_video, yolo_model, reader, gravar_indice=True, ao_confirmar=confirmar_placa,
+                    gravar_evidencias=True, selecionar_qualidade=True, regiao=None):
+    """
+    Processa um vídeo e devolve o conjunto de placas registradas.
+    `ao_confirmar(placa, frame_count, fps, nome_video)` recebe cada placa confirmada.
+    `regiao` (RegiaoInteresse): o YOLO vê só o retângulo da portaria e veículos
+    com o centro fora do polígono não vão ao OCR.
+    """
+    nome_video = os.path.basename(caminho_video)
+
+    # A fonte já entrega 1 a cada PULAR_FRAMES, reduzido para o YOLO
+    fonte = abrir_fonte(caminho_video, PULAR_FRAMES, TAMANHO_YOLO)
+    fps = fonte.fps
+
+    # Caixas de todos os frames amostrados vão para o índice do vídeo (re-análise)
+    gravador = GravadorIndice(caminho_video, MODELO_YOLO, TAMANHO_YOLO, PULAR_FRAMES, fps, regiao) if gravar_indice else None
+
+    # Buffer dos últimos segundos: vira clipe + recorte se a leitura gerar alerta
+    evidencias = GravadorEvidencias(nome_video) if gravar_evidencias else None
+    if evidencias is not None:
+        adicionar_ouvinte_alerta(evidencias.ao_alerta)
+    # Recorte de cada placa lida: vira o "melhor recorte" se ela gerar alerta
+    ao_ler = evidencias.associar if evidencias is not None else None
+
+    seletor = criar_seletor() if selecionar_qualidade else None
+    leituras_buffer = []
+    placas_registradas_neste_video = set()
+    frame_count = 0
+
+    # --- CORREÇÃO DO INÍCIO DO VÍDEO ---
+    # Processa frames com mais frequência (PULAR_FRAMES = 2)
+    for frame_count, frame_input, scale in fonte:
+
+        entrada, origem = frame_input, (0, 0)
+        if regiao is not None:
+            # Com ROI, o retângulo da portaria sai do frame HD (mais pixels por placa)
+            frame_hd = fonte.ler_frame_hd(frame_count)
+            if frame_hd is not None:
+                entrada, scale, origem = preparar_entrada(frame_hd, TAMANHO_YOLO, regiao)
+
+        resultados = yolo_model(entrada, verbose=False)
+        if gravador is not None:
+            gravador.adicionar(frame_count, resultados, scale, origem)
+        if evidencias is not None:
+            evidencias.empurrar(frame_input, frame_count / fps)
+        caixas, _ = caixas_na_regiao(extrair_veiculos(resultados, scale), origem, regiao)
+
+        # Frame em resolução cheia só é buscado quando há veículo
+        frame = fonte.ler_frame_hd(frame_count) if caixas else None
+        if frame is None:
+            caixas = []
+        leituras_buffer.extend(ler_placas_frame(reader, frame, caixas, seletor, ao_ler))
+
+        placa_vencedora, leituras_buffer = decidir_placa(leituras_buffer)
+        if placa_vencedora and placa_vencedora not in placas_registradas_neste_video:
+            ao_confirmar(placa_vencedora, frame_count, fps, nome_video)
+            placas_registradas_neste_video.add(placa_vencedora)
+
+    if seletor is not None:
+        # Janelas incompletas do fim do vídeo ainda vão ao OCR
+        leituras_buffer.extend(ler_placas_rois(reader, seletor.esvaziar(), ao_ler))
+        placa_vencedora, leituras_buffer = decidir_placa(leituras_buffer)
+        if placa_vencedora and placa_vencedora not in placas_registradas_neste_video:
+            ao_confirmar(placa_vencedora, frame_count, fps, nome_video)
+            placas_registradas_neste_video.add(placa_vencedora)
+
+    fonte.fechar()
+    if gravador is not None:
+        gravador.concluir()
+    if evidencias is not None:
+        remover_ouvinte_alerta(evidencias.ao_alerta)
+        evidencias.fechar()
+    return placas_registradas_neste_video
+
+def reanalisar_video(caminho_video, indice, reader, ao_confirmar=imprimir_placa, selecionar_qualidade=True,
+                     regiao=None):
+    """
+    Mesmo fluxo de processar_video, mas sem decoder completo nem YOLO:
+    as caixas vêm do índice e só os frames com veículo são lidos (seek direto).
+    Frames sem veículo não alteram a votação, então o resultado é o mesmo.
+    Por padrão não grava no banco: o vídeo já foi registrado quando o índice foi criado,
+    e gravar de novo contaria cada passagem como uma nova entrada/saída.
+    """
+    nome_video = os.path.basename(caminho_video)
+    leitor = LeitorHD(caminho_video)
+
+    seletor = criar_seletor() if selecionar_qualidade else None
+    leituras_buffer = []
+    placas_registradas_neste_video = set()
+    frame_count = anterior = 0
+
+    for frame_count, caixas in indice.frames_com_veiculos(CLASSES_VEICULOS, CONFIANCA_MINIMA, PULAR_FRAMES):
+        if seletor is not None:
+            # Frames amostrados sem veículo (fora do índice) contam como ausência no seletor
+            vazios = (frame_count - anterior) // PULAR_FRAMES - 1
+            for _ in range(min(vazios, seletor.max_ausencia + 1)):
+                leituras_buffer.extend(ler_placas_rois(reader, seletor.adicionar([])))
+            anterior = frame_count
+
+        if regiao is not None:
+            caixas = [c for c in caixas if regiao.contem_centro(c)]
+        frame = leitor.ler(frame_count) if caixas else None
+        leituras_buffer.extend(ler_placas_frame(reader, frame, caixas if frame is not None else [], seletor))
+
+        placa_vencedora, leituras_buffer = decidir_placa(leituras_buffer)
+        if placa_vencedora and placa_vencedora not in placas_registradas_neste_video:
+            ao_confirmar(placa_vencedora, frame_count, indice.fps, nome_video)
+            placas_registradas_neste_video.add(placa_vencedora)
+
+    if seletor is not None:
+        leituras_buffer.extend(ler_placas_rois(reader, seletor.esvaziar()))
+        placa_vencedora, leituras_buffer = decidir_placa(leituras_buffer)
+        if placa_vencedora and placa_vencedora not in placas_registradas_neste_video:
+            ao_confirmar(placa_vencedora, frame_count, indice.fps, nome_video)
+            placas_registradas_neste_video.add(placa_vencedora)
+
+    leitor.fechar()
+    return placas_registradas_neste_video
+
+def carregar_modelos():
+    # YOLO Detector
+    yolo_model = YOLO(MODELO_YOLO) 
+    
+    # EasyOCR configurado para precisão (quantize=False usa float32, mais lento mas mais preciso)
+    reader = easyocr.Reader(['pt'], gpu=False, verbose=False, quantize=False) 
+    return yolo_model, reader
+
+def processar_todos_videos(reanalise=False, gravar_indice=True, gravar_evidencias=True, selecionar_qualidade=True,
+                           regiao=None):
     print(f"--- SISTEMA DE DETECÇÃO: MÚLTIPLOS VEÍCULOS EM VÍDEO ---")
     
+    # DIVIDE OS NÚCLEOS ENTRE TORCH, OPENCV E WORKERS
+    configurar_runtime()
+
     if not os.path.exists(VIDEOS_DIR):
         print(f"❌ ERRO: Pasta não encontrada: {VIDEOS_DIR}")
         return
@@ -124,123 +464,29 @@ def processar_todos_videos():
         print("Nenhum vídeo encontrado.")
         return
 
-    # YOLO Detector
-    yolo_model = YOLO('yolov8n.pt') 
-    
-    # EasyOCR configurado para precisão (quantize=False usa float32, mais lento mas mais preciso)
-    reader = easyocr.Reader(['pt'], gpu=False, verbose=False, quantize=False) 
+    yolo_model, reader = carregar_modelos()
+
+    # Re-análise é para ajuste de OCR/votação: imprime as placas, mas não grava no banco de novo
+    ao_confirmar = imprimir_placa if reanalise else confirmar_placa
+    if reanalise:
+        print("ℹ️ Re-análise: placas só na tabela, nada é gravado no banco.")
 
     imprimir_cabecalho_tabela()
 
     for nome_video in arquivos_video:
         caminho_video = os.path.join(VIDEOS_DIR, nome_video)
-        cap = cv2.VideoCapture(caminho_video)
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        if fps == 0: fps = 30
-
-        leituras_buffer = []
-        placas_registradas_neste_video = set()
-        frame_count = 0
-
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret: break 
-            
-            frame_count += 1
-            
-            # --- CORREÇÃO DO INÍCIO DO VÍDEO ---
-            # Processa frames com mais frequência (PULAR_FRAMES = 2)
-            if frame_count % PULAR_FRAMES != 0: continue
-
-            # Prepara imagem para o YOLO
-            h_orig, w_orig = frame.shape[:2]
-            scale = TAMANHO_YOLO / max(h_orig, w_orig)
-            if scale < 1:
-                frame_input = cv2.resize(frame, None, fx=scale, fy=scale)
-            else:
-                frame_input = frame
-
-            resultados = yolo_model(frame_input, verbose=False)
-            
-            for r in resultados:
-                for box in r.boxes:
-                    # Filtra apenas carros/motos/caminhões com confiança média
-                    if int(box.cls[0]) in [2, 3, 5, 7] and box.conf[0] > 0.4:
-                        x1, y1, x2, y2 = map(int, box.xyxy[0])
-                        
-                        # Mapeia de volta para HD (Imagem Original)
-                        if scale < 1:
-                            x1, x2 = int(x1/scale), int(x2/scale)
-                            y1, y2 = int(y1/scale), int(y2/scale)
-                        
-                        # Recorte do Veículo
-                        veiculo_crop = frame[max(0, y1):min(h_orig, y2), max(0, x1):min(w_orig, x2)]
-                        if veiculo_crop.size == 0: continue
-                        
-                        h_v, w_v = veiculo_crop.shape[:2]
-                        
-                        # --- TÉCNICA DE VARREDURA FOCAL ---
-                        # Em vez de tentar achar a placa ou ler o para-choque inteiro,
-                        # vamos focar estritamente no CENTRO INFERIOR, onde 99% das placas estão.
-                        
-                        # Define área de interesse (ROI) - 40% inferior, centralizado
-                        corte_topo = int(h_v * 0.55)
-                        corte_base = int(h_v * 0.95)
-                        corte_esq = int(w_v * 0.20)
-                        corte_dir = int(w_v * 0.80)
-                        
-                        roi_foco = veiculo_crop[corte_topo:corte_base, corte_esq:corte_dir]
-                        
-                        if roi_foco.size > 0:
-                            # Tratamento HD
-                            img_ocr = tratamento_imagem_hd(roi_foco)
-                            
-                            try:
-                                # OCR: detail=0 retorna apenas o texto
-                                leituras = reader.readtext(img_ocr, detail=0, allowlist='ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
-                                
-                                for texto_cru in leituras:
-                                    # Tenta "consertar" o texto lido
-                                    placa_limpa = corrigir_padrao_brasileiro(texto_cru)
-                                    
-                                    if placa_limpa:
-                                        leituras_buffer.append(placa_limpa)
-                            except: pass
-
-            # --- SISTEMA DE DECISÃO RÁPIDA ---
-            # Se acumulamos 3 leituras (buffer cheio)
-            if len(leituras_buffer) >= AMOSTRAS_PARA_CONFIRMAR:
-                contagem = Counter(leituras_buffer)
-                placa_vencedora, frequencia = contagem.most_common(1)[0]
-                
-                # Se a placa apareceu na maioria das vezes
-                if frequencia >= 2: # Reduzi para 2/3 para ser mais ágil no início do vídeo
-                    
-                    if placa_vencedora not in placas_registradas_neste_video:
-                        agora = datetime.now()
-                        segundos_totais = int(frame_count / fps)
-                        tempo_video = f"{segundos_totais//60:02d}:{segundos_totais%60:02d}"
-                        
-                        imprimir_linha_tabela(
-                            status="DETECTADA",
-                            placa=placa_vencedora,
-                            data=agora.strftime("%d/%m/%Y"),
-                            hora=agora.strftime("%H:%M:%S"),
-                            tempo_vid=tempo_video,
-                            arquivo=nome_video
-                        )
-                        
-                        registrar_leitura(placa_vencedora, agora, tempo_video, nome_video)
-                        placas_registradas_neste_video.add(placa_vencedora)
-                    
-                    # Limpa buffer para pegar o próximo carro
-                    leituras_buffer = []
-                
-                # Limpa buffer se ficar muito sujo
-                if len(leituras_buffer) > 10:
-                    leituras_buffer = []
-
-        cap.release()
+        # Re-análise: usa o índice de detecções se ele existir e for deste vídeo/modelo
+        indice = carregar_indice(caminho_video, MODELO_YOLO, TAMANHO_YOLO, regiao) if reanalise else None
+        if indice is not None:
+            placas_registradas_neste_video = reanalisar_video(caminho_video, indice, reader, ao_confirmar,
+                                                              selecionar_qualidade=selecionar_qualidade,
+                                                              regiao=regiao)
+        else:
+            placas_registradas_neste_video = processar_video(caminho_video, yolo_model, reader, gravar_indice,
+                                                             ao_confirmar=ao_confirmar,
+                                                             gravar_evidencias=gravar_evidencias,
+                                                             selecionar_qualidade=selecionar_qualidade,
+                                                             regiao=regiao)
         
         if not placas_registradas_neste_video:
              imprimir_linha_tabela("NÃO ENC.", "---", "---", "---", "---", nome_video)
@@ -249,4 +495,17 @@ def processar_todos_videos():
     print("🏁 PROCESSAMENTO FINALIZADO.")
 
 if __name__ == "__main__":
-    processar_todos_videos()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Detecção de múltiplos veículos em vídeo.")
+    parser.add_argument("--reanalise", action="store_true",
+                        help="Reaproveita o índice de detecções (pula decoder completo e YOLO); não grava no banco")
+    parser.add_argument("--sem-indice", action="store_true", help="Não grava o índice de detecções")
+    parser.add_argument("--sem-evidencias", action="store_true", help="Não grava clipes/recortes dos alertas")
+    parser.add_argument("--sem-selecao", action="store_true",
+                        help="Manda todo recorte ao OCR (sem a seleção por qualidade)")
+    parser.add_argument("--roi", default=None,
+                        help="Polígono da portaria em pixels, igual para todos os vídeos: 'x1,y1 x2,y2 x3,y3 ...'")
+    args = parser.parse_args()
+    regiao = RegiaoInteresse.de_texto(args.roi) if args.roi else None
+    processar_todos_videos(reanalise=args.reanalise, gravar_indice=not args.sem_indice,
+                           gravar_evidencias=not args.sem_evidencias, selecionar_qualidade=not args.sem_selecao,
+                           regiao=regiao)
\ No newline at end of file
@@ -0,0 +1,173 @@
+# vision_core_videos_multiprocesso.py
+# Versão multiprocesso do script de múltiplos veículos.
+# O processo principal decodifica cada vídeo UMA vez e escreve os frames
+# amostrados em um anel de memória compartilhada (anel_frames.py).
+# N workers (um por fatia de núcleos) leem os frames sem cópia, rodam YOLO +
+# OCR e devolvem apenas as placas lidas. A votação continua no principal, na
+# ordem original dos frames, com as mesmas regras do script de um processo.
+import os
+import queue
+import multiprocessing as mp
+import cv2
+from anel_frames import AnelFrames
+from config_runtime import configurar_runtime
+import vision_core_videos_multiplos_veiculos as nucleo
+
+# Núcleos reservados para cada worker (YOLO + EasyOCR + OpenCV)
+NUCLEOS_POR_WORKER = 4
+# Slots do anel por worker (folga para o decodificador não esperar)
+SLOTS_POR_WORKER = 2
+# Maior frame aceito pelo anel; frames maiores são reduzidos antes de escrever
+TAMANHO_SLOT = (1080, 1920, 3)
+
+
+def _worker(descritor, k, n_workers, saida):
+    """Consome as seqs k, k+N, k+2N... do anel."""
+    configurar_runtime(cameras=n_workers, verbose=False)
+    yolo_model, reader = nucleo.carregar_modelos()
+    anel = AnelFrames.conectar(descritor)
+
+    seq = k
+    while True:
+        item = anel.adquirir(seq)
+        if item is None: break
+        frame, _ = item
+
+        h_orig, w_orig = frame.shape[:2]
+        scale = nucleo.TAMANHO_YOLO / max(h_orig, w_orig)
+        frame_input = cv2.resize(frame, None, fx=scale, fy=scale) if scale < 1 else frame
+
+        caixas = nucleo.extrair_veiculos(yolo_model(frame_input, verbose=False), scale)
+        placas = nucleo.ler_placas_frame(reader, frame, caixas) if caixas else []
+
+        # Solta o slot assim que o frame não é mais necessário
+        anel.liberar(seq)
+        saida.put((seq, placas))
+        seq += n_workers
+
+    anel.fechar()
+
+
+class Coletor:
+    """Recebe as placas fora de ordem e aplica a votação na ordem dos frames."""
+
+    def __init__(self, saida):
+        self.saida = saida
+        self.origem = {}       # seq -> (nome_video, frame_count, fps)
+        self.resultados = {}   # seq -> placas (ainda fora de ordem)
+        self.proxima = 0
+        self.video_atual = None
+        self.leituras_buffer = []
+        self.registradas = set()
+
+    def consumir(self, bloquear=False):
+        try:
+            while True:
+                seq, placas = self.saida.get(block=bloquear, timeout=1 if bloquear else None)
+                self.resultados[seq] = placas
+                bloquear = False
+        except queue.Empty:
+            pass
+
+        while self.proxima in self.resultados:
+            self._votar(self.proxima, self.resultados.pop(self.proxima))
+            self.proxima += 1
+
+    def _votar(self, seq, placas):
+        nome_video, frame_count, fps = self.origem.pop(seq)
+        if nome_video != self.video_atual:
+            self.finalizar_video()
+            self.video_atual = nome_video
+
+        self.leituras_buffer.extend(placas)
+        placa_vencedora, self.leituras_buffer = nucleo.decidir_placa(self.leituras_buffer)
+        if placa_vencedora and placa_vencedora not in self.registradas:
+            nucleo.confirmar_placa(placa_vencedora, frame_count, fps, nome_video)
+            self.registradas.add(placa_vencedora)
+
+    def finalizar_video(self):
+        if self.video_atual is not None and not self.registradas:
+            nucleo.imprimir_linha_tabela("NÃO ENC.", "---", "---", "---", "---", self.video_atual)
+        self.video_atual = None
+        self.leituras_buffer = []
+        self.registradas = set()
+
+    def aguardar(self, ate_seq, workers):
+        """Bloqueia até todas as seqs < ate_seq terem sido votadas."""
+        while self.proxima < ate_seq:
+            if not all(p.is_alive() for p in workers):
+                raise RuntimeError("Um worker de inferência terminou inesperadamente.")
+            self.consumir(bloquear=True)
+
+
+def processar_todos_videos(n_workers=None):
+    print(f"--- SISTEMA DE DETECÇÃO: MÚLTIPLOS VEÍCULOS EM VÍDEO (MULTIPROCESSO) ---")
+
+    orcamento = configurar_runtime()
+    if n_workers is None:
+        n_workers = max(1, orcamento['nucleos'] // NUCLEOS_POR_WORKER)
+
+    if not os.path.exists(nucleo.VIDEOS_DIR):
+        print(f"❌ ERRO: Pasta não encontrada: {nucleo.VIDEOS_DIR}")
+        return
+
+    arquivos_video = [f for f in os.listdir(nucleo.VIDEOS_DIR) if f.lower().endswith(('.mp4', '.avi', '.mov', '.mkv'))]
+    if not arquivos_video:
+        print("Nenhum vídeo encontrado.")
+        return
+
+    anel = AnelFrames.criar(n_workers * SLOTS_POR_WORKER, TAMANHO_SLOT)
+    saida = mp.Queue()
+    workers = [mp.Process(target=_worker, args=(anel.descritor(), k, n_workers, saida), daemon=True)
+               for k in range(n_workers)]
+    for p in workers: p.start()
+
+    coletor = Coletor(saida)
+    # Worker morto segurando um slot travaria o decodificador para sempre
+    workers_vivos = lambda: all(p.is_alive() for p in workers)
+    print(f"🧵 {n_workers} worker(s) de inferência")
+    nucleo.imprimir_cabecalho_tabela()
+
+    try:
+        seq = 0
+        for nome_video in arquivos_video:
+            cap = cv2.VideoCapture(os.path.join(nucleo.VIDEOS_DIR, nome_video))
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30
+            frame_count = 0
+            coletor.video_atual = nome_video
+
+            while cap.isOpened():
+                frame_count += 1
+                # grab() descarta frames sem convertê-los
+                if frame_count % nucleo.PULAR_FRAMES != 0:
+                    if not cap.grab(): break
+                    continue
+
+                ret, frame = cap.read()
+                if not ret: break
+
+                h, w = frame.shape[:2]
+                if h > TAMANHO_SLOT[0] or w > TAMANHO_SLOT[1]:
+                    fator = min(TAMANHO_SLOT[0] / h, TAMANHO_SLOT[1] / w)
+                    frame = cv2.resize(frame, None, fx=fator, fy=fator, interpolation=cv2.INTER_AREA)
+
+                coletor.origem[seq] = (nome_video, frame_count, fps)
+                anel.escrever(frame, frame_count, vivos=workers_vivos)
+                seq += 1
+                coletor.consumir()
+
+            cap.release()
+            # A votação de um vídeo precisa terminar antes do próximo começar a imprimir
+            coletor.aguardar(seq, workers)
+            coletor.finalizar_video()
+    finally:
+        anel.encerrar()
+        for p in workers: p.join(timeout=10)
+        anel.fechar()
+
+    print("="*105)
+    print("🏁 PROCESSAMENTO FINALIZADO.")
+
+
+if __name__ == "__main__":
+    processar_todos_videos()
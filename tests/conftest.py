@@ -0,0 +1,5 @@
+# Os módulos do sistema ficam em src/ e se importam pelo nome (import database)
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+import pytest
+
+import alertas
+import backend
+import database
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    """Banco temporário, índices do backend zerados e alertas só em memória."""
+    monkeypatch.setattr(database, 'DB_NAME', str(tmp_path / 'teste.db'))
+    monkeypatch.setattr(backend, '_indice_placas', None)
+    monkeypatch.setattr(backend, '_ultima_leitura', None)
+    monkeypatch.setattr(backend, '_ultima_aceita', None)
+    memoria = alertas.SaidaMemoria()
+    anterior = alertas.instalar_despachante(alertas.DespachanteAlertas([memoria]))
+    database.inicializar_db()
+    yield memoria
+    alertas.instalar_despachante(anterior).fechar(timeout=1)
+
+
+def test_leitura_com_erro_de_ocr_encaixa_em_autorizado(banco):
+    database.atualizar_veiculo('ABC1D23', 'PARTICULAR', 'AUTORIZADO', 'Fulano')
+
+    assert backend.registrar_leitura('ABC1O23', datetime(2030, 1, 1, 8), '00:00', 'teste')
+
+    # Nenhum visitante novo e nenhum alerta: a leitura é o carro autorizado
+    assert database.buscar_info_veiculo('ABC1O23') is None
+    assert [linha[0] for linha in database.buscar_carros_no_campus()] == ['ABC1D23']
+    assert alertas.obter_despachante().contadores['publicados'] == 0
+
+
+def test_leitura_ambigua_nao_encaixa(banco):
+    # ABC1O23 está a uma troca de confusão de ABC1D23 e de ABC1Q23
+    database.atualizar_veiculo('ABC1D23', 'PARTICULAR', 'AUTORIZADO', 'Fulano')
+    database.atualizar_veiculo('ABC1Q23', 'PARTICULAR', 'AUTORIZADO', 'Beltrano')
+
+    assert backend.encaixar_placa_conhecida('ABC1O23') == 'ABC1O23'
+
+
+def test_troca_fora_dos_grupos_de_confusao_nao_encaixa(banco):
+    database.atualizar_veiculo('ABC1D23', 'PARTICULAR', 'AUTORIZADO', 'Fulano')
+
+    assert backend.encaixar_placa_conhecida('ABC1D24') == 'ABC1D24'
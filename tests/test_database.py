@@ -0,0 +1,73 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+import database
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DB_NAME', str(tmp_path / 'teste.db'))
+    database.inicializar_db()
+
+
+# Histórico com horas vazias no meio: A e B ficam dentro de 09h até 12h sem nenhum movimento
+MOVIMENTOS = [
+    ('AAA1A11', datetime(2030, 1, 1, 8, 10)),
+    ('BBB2B22', datetime(2030, 1, 1, 8, 20)),
+    ('CCC3C33', datetime(2030, 1, 1, 8, 30)),
+    ('CCC3C33', datetime(2030, 1, 1, 8, 50)),
+    ('AAA1A11', datetime(2030, 1, 1, 12, 5)),
+    ('DDD4D44', datetime(2030, 1, 1, 12, 40)),
+    ('BBB2B22', datetime(2030, 1, 1, 15, 15)),
+    ('DDD4D44', datetime(2030, 1, 1, 15, 45)),
+]
+
+
+def agregado_pela_tabela_registros(inicio, fim):
+    """Consulta direta em `registros` (como era antes dos agregados), hora a hora."""
+    conn = sqlite3.connect(database.DB_NAME)
+    c = conn.cursor()
+    dados = []
+    for h in range(inicio.hour, fim.hour + 1):
+        hora = inicio.replace(hour=h)
+        inicio_hora, fim_hora = str(hora), str(hora.replace(minute=59, second=59))
+        entradas = c.execute("SELECT COUNT(*) FROM registros WHERE entrada BETWEEN ? AND ?",
+                             (inicio_hora, fim_hora)).fetchone()[0]
+        saidas = c.execute("SELECT COUNT(*) FROM registros WHERE saida BETWEEN ? AND ?",
+                           (inicio_hora, fim_hora)).fetchone()[0]
+        # Pico: ocupação no início da hora e logo após cada movimento (quem sai conta até sair)
+        instantes = [inicio_hora] + [linha[0] for linha in c.execute(
+            """SELECT entrada FROM registros WHERE entrada BETWEEN ? AND ?
+               UNION SELECT saida FROM registros WHERE saida BETWEEN ? AND ?""",
+            (inicio_hora, fim_hora, inicio_hora, fim_hora))]
+        pico = max(c.execute("""SELECT COUNT(*) FROM registros
+                                WHERE entrada <= ? AND (saida IS NULL OR saida >= ?)""",
+                             (t, t)).fetchone()[0] for t in instantes)
+        dados.append((hora.strftime("%Y-%m-%d %H"), entradas, saidas, pico))
+    conn.close()
+    return dados
+
+
+def test_agregado_hora_confere_com_registros(banco):
+    for placa, instante in MOVIMENTOS:
+        database.salvar_registro(placa, instante, 'teste')
+
+    esperado = agregado_pela_tabela_registros(datetime(2030, 1, 1, 8), datetime(2030, 1, 1, 15))
+    assert database.buscar_agregado_hora('2030-01-01', '2030-01-01') == esperado
+    # Horas sem movimento mantêm o pico dos carros que continuam lá dentro
+    assert ('2030-01-01 10', 0, 0, 2) in esperado
+
+    database.reconstruir_agregados()
+    assert database.buscar_agregado_hora('2030-01-01', '2030-01-01') == esperado
+
+
+def test_agregado_hora_herda_ocupacao_de_dias_anteriores(banco):
+    database.salvar_registro('AAA1A11', datetime(2030, 1, 1, 22), 'teste')
+    database.salvar_registro('AAA1A11', datetime(2030, 1, 2, 3, 30), 'teste')
+
+    dados = database.buscar_agregado_hora('2030-01-02', '2030-01-02')
+    assert dados[0] == ('2030-01-02 00', 0, 0, 1)
+    assert dados[3] == ('2030-01-02 03', 0, 1, 1)
+    assert dados == agregado_pela_tabela_registros(datetime(2030, 1, 2, 0), datetime(2030, 1, 2, 3))
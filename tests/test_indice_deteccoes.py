@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from indice_deteccoes import GravadorIndice, carregar_indice
+
+nucleo = pytest.importorskip('vision_core_videos_multiplos_veiculos')
+
+
+class _Tensor:
+    def __init__(self, valores):
+        self.valores = np.asarray(valores, dtype=np.float32)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.valores
+
+
+class _Caixas:
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy, self.conf, self.cls = _Tensor(xyxy), _Tensor(conf), _Tensor(cls)
+
+    def __len__(self):
+        return len(self.xyxy.valores)
+
+
+class _Resultado:
+    def __init__(self, *args):
+        self.boxes = _Caixas(*args)
+
+
+# Coordenadas fracionárias de propósito: a truncagem precisa ser a mesma nos dois caminhos
+RESULTADOS = [_Resultado(
+    [[10.7, 20.2, 150.9, 99.99], [300.5, 40.4, 410.49, 170.6], [5.0, 5.0, 50.0, 50.0]],
+    [0.91, 0.55, 0.80],
+    [2, 7, 0],  # a última é pessoa: fica fora dos dois caminhos
+)]
+
+
+@pytest.mark.parametrize('scale,origem', [(1.0, (0, 0)), (640 / 1920, (0, 0)), (640 / 1100, (413, 217))])
+def test_reanalise_recorta_as_mesmas_caixas(tmp_path, scale, origem):
+    video = tmp_path / 'video.mp4'
+    video.write_bytes(b'0')
+
+    gravador = GravadorIndice(str(video), 'yolov8n.pt', 640, 2, 15.0)
+    gravador.adicionar(4, RESULTADOS, scale, origem)
+    gravador.concluir()
+    indice = carregar_indice(str(video), 'yolov8n.pt', 640)
+
+    ox, oy = origem
+    esperadas = [(x1 + ox, y1 + oy, x2 + ox, y2 + oy)
+                 for x1, y1, x2, y2 in nucleo.extrair_veiculos(RESULTADOS, scale)]
+    assert len(esperadas) == 2
+    assert list(indice.frames_com_veiculos(nucleo.CLASSES_VEICULOS, nucleo.CONFIANCA_MINIMA, 2)) == [(4, esperadas)]
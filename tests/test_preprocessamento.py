@@ -0,0 +1,23 @@
+import cv2
+import numpy as np
+import pytest
+
+nucleo = pytest.importorskip('vision_core_videos_multiplos_veiculos')
+
+
+def tratamento_que_alocava(img):
+    """tratamento_imagem_hd de antes dos buffers e do caminho adaptativo."""
+    img = cv2.resize(img, None, fx=3.0, fy=3.0, interpolation=cv2.INTER_CUBIC)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    gray = cv2.bilateralFilter(gray, 11, 17, 17)
+    return cv2.copyMakeBorder(gray, 20, 20, 20, 20, cv2.BORDER_CONSTANT, value=255)
+
+
+def test_padrao_mantem_os_pixels_do_caminho_antigo():
+    assert nucleo.PREPROCESSAMENTO_ADAPTATIVO is False
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (400, 700, 3), dtype=np.uint8)
+    # Recortes de tamanhos variados (views não contíguas, como os do frame HD), o maior antes do menor
+    for x, y, w, h in [(10, 20, 480, 192), (100, 50, 60, 24), (5, 300, 241, 97), (0, 0, 120, 48)]:
+        roi = frame[y:y + h, x:x + w]
+        assert np.array_equal(nucleo.tratamento_imagem_hd(roi), tratamento_que_alocava(roi))
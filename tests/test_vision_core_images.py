@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+imagens = pytest.importorskip('vision_core_images')
+
+
+class _Caixa:
+    def __init__(self, xyxy):
+        self.xyxy, self.conf, self.cls = [np.array(xyxy, dtype=np.float32)], [0.9], [2]
+
+
+class _Resultado:
+    def __init__(self, caixas):
+        self.boxes = [_Caixa(c) for c in caixas]
+
+
+class _YoloFalso:
+    """Um veículo fixo por imagem; guarda os shapes de cada chamada."""
+    def __init__(self):
+        self.chamadas = []
+
+    def __call__(self, entradas, verbose=False):
+        self.chamadas.append([e.shape for e in entradas])
+        return [_Resultado([[10, 10, 10 + e.shape[1] // 2, 10 + e.shape[0] // 2]]) for e in entradas]
+
+
+class _LeitorFalso:
+    """Devolve, para cada ROI, a placa 'lida' a partir dos próprios pixels."""
+    def __init__(self):
+        self.individuais, self.lotes = [], []
+
+    @staticmethod
+    def _placa(img):
+        return 'ABC%d%s%02d' % (int(img.mean()) % 10, 'ABCDEFGHIJ'[img.shape[1] % 10], img.shape[0] % 100)
+
+    def readtext(self, img, detail=0, allowlist=None):
+        self.individuais.append(img.copy())
+        return [self._placa(img)]
+
+    def readtext_batched(self, imgs, detail=0, allowlist=None, batch_size=1):
+        self.lotes.append([img.copy() for img in imgs])
+        return [[self._placa(img)] for img in imgs]
+
+
+class _CascadeSemPlaca:
+    def detectMultiScale(self, *args):
+        return []
+
+
+def test_lote_le_os_mesmos_pixels_do_modo_normal():
+    rng = np.random.default_rng(0)
+    # Duas resoluções de câmera misturadas no mesmo lote
+    frames = [rng.integers(0, 256, shape, dtype=np.uint8)
+              for shape in [(360, 640, 3), (480, 320, 3), (360, 640, 3), (360, 640, 3)]]
+    decodificados = [(f, f, 1.0) for f in frames]
+
+    yolo, leitor = _YoloFalso(), _LeitorFalso()
+    leituras = imagens.ler_lote(decodificados, yolo, leitor, _CascadeSemPlaca())
+
+    # YOLO: um lote por tamanho de imagem
+    assert sorted(len(c) for c in yolo.chamadas) == [1, 3]
+    assert all(len(set(c)) == 1 for c in yolo.chamadas)
+
+    # OCR: lotes só com ROIs do mesmo tamanho, pixels iguais aos do modo normal
+    esperadas = []
+    for f in frames:
+        veiculo = f[10:10 + f.shape[0] // 2, 10:10 + f.shape[1] // 2]
+        esperadas.append(imagens.preprocessamento_rapido(imagens.localizar_roi_placa(veiculo, _CascadeSemPlaca())))
+    enviadas = leitor.individuais + [img for lote in leitor.lotes for img in lote]
+    assert len(enviadas) == len(esperadas)
+    assert all(any(e.shape == img.shape and np.array_equal(e, img) for img in enviadas) for e in esperadas)
+    assert all(len({img.shape for img in lote}) == 1 for lote in leitor.lotes)
+
+    # Cada imagem recebe a leitura da própria ROI
+    assert leituras == [[_LeitorFalso._placa(e)] for e in esperadas]